@@ -22,6 +22,8 @@ class Agent:
         navmesh (NavMesh): Class for pathfinding
         velocity_l (float): Linear velocity
         velocity_r (float): Rotational (angular) velocity
+        fleet (Fleet): Fleet that stores kinematic state of agent (None if agent stores it itself)
+        fleet_index (int): Index of agent in fleet arrays
     """
     def __init__(self,
                  id:str,
@@ -35,6 +37,9 @@ class Agent:
                  velocity_r:float=0):
         self.id = id
 
+        self.fleet = None
+        self.fleet_index = None
+
         self.position = position
         self.direction = direction
         self.velocity_l = velocity_l
@@ -63,15 +68,127 @@ class Agent:
         self.state.update()
 
         self.update_count = 0
-    
+        self.simulation_step = 1 # Length of current update
+
+    #region Kinematic state (stored in agent or in fleet arrays)
+    @property
+    def position(self):
+        if self.fleet is None: return self._position
+        return self.fleet.get_position(self.fleet_index)
+
+    @position.setter
+    def position(self, value:Vec2f):
+        if self.fleet is None: self._position = value
+        else: self.fleet.set_position(self.fleet_index, value)
+
+    @property
+    def direction(self):
+        if self.fleet is None: return self._direction
+        return self.fleet.get_direction(self.fleet_index)
+
+    @direction.setter
+    def direction(self, value:Vec2f):
+        if self.fleet is None: self._direction = value
+        else: self.fleet.set_direction(self.fleet_index, value)
+
+    @property
+    def velocity_l(self):
+        if self.fleet is None: return self._velocity_l
+        return float(self.fleet.velocity_l[self.fleet_index])
+
+    @velocity_l.setter
+    def velocity_l(self, value:float):
+        if self.fleet is None: self._velocity_l = value
+        else: self.fleet.velocity_l[self.fleet_index] = value
+
+    @property
+    def velocity_r(self):
+        if self.fleet is None: return self._velocity_r
+        return float(self.fleet.velocity_r[self.fleet_index])
+
+    @velocity_r.setter
+    def velocity_r(self, value:float):
+        if self.fleet is None: self._velocity_r = value
+        else: self.fleet.velocity_r[self.fleet_index] = value
+
+    def attach_to_fleet(self, fleet, index:int):
+        """From now on position, direction, velocities and battery energy are views into fleet arrays"""
+        position, direction = self.position, self.direction
+        velocity_l, velocity_r = self.velocity_l, self.velocity_r
+        self.fleet = fleet
+        self.fleet_index = index
+        self.position, self.direction = position, direction
+        self.velocity_l, self.velocity_r = velocity_l, velocity_r
+        fleet.state_code[index] = self.state.code
+        self.battery.attach_energy_store(fleet.energy_wh, index)
+    #endregion
+
+    #region Snapshot
+    def snapshot(self):
+        """Returns mutable state of agent (task is stored by Task.snapshot)"""
+        return {
+            "position": tuple(self.position),
+            "direction": tuple(self.direction),
+            "velocity_l": self.velocity_l,
+            "velocity_r": self.velocity_r,
+            "spawn_position": tuple(self.spawn_position),
+            "state": int(self.state.code),
+            "path": [tuple(p) for p in self.path],
+            "task": self.task.snapshot() if self.task is not None else None,
+            "update_count": self.update_count,
+            "simulation_step": self.simulation_step,
+            "battery": self.battery.snapshot(),
+        }
+
+    def restore(self, state, task):
+        """Restores state from snapshot, task is already rebuilt Task (or None). State hooks (on_enter/on_exit) are not called."""
+        self.position = Vec2f(state["position"])
+        self.direction = Vec2f(state["direction"])
+        self.velocity_l = state["velocity_l"]
+        self.velocity_r = state["velocity_r"]
+        self.spawn_position = Vec2f(state["spawn_position"])
+        self.path = [Vec2f(p) for p in state["path"]]
+        self.task = task
+        self.update_count = state["update_count"]
+        self.simulation_step = state["simulation_step"]
+        self.battery.restore(state["battery"])
+
+        self.state = self.get_state_by_code(state["state"])
+        self.travel_state._plan = None
+        if self.fleet is not None:
+            self.fleet.state_code[self.fleet_index] = self.state.code
+
+    def get_state_by_code(self, code:int) -> State:
+        states = (self.idle_state, self.travel_state, self.charging_state, self.work_scan_state, self.work_process_state, self.discharged_state)
+        for state in states:
+            if state.code == code: return state
+        raise ValueError(f"Unknown state code: {code}")
+    #endregion
+
     def change_state(self, new_state:State):
         self.state.on_exit()
         self.state = new_state
         self.state.on_enter()
+        if self.fleet is not None:
+            self.fleet.state_code[self.fleet_index] = new_state.code
 
-    def update(self, simulation_step:int, date_time_manager):
-        """ Only for step in environment """
+    def update(self, simulation_step:int, date_time_manager, fast_forward:bool=False):
+        """
+        Only for step in environment.
+        fast_forward - simulation_step was chosen from travel plans (adaptive step), steady travel phase
+        is integrated in one step and rest of it (if plan is shorter) is simulated in 1 s steps.
+        """
         self.update_count += simulation_step
+        self.simulation_step = simulation_step
+        if fast_forward and isinstance(self.state, TravelState):
+            n_steps = self.state.fast_forward(simulation_step)
+            for _ in range(simulation_step - n_steps):
+                if isinstance(self.state, DischargedState): break
+                self._step(1, date_time_manager)
+            return
+        self._step(simulation_step, date_time_manager)
+
+    def _step(self, simulation_step:int, date_time_manager):
         self.state.manage_battery(simulation_step, date_time_manager)
         self.state.update()
         if isinstance(self.state, DischargedState): return
@@ -118,9 +235,26 @@ class Agent:
     def _get_actions(self):
         """Computes the rotation and acceleration inputs based on target."""
         
-        if not self.task:
+        movement_target = self.get_movement_target()
+        if movement_target is None:
             return 0, 0  # No movement if no target
-        
+        next_position, next_direction = movement_target
+
+        m1, m2 = self.movement.compute_movement_inputs(
+            self.position, self.direction, next_position, next_direction
+        )
+
+        return m1, m2
+
+    def is_stationary(self):
+        """True if agent would not move or rotate in next update"""
+        return self._get_actions() == (0, 0)
+
+    def get_movement_target(self):
+        """Returns (next_position, next_direction) the agent is steering towards or None if it has no task."""
+        if not self.task:
+            return None
+
         next_direction = None
 
         if len(self.path) > 0:  # Follow path normally
@@ -130,12 +264,8 @@ class Agent:
         else:  # Path is empty, but still need to rotate
             next_position = self.position  # Stay in place
             next_direction = self.task.target.direction  # Ensure rotation to correct direction
-        
-        m1, m2 = self.movement.compute_movement_inputs(
-            self.position, self.direction, next_position, next_direction
-        )
 
-        return m1, m2
+        return next_position, next_direction
 
     def has_task_and_at_location(self, obj):
         if self.task is None: return False
@@ -1,8 +1,10 @@
+import math
 from abc import ABC, abstractmethod
 
-from utilities.states import CropState
+from agent.movement import RombaMovement
+from utilities.states import CropState, AgentStateCode
 from utilities.configuration import MAX_FORWARD_VELOCITY
-from utilities.configuration import BATTERY_DISCHARGE_STATE_IDLE, BATTERY_DISCHARGE_STATE_TRAVEL, BATTERY_DISCHARGE_STATE_WORK_SCAN, BATTERY_DISCHARGE_STATE_WORK_PROCESS
+from utilities.configuration import BATTERY_DISCHARGE_STATE_IDLE, BATTERY_DISCHARGE_STATE_TRAVEL, BATTERY_DISCHARGE_STATE_WORK_SCAN, BATTERY_DISCHARGE_STATE_WORK_PROCESS, BATTERY_DISCHARGED_SOC
 
 DEBUG_PRINT_STATE_CHANGE = False
 
@@ -12,14 +14,33 @@ class State(ABC):
     def on_enter(self):
         pass
     def update(self):
-        if self.agent.battery.get_soc() <= 6:
+        if self.agent.battery.get_soc() <= BATTERY_DISCHARGED_SOC:
             self.agent.change_state(DischargedState(self.agent))
     def on_exit(self):
         pass
     def manage_battery(self, simulation_step, date_time_manager):
         raise NotImplementedError("This method should be overridden.")
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        """
+        Returns time (s) in which nothing but counters change for this agent.
+        Default is 1 -> agent needs per second simulation.
+        """
+        return 1
+    def _get_time_to_soc_threshold(self, power_w, soc_thresholds):
+        """Time (s) of discharging with power_w until SoC falls to one of soc_thresholds"""
+        if power_w <= 0: return math.inf
+        battery = self.agent.battery
+        soc = battery.get_soc()
+        time_s = math.inf
+        for threshold in soc_thresholds:
+            if threshold >= soc: continue
+            energy_to_threshold = battery.energy_wh - threshold/100 * battery.capacity_wh
+            time_s = min(time_s, math.ceil(energy_to_threshold * 3600 / power_w))
+        return max(1, time_s)
 
 class IdleState(State):
+    code = AgentStateCode.IDLE
+
     def on_enter(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Entering Idle State.")
     
@@ -34,7 +55,14 @@ class IdleState(State):
     def manage_battery(self, simulation_step, date_time_manager):
         self.agent.battery.discharge(power_w=BATTERY_DISCHARGE_STATE_IDLE, time_s=simulation_step)
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        if self.agent.task is not None and not self.agent.has_reached_target(): return 1
+        if not self.agent.is_stationary(): return 1
+        return self._get_time_to_soc_threshold(BATTERY_DISCHARGE_STATE_IDLE, soc_thresholds)
+
 class DischargedState(State):
+    code = AgentStateCode.DISCHARGED
+
     def on_enter(self):
         print(f"{self.agent.id} Entering Discharged State.")
         #self.agent.task = None
@@ -48,7 +76,12 @@ class DischargedState(State):
     def manage_battery(self, simulation_step, date_time_manager):
         pass
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        return math.inf
+
 class TravelState(State):
+    code = AgentStateCode.TRAVEL
+
     def on_enter(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Entering Travel State")
         self.agent.set_path()
@@ -79,7 +112,63 @@ class TravelState(State):
     def manage_battery(self, simulation_step, date_time_manager):
         self.agent.battery.discharge(power_w=BATTERY_DISCHARGE_STATE_TRAVEL*self.agent.velocity_l/MAX_FORWARD_VELOCITY, time_s=simulation_step)
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager, max_time=1):
+        """
+        Steady travel towards next waypoint (small heading corrections, away from waypoints/target)
+        can be integrated in one step. Returns number of such steps (at most max_time).
+        """
+        self._plan = None
+        agent = self.agent
+        if agent.task is None or not agent.path or not isinstance(agent.movement, RombaMovement): return 1
+        if max_time <= 1: return 1
+        plan = agent.movement.simulate_travel(
+            agent.position, agent.direction, agent.velocity_l, agent.path[0], self._get_stop_positions(),
+            max_steps=max_time, max_velocity_sum=self._get_velocity_budget(soc_thresholds)
+        )
+        if plan[0] <= 1: return 1
+        self._plan = plan
+        return plan[0]
+
+    def fast_forward(self, simulation_step):
+        """
+        Integrates steady travel phase of at most simulation_step updates of 1 s (planned by get_time_to_event).
+        Returns number of integrated steps, the rest of simulation_step must be simulated normally.
+        """
+        agent = self.agent
+        plan = getattr(self, "_plan", None)
+        self._plan = None
+        if plan is None or plan[0] != simulation_step:
+            if agent.task is None or not agent.path or not isinstance(agent.movement, RombaMovement): return 0
+            plan = agent.movement.simulate_travel(
+                agent.position, agent.direction, agent.velocity_l, agent.path[0], self._get_stop_positions(), max_steps=simulation_step
+            )
+        n_steps, position, direction, velocity, omega, velocity_sum = plan
+        if n_steps <= 0: return 0
+
+        agent.battery.discharge(power_w=BATTERY_DISCHARGE_STATE_TRAVEL*velocity_sum/n_steps/MAX_FORWARD_VELOCITY, time_s=n_steps)
+        self.update()
+        if isinstance(agent.state, DischargedState): return n_steps
+        agent.position, agent.direction, agent.velocity_l, agent.velocity_r = position, direction, velocity, omega
+        return n_steps
+
+    def _get_stop_positions(self):
+        """Positions at which state changes (task target and task object)"""
+        return [self.agent.task.target.position, self.agent.task.object.position]
+
+    def _get_velocity_budget(self, soc_thresholds):
+        """Sum of velocities (m/s over 1 s steps) that can be driven before SoC falls to one of soc_thresholds"""
+        battery = self.agent.battery
+        soc = battery.get_soc()
+        budget = math.inf
+        for threshold in soc_thresholds:
+            if threshold >= soc: continue
+            energy_to_threshold = battery.energy_wh - threshold/100 * battery.capacity_wh
+            budget = min(budget, energy_to_threshold * 3600 * MAX_FORWARD_VELOCITY / BATTERY_DISCHARGE_STATE_TRAVEL)
+        return budget
+
 class ChargingState(State):
+    code = AgentStateCode.CHARGING
+
     def on_enter(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Entering Charging State")
         self.agent.battery.start_index = {"jan":1, "jun":1}
@@ -96,7 +185,17 @@ class ChargingState(State):
         month = date_time_manager.get_month()
         self.agent.battery.charge(time_s=simulation_step, month=month)
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        if self.agent.task is not None and not self.agent.task.target_id.startswith("station"): return 1
+        if not self.agent.is_stationary(): return 1
+        battery = self.agent.battery
+        if battery.energy_wh >= battery.capacity_wh: return 1
+        charge_time = battery.get_charge_time(battery.capacity_wh, date_time_manager.get_month())
+        return max(1, math.ceil(charge_time))
+
 class WorkScanState(State):
+    code = AgentStateCode.WORK_SCAN
+
     def on_enter(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Entering WorkScan State")
     
@@ -107,7 +206,7 @@ class WorkScanState(State):
         elif self.agent.task.object.state == CropState.SCANNED:
             self.agent.change_state(self.agent.work_process_state)
         
-        else: self.agent.task.object.process()
+        else: self.agent.task.object.process(self.agent.simulation_step)
     
     def on_exit(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Exiting WorkScan State")
@@ -115,7 +214,18 @@ class WorkScanState(State):
     def manage_battery(self, simulation_step, date_time_manager):
         self.agent.battery.discharge(power_w=BATTERY_DISCHARGE_STATE_WORK_SCAN, time_s=simulation_step)
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        if self.agent.task is None or not self.agent.task.target_id.startswith("crop"): return 1
+        if self.agent.task.object.state == CropState.SCANNED: return 1
+        if not self.agent.is_stationary(): return 1
+        return min(
+            self.agent.task.object.get_time_to_state_change(),
+            self._get_time_to_soc_threshold(BATTERY_DISCHARGE_STATE_WORK_SCAN, soc_thresholds)
+        )
+
 class WorkProcessState(State):
+    code = AgentStateCode.WORK_PROCESS
+
     def on_enter(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Entering WorkProcess State")
 
@@ -127,7 +237,7 @@ class WorkProcessState(State):
             #self.agent.task = None
             self.agent.change_state(self.agent.idle_state)
         
-        else: self.agent.task.object.process()
+        else: self.agent.task.object.process(self.agent.simulation_step)
     
     def on_exit(self):
         if DEBUG_PRINT_STATE_CHANGE: print(f"{self.agent.id} Exiting WorkProcess State")
@@ -135,3 +245,12 @@ class WorkProcessState(State):
     def manage_battery(self, simulation_step, date_time_manager):
         self.agent.battery.discharge(power_w=BATTERY_DISCHARGE_STATE_WORK_PROCESS, time_s=simulation_step)
 
+    def get_time_to_event(self, soc_thresholds, date_time_manager):
+        if self.agent.task is None or not self.agent.task.target_id.startswith("crop"): return 1
+        if self.agent.task.object.state == CropState.PROCESSED: return 1
+        if not self.agent.is_stationary(): return 1
+        return min(
+            self.agent.task.object.get_time_to_state_change(),
+            self._get_time_to_soc_threshold(BATTERY_DISCHARGE_STATE_WORK_PROCESS, soc_thresholds)
+        )
+
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 
 class Battery():
     """Abstract base class for batteries."""
@@ -6,9 +7,47 @@ class Battery():
     def __init__(self, folder_path, initial_soc: float = 100):
         self.folder_path = folder_path
         self._initialize_battery_params()
-        self.soc = initial_soc  # State of Charge in %
+        # Energy can live in a shared fleet array (see Fleet), otherwise in _energy_wh
+        self._energy_store = None
+        self._energy_index = None
+        self._charge_tables = {} # month: (energies, times)
         self.energy_wh = (initial_soc / 100) * self.capacity_wh  # Current available energy in Wh
-        
+
+    @property
+    def energy_wh(self):
+        if self._energy_store is None: return self._energy_wh
+        return float(self._energy_store[self._energy_index])
+
+    @energy_wh.setter
+    def energy_wh(self, value):
+        if self._energy_store is None: self._energy_wh = value
+        else: self._energy_store[self._energy_index] = value
+
+    @property
+    def soc(self):
+        """State of Charge in %"""
+        return self.get_soc()
+
+    def attach_energy_store(self, energy_store, index):
+        """Moves energy into energy_store[index] (array shared by many batteries)"""
+        energy_store[index] = self.energy_wh
+        self._energy_store = energy_store
+        self._energy_index = index
+
+    def snapshot(self):
+        """Returns mutable state of battery (energy and search cursors of charging curves)"""
+        start_index = getattr(self, "start_index", None)
+        return {
+            "energy_wh": self.energy_wh,
+            "start_index": dict(start_index) if start_index is not None else None,
+        }
+
+    def restore(self, state):
+        self.energy_wh = state["energy_wh"]
+        if state["start_index"] is not None:
+            self.start_index = dict(state["start_index"])
+        elif hasattr(self, "start_index"):
+            del self.start_index
 
     def _initialize_battery_params(self):
         with open(f'{self.folder_path}/config.txt', 'r') as f:
@@ -36,12 +75,18 @@ class Battery():
         # discharge stays linear
         energy_removed_wh = (power_w * time_s) / 3600  # Convert W to Wh
         self.energy_wh = max(0, self.energy_wh - energy_removed_wh)
-        self.soc = (self.energy_wh / self.capacity_wh) * 100  # Update SoC
 
     def charge(self, time_s: int, month: int):
         """month (1-12)"""
         if self.energy_wh >= self.capacity_wh:
             return  # Battery is full
+
+        if time_s > 1:
+            # Long steps (time skipping) integrate the charging rate instead of jumping along curves
+            energies, times = self._get_charge_table(month)
+            start_time = np.interp(self.energy_wh, energies, times)
+            self.energy_wh = float(np.interp(start_time + time_s, times, energies))
+            return
         
         jan_time_s = self._find_x_for_y_month("jan", self.energy_wh)
         jun_time_s = self._find_x_for_y_month("jun", self.energy_wh)
@@ -56,9 +101,47 @@ class Battery():
         new_wh = weight1*jan_new_wh + weight2*jun_new_wh
 
         self.energy_wh = new_wh
-        self.soc = (self.energy_wh / self.capacity_wh) * 100  # Update SoC
     
 
+    def get_charge_time(self, target_wh: float, month: int) -> float:
+        """Returns time in seconds needed to charge from current energy to target_wh"""
+        energies, times = self._get_charge_table(month)
+        return float(np.interp(target_wh, energies, times) - np.interp(self.energy_wh, energies, times))
+
+    def _get_charge_table(self, month: int):
+        """
+        Returns (energies, times) where times[i] is time in seconds needed to charge from
+        energies[0] to energies[i]. Charging rate is month weighted rate of jan and jun curve.
+        """
+        if month in self._charge_tables:
+            return self._charge_tables[month]
+
+        def increasing_part(data):
+            data = np.array(data, dtype=float)
+            decreasing = np.flatnonzero(np.diff(data[:, 1]) <= 0)
+            return data if len(decreasing) == 0 else data[:decreasing[0]+1]
+
+        def rate(data, energies):
+            """Charging rate (Wh/s) of curve at given energies"""
+            i = np.clip(np.searchsorted(data[:, 1], energies), 1, len(data)-1)
+            return (data[i, 1] - data[i-1, 1]) / (data[i, 0] - data[i-1, 0])
+
+        jan = increasing_part(self.jan_min_data)
+        jun = increasing_part(self.jun_max_data)
+        min_wh = max(jan[0, 1], jun[0, 1])
+        max_wh = min(jan[-1, 1], jun[-1, 1])
+        energies = np.unique(np.concatenate([jan[:, 1], jun[:, 1]]))
+        energies = energies[(energies >= min_wh) & (energies <= max_wh)]
+
+        weight1 = (1 + math.cos(math.pi * (month-1) / 6)) / 2
+        weight2 = 1 - weight1
+        middle = (energies[:-1] + energies[1:]) / 2
+        charging_rate = weight1*rate(jan, middle) + weight2*rate(jun, middle)
+        times = np.concatenate([[0], np.cumsum(np.diff(energies) / charging_rate)])
+
+        self._charge_tables[month] = (energies, times)
+        return self._charge_tables[month]
+
     def _linear_interpolate(self, x0, y0, x1, y1, x):
         """
         Perform linear interpolation to find y for a given x between two points (x0, y0) and (x1, y1).
@@ -0,0 +1,190 @@
+import numpy as np
+
+from agent.movement import RombaMovement
+from utilities.utils import Vec2f
+from utilities.states import AgentStateCode
+from utilities.configuration import MAX_FORWARD_VELOCITY
+from utilities.configuration import BATTERY_DISCHARGE_STATE_IDLE, BATTERY_DISCHARGE_STATE_TRAVEL, BATTERY_DISCHARGE_STATE_WORK_SCAN, BATTERY_DISCHARGE_STATE_WORK_PROCESS
+
+# Discharge power for each AgentStateCode (travel power is scaled by velocity)
+DISCHARGE_POWER = np.zeros(len(AgentStateCode))
+DISCHARGE_POWER[AgentStateCode.IDLE] = BATTERY_DISCHARGE_STATE_IDLE
+DISCHARGE_POWER[AgentStateCode.TRAVEL] = BATTERY_DISCHARGE_STATE_TRAVEL
+DISCHARGE_POWER[AgentStateCode.WORK_SCAN] = BATTERY_DISCHARGE_STATE_WORK_SCAN
+DISCHARGE_POWER[AgentStateCode.WORK_PROCESS] = BATTERY_DISCHARGE_STATE_WORK_PROCESS
+
+# AgentStateCode values as plain ints (compared with state_code arrays without enum lookups)
+STATE_TRAVEL = int(AgentStateCode.TRAVEL)
+STATE_CHARGING = int(AgentStateCode.CHARGING)
+STATE_DISCHARGED = int(AgentStateCode.DISCHARGED)
+
+
+class Fleet:
+    """
+    Struct-of-arrays storage for agents. Agents become thin views over these arrays
+    and all agents are advanced with one batched battery and kinematics update.
+    Agents at rest whose movement target did not change are skipped by kinematics,
+    when fewer than MIN_BATCH_SIZE agents are left they are moved one by one.
+
+    Attributes:
+        agents (list): Agents in order of their index in arrays
+        position (np.ndarray): (n, 2) positions
+        direction (np.ndarray): (n, 2) unit directions
+        velocity_l (np.ndarray): (n,) linear velocities
+        velocity_r (np.ndarray): (n,) angular velocities
+        energy_wh (np.ndarray): (n,) battery energies
+        capacity_wh (np.ndarray): (n,) battery capacities
+        state_code (np.ndarray): (n,) AgentStateCode of current state
+    """
+    MIN_BATCH_SIZE = 12 # smaller groups of agents are updated agent by agent (fixed cost of NumPy calls is higher)
+
+    def __init__(self, agents:list):
+        self.agents = list(agents)
+        n = len(self.agents)
+
+        self.position = np.zeros((n, 2))
+        self.direction = np.zeros((n, 2))
+        self.velocity_l = np.zeros(n)
+        self.velocity_r = np.zeros(n)
+        self.energy_wh = np.zeros(n)
+        self.capacity_wh = np.array([agent.battery.capacity_wh for agent in self.agents], dtype=float)
+        self.state_code = np.zeros(n, dtype=np.uint8)
+
+        for agent in self.agents:
+            if not isinstance(agent.movement, RombaMovement):
+                raise ValueError(f"Fleet supports only RombaMovement, {agent.id} has {type(agent.movement).__name__}")
+        self.movement = self.agents[0].movement if n > 0 else RombaMovement()
+
+        # Vec2f views handed out to agents, invalidated when arrays change
+        self._position_views = [None] * n
+        self._direction_views = [None] * n
+
+        # Movement targets ((x, y), (dx, dy) or None) of last kinematics update
+        self._targets = [None] * n
+        # Agents at rest after last kinematics update, they stay at rest while their movement target is the same
+        self._settled = [False] * n
+        self._all_active = np.ones(n, dtype=bool)
+
+        for i, agent in enumerate(self.agents):
+            agent.attach_to_fleet(self, i)
+
+    def get_position(self, index:int) -> Vec2f:
+        view = self._position_views[index]
+        if view is None:
+            view = self._position_views[index] = Vec2f(self.position[index].tolist())
+        return view
+
+    def set_position(self, index:int, position:Vec2f):
+        self.position[index] = (position.x, position.y)
+        self._position_views[index] = position
+        self._settled[index] = False
+
+    def get_direction(self, index:int) -> Vec2f:
+        view = self._direction_views[index]
+        if view is None:
+            view = self._direction_views[index] = Vec2f(self.direction[index].tolist())
+        return view
+
+    def set_direction(self, index:int, direction:Vec2f):
+        self.direction[index] = (direction.x, direction.y)
+        self._direction_views[index] = direction
+        self._settled[index] = False
+
+    def get_soc(self):
+        """Returns (n,) State of Charge in %"""
+        return self.energy_wh / self.capacity_wh * 100
+
+    def update(self, simulation_step:int, date_time_manager, active=None, fast_forward:bool=False):
+        """
+        Equivalent of calling Agent.update for every agent.
+        date_time_manager can be one manager or a list with manager of each agent (agents from many scenes).
+        Agents with active[i] False are left untouched.
+        fast_forward - simulation_step was chosen from travel plans (see Agent.update).
+        """
+        agents = self.agents
+        codes = self.state_code
+        if active is None: active = self._all_active
+        if fast_forward:
+            # Steady travel phases are integrated per agent (see TravelState.fast_forward)
+            fast_forward = (codes == STATE_TRAVEL) & active
+            for i in np.flatnonzero(fast_forward):
+                manager = date_time_manager[i] if isinstance(date_time_manager, list) else date_time_manager
+                agents[i].update(simulation_step, manager, fast_forward=True)
+            active = active & ~fast_forward
+
+        self._manage_batteries(simulation_step, date_time_manager, active)
+
+        # State machines stay per agent
+        updated = agents if active is self._all_active else [agents[i] for i in np.flatnonzero(active)]
+        for agent in updated:
+            agent.update_count += simulation_step
+            agent.simulation_step = simulation_step
+            agent.state.update()
+
+        # Movement targets, agents without task steer to their own position (no movement).
+        # Agents at rest with unchanged target would not move (same inputs -> zero motor inputs again).
+        settled, targets = self._settled, self._targets
+        unsettled = []
+        for i, (agent, code, is_active) in enumerate(zip(agents, codes.tolist(), active.tolist())):
+            if not is_active or code == STATE_DISCHARGED:
+                settled[i] = False
+                continue
+            target = agent.get_movement_target()
+            next_position, next_direction = (agent.position, None) if target is None else target
+            target = ((next_position.x, next_position.y), None if next_direction is None else (next_direction.x, next_direction.y))
+            if settled[i] and target == targets[i]: continue
+            targets[i] = target
+            unsettled.append(i)
+        if len(unsettled) < self.MIN_BATCH_SIZE:
+            self._move_agents(unsettled, simulation_step)
+            return
+
+        # Batched kinematics
+        rows = np.array(unsettled, dtype=np.intp)
+        position, direction = self.position[rows], self.direction[rows]
+        m1, m2 = self.movement.compute_movement_inputs_batch(
+            position, direction,
+            np.array([targets[i][0] for i in unsettled]),
+            np.array([targets[i][1] or (0.0, 0.0) for i in unsettled]),
+            np.array([targets[i][1] is not None for i in unsettled])
+        )
+        new_position, new_direction, self.velocity_l[rows], self.velocity_r[rows] = self.movement.move_batch(
+            simulation_step, m1, m2, position, direction
+        )
+        changed = ((new_position != position) | (new_direction != direction)).any(axis=1)
+        self.position[rows] = new_position
+        self.direction[rows] = new_direction
+        for i, at_rest, moved in zip(unsettled, ((m1 == 0) & (m2 == 0) & ~changed).tolist(), changed.tolist()):
+            settled[i] = at_rest
+            # Only views of agents that moved are stale
+            if moved: self._position_views[i] = self._direction_views[i] = None
+
+    def _move_agents(self, rows:list, simulation_step:int):
+        """Kinematics of few agents (rows) with scalar RombaMovement (same math as batched kinematics)"""
+        movement = self.movement
+        for i in rows:
+            agent = self.agents[i]
+            next_position, next_direction = self._targets[i]
+            position, direction = agent.position, agent.direction
+            m1, m2 = movement.compute_movement_inputs(position, direction, Vec2f(next_position), next_direction and Vec2f(next_direction))
+            new_position, new_direction, agent.velocity_l, agent.velocity_r = movement.move(simulation_step, m1, m2, position, direction, agent.velocity_l)
+            at_rest = m1 == 0 and m2 == 0 and new_position == position and new_direction == direction
+            agent.position, agent.direction = new_position, new_direction
+            self._settled[i] = at_rest
+
+    def _manage_batteries(self, simulation_step, date_time_manager, mask):
+        codes = self.state_code
+        # Discharge stays linear -> batched (same operation order as Battery.discharge, empty battery stays at 0)
+        power = DISCHARGE_POWER[codes]
+        travel = codes == STATE_TRAVEL
+        np.multiply(power, self.velocity_l, out=power, where=travel)
+        np.divide(power, MAX_FORWARD_VELOCITY, out=power, where=travel)
+        energy = self.energy_wh
+        if mask is self._all_active: np.maximum(0, energy - power * simulation_step / 3600, out=energy)
+        else: np.maximum(0, energy - power * simulation_step / 3600, out=energy, where=mask)
+        # Charging curves are not linear -> per agent
+        charging = codes == STATE_CHARGING
+        if mask is not self._all_active: charging &= mask
+        for i in np.flatnonzero(charging).tolist():
+            manager = date_time_manager[i] if isinstance(date_time_manager, list) else date_time_manager
+            self.agents[i].state.manage_battery(simulation_step, manager)
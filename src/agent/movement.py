@@ -1,8 +1,9 @@
 import math
+import numpy as np
 from abc import ABC, abstractmethod
 
 from utilities.utils import Vec2f
-from utilities.configuration import MAX_FORWARD_VELOCITY, MAX_ANGULAR_VELOCITY, MAX_FORWARD_WORKING_VELOCITY, WHEEL_DISTANCE, WHEEL_RADIUS, TOLERANCE_DISTANCE, TOLERANCE_ANGLE
+from utilities.configuration import MAX_FORWARD_VELOCITY, MAX_ANGULAR_VELOCITY, MAX_FORWARD_WORKING_VELOCITY, WHEEL_DISTANCE, WHEEL_RADIUS, TOLERANCE_DISTANCE, TOLERANCE_ANGLE, ADAPTIVE_STEP_MAX_ANGLE
 
 
 class BaseMovement(ABC):
@@ -129,3 +130,130 @@ class RombaMovement(BaseMovement):
         
         return (m1, m2)
 
+    def simulate_travel(self, position: Vec2f, direction: Vec2f, velocity: float, target_position: Vec2f, stop_positions: list,
+                        max_steps: int, max_velocity_sum: float = math.inf, max_delta_angle: float = ADAPTIVE_STEP_MAX_ANGLE):
+        """
+        Simulates up to max_steps steps of 1 s driving towards target_position with plain floats
+        (same math as compute_movement_inputs + move, without target direction).
+        Stops before a step that would start:
+            - close to target_position or one of stop_positions (waypoint/target reached)
+            - with heading error above max_delta_angle (turning towards target)
+            - with sum of velocities at step starts above max_velocity_sum (battery budget)
+        Returns (n_steps, position, direction, velocity, omega, velocity_sum)
+        """
+        px, py = position.x, position.y
+        dx, dy = direction.x, direction.y
+        tx, ty = target_position.x, target_position.y
+        stops = [(p.x, p.y) for p in stop_positions] + [(tx, ty)]
+        max_velocity = self.max_forward_velocity
+        threshold = 1e-4
+        omega = 0.0
+        velocity_sum = 0.0
+
+        n_steps = 0
+        while n_steps < max_steps:
+            if any(abs(px - sx) < TOLERANCE_DISTANCE and abs(py - sy) < TOLERANCE_DISTANCE for sx, sy in stops): break
+            if velocity_sum + velocity > max_velocity_sum: break
+
+            # compute_movement_inputs
+            distance = math.sqrt((px - tx) ** 2 + (py - ty) ** 2)
+            if distance <= TOLERANCE_DISTANCE: break
+            to_x, to_y = tx - px, ty - py
+            magnitude = (to_x**2 + to_y**2)**0.5
+            angle_to_target = math.degrees(math.atan2(to_y / magnitude, to_x / magnitude))
+            angle_of_agent = math.degrees(math.atan2(dy, dx))
+            delta_angle = (angle_to_target - angle_of_agent + 180) % 360 - 180
+            if abs(delta_angle) > max_delta_angle: break
+            normalized_delta = delta_angle / 180.0
+            if abs(delta_angle) > TOLERANCE_ANGLE:
+                turn_strength = min(1.0, abs(normalized_delta))
+                if normalized_delta < 0: m1, m2 = turn_strength, -turn_strength
+                else: m1, m2 = -turn_strength, turn_strength
+            else:
+                speed = min(distance * 0.05, 1.0)
+                m1, m2 = speed, speed
+            if -threshold < m1 < threshold: m1=0
+            if -threshold < m2 < threshold: m2=0
+
+            # move (1 s)
+            velocity_sum += velocity
+            m1 = max(-1.0, min(1.0, m1))
+            m2 = max(-1.0, min(1.0, m2))
+            v_left = m1 * max_velocity
+            v_right = m2 * max_velocity
+            velocity = (v_right + v_left) / 2.0
+            omega = (v_right - v_left) / self.wheel_distance * self.max_angular_velocity
+            cos_theta = math.cos(omega)
+            sin_theta = math.sin(omega)
+            new_dx = dx * cos_theta - dy * sin_theta
+            new_dy = dx * sin_theta + dy * cos_theta
+            magnitude = (new_dx**2 + new_dy**2)**0.5
+            px, py = px + dx * velocity, py + dy * velocity
+            dx, dy = new_dx / magnitude, new_dy / magnitude
+            n_steps += 1
+
+        return n_steps, Vec2f(px, py), Vec2f(dx, dy), velocity, omega, velocity_sum
+
+    def move_batch(self, simulation_step: int, m1: np.ndarray, m2: np.ndarray, positions: np.ndarray, directions: np.ndarray):
+        """
+        Vectorised move() for many robots at once.
+        m1, m2: (n,) motor inputs
+        positions, directions: (n, 2) arrays
+        Returns new positions, new directions, linear velocities, angular velocities.
+        Works on columns with elementwise ufuncs (np.clip, np.stack and axis reductions have large overhead on small fleets).
+        """
+        v_left = np.maximum(-1.0, np.minimum(1.0, m1)) * self.max_forward_velocity
+        v_right = np.maximum(-1.0, np.minimum(1.0, m2)) * self.max_forward_velocity
+
+        v = (v_right + v_left) / 2.0
+        omega = (v_right - v_left) / self.wheel_distance * self.max_angular_velocity
+
+        angle = omega * simulation_step
+        cos_theta = np.cos(angle)
+        sin_theta = np.sin(angle)
+        x, y = directions.T
+        new_directions = np.empty_like(directions)
+        new_x, new_y = new_directions.T
+        np.subtract(x * cos_theta, y * sin_theta, out=new_x)
+        np.add(x * sin_theta, y * cos_theta, out=new_y)
+        new_directions /= np.sqrt(new_x**2 + new_y**2)[:, None]
+
+        new_positions = positions + directions * (v * simulation_step)[:, None]
+
+        return new_positions, new_directions, v, omega
+
+    def compute_movement_inputs_batch(self, positions: np.ndarray, directions: np.ndarray, target_positions: np.ndarray, target_directions: np.ndarray, has_target_direction: np.ndarray):
+        """
+        Vectorised compute_movement_inputs() for many robots at once.
+        positions, directions, target_positions, target_directions: (n, 2) arrays
+        has_target_direction: (n,) bool array (False where target direction is None)
+        """
+        to_x, to_y = (target_positions - positions).T
+        distance = np.sqrt(to_x**2 + to_y**2)
+        angle_of_agent = np.degrees(np.arctan2(directions[:, 1], directions[:, 0]))
+
+        # At target -> adjust heading to target direction (only turn in place)
+        angle_of_target = np.degrees(np.arctan2(target_directions[:, 1], target_directions[:, 0]))
+        normalized_delta = ((angle_of_target - angle_of_agent + 180) % 360 - 180) / 180.0
+        turn_strength = np.minimum(1.0, np.abs(normalized_delta) * 0.5)
+        m1 = np.copysign(turn_strength, -normalized_delta) # right: m1>0, left: m1<0
+        m1[~has_target_direction] = 0
+
+        # Move towards target position
+        moving = distance > TOLERANCE_DISTANCE
+        angle_to_target = np.degrees(np.arctan2(to_y, to_x))
+        delta_angle = (angle_to_target - angle_of_agent + 180) % 360 - 180
+        normalized_delta = delta_angle / 180.0
+        turn_strength = np.minimum(1.0, np.abs(normalized_delta))
+        np.copysign(turn_strength, -normalized_delta, out=m1, where=moving)
+        straight = moving & (np.abs(delta_angle) <= TOLERANCE_ANGLE)
+        speed = np.minimum(distance * 0.05, 1.0)
+        np.copyto(m1, speed, where=straight)
+        m2 = -m1
+        np.copyto(m2, speed, where=straight)
+
+        threshold = 1e-4
+        m1[np.abs(m1) < threshold] = 0
+        m2[np.abs(m2) < threshold] = 0
+
+        return m1, m2
@@ -0,0 +1,108 @@
+import random
+import numpy as np
+
+from env import ContinuousMARLEnv
+from agent.fleet import Fleet
+from utilities.configuration import ENV_PARAMS
+ENV_SIMULATION_PARAMS = ENV_PARAMS["simulation"]
+
+
+class BatchedFarmEnv:
+    """
+    K independent farm instances (own scene state, agents, batteries and task managers) stepped together.
+    All agents live in one Fleet so battery and kinematics updates are batched over every instance,
+    navmesh is built once and shared (read-only) by all scenes.
+    Observations, rewards, terminations and truncations are stacked arrays of shape (K, n_agents, ...).
+    Finished instances are frozen until next reset.
+
+    Attributes:
+        n_instances (int): Number of instances K
+        envs (list): ContinuousMARLEnv of each instance
+        fleet (Fleet): Fleet of agents of all instances (instance k owns rows k*n_agents ... (k+1)*n_agents-1)
+        done (np.ndarray): (K,) True for finished instances
+    """
+    obs_dim = 4
+
+    def __init__(self, n_instances:int):
+        self.n_instances = n_instances
+        first = ContinuousMARLEnv()
+        self.envs = [first] + [ContinuousMARLEnv(navmesh=first.scene.navmesh) for _ in range(n_instances-1)]
+        for env in self.envs:
+            env.use_fleet_engine = False # instances share self.fleet
+
+        self.n_agents = first.n_agents
+        self.simulation_step = ENV_SIMULATION_PARAMS["simulation_step"]
+        self.time_skipping = ENV_SIMULATION_PARAMS["time_skipping"]
+        self.adaptive_step = ENV_SIMULATION_PARAMS["adaptive_step"]
+        self.fleet = None
+        self.done = np.zeros(n_instances, dtype=bool)
+
+    def reset(self, seed:int=None):
+        """Resets all instances, instance k is seeded with seed+k. Returns (observations, infos)"""
+        for k, env in enumerate(self.envs):
+            env.n_agents = self.n_agents
+            if seed is not None:
+                random.seed(seed + k)
+                np.random.seed(seed + k)
+            env.reset()
+
+        self.fleet = Fleet([agent for env in self.envs for agent in env.agent_objects.values()])
+        for env in self.envs:
+            env.fleet = self.fleet
+        self._date_time_managers = [env.scene.date_time_manager for env in self.envs for _ in range(self.n_agents)]
+        self.done[:] = False
+        self.step_count = np.zeros(self.n_instances, dtype=int)
+
+        infos = [{} for _ in self.envs]
+        return self.observe(), infos
+
+    def assign_tasks(self):
+        for env, done in zip(self.envs, self.done):
+            if not done: env.task_manager.assign_tasks()
+
+    def step(self):
+        """
+        Advances all unfinished instances by the same simulation step
+        (with time skipping the earliest event over all instances).
+        Returns (observations, rewards, terminations, truncations, infos), nothing is advanced if all instances are finished.
+        """
+        if self.done.all(): return self._get_results()
+
+        active_envs = [env for env, done in zip(self.envs, self.done) if not done]
+        if self.time_skipping or self.adaptive_step:
+            simulation_step = min(env.get_next_event_step() for env in active_envs)
+        else:
+            simulation_step = self.simulation_step
+
+        for env in active_envs:
+            env.step_count += simulation_step
+            env.scene.update(simulation_step)
+        # Fleet takes its fast path (no mask) until first instance finishes
+        active = np.repeat(~self.done, self.n_agents) if self.done.any() else None
+        fast_forward = self.adaptive_step and simulation_step > self.simulation_step
+        self.fleet.update(simulation_step, self._date_time_managers, active, fast_forward)
+
+        for k, env in enumerate(self.envs):
+            if self.done[k]: continue
+            self.step_count[k] = env.step_count
+            self.done[k] = env.scene.crop_field.is_processed()
+        return self._get_results()
+
+    def _get_results(self):
+        """Returns (observations, rewards, terminations, truncations, infos) of current state"""
+        rewards = np.zeros((self.n_instances, self.n_agents))
+        terminations = np.repeat(self.done[:, None], self.n_agents, axis=1)
+        truncations = np.zeros((self.n_instances, self.n_agents), dtype=bool)
+        infos = [{} for _ in self.envs]
+        return self.observe(), rewards, terminations, truncations, infos
+
+    def observe(self):
+        """Returns (K, n_agents, 4) observations: x, y, velocity, direction angle (deg)"""
+        shape = (self.n_instances, self.n_agents)
+        position = self.fleet.position.reshape(*shape, 2)
+        direction = self.fleet.direction.reshape(*shape, 2)
+        observations = np.empty((*shape, self.obs_dim), dtype=np.float32)
+        observations[..., :2] = position
+        observations[..., 2] = self.fleet.velocity_l.reshape(shape)
+        observations[..., 3] = np.degrees(np.arctan2(direction[..., 1], direction[..., 0]))
+        return observations
@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import time
+import subprocess
+from datetime import datetime
+
+"""
+Measures cold start of headless simulation (fresh interpreter -> first env.step())
+and appends averages to cold_start.txt so that changes in import/initialisation cost can be tracked.
+"""
+
+OUTPUT_FILE = "cold_start.txt"
+
+def measure():
+    """Runs in fresh interpreter, returns timings (s) of each phase"""
+    start = time.perf_counter()
+    from env import ContinuousMARLEnv
+    imported = time.perf_counter()
+    env = ContinuousMARLEnv()
+    created = time.perf_counter()
+    env.reset(seed=0)
+    reset = time.perf_counter()
+    env.task_manager.assign_tasks()
+    env.step({agent: (1,1) for agent in env.agents})
+    stepped = time.perf_counter()
+    return {
+        "import": imported - start,
+        "init": created - imported,
+        "reset": reset - created,
+        "first_step": stepped - reset,
+        "total": stepped - start,
+        "pygame_loaded": "pygame" in sys.modules,
+    }
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        print(json.dumps(measure()))
+        sys.exit()
+
+    n_runs = 5
+
+    runs = []
+    for run in range(n_runs):
+        output = subprocess.run([sys.executable, __file__, "--child"], capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+        print(f"Run {run+1}/{n_runs} | total: {runs[-1]['total']:.3f} s")
+
+    header_names = ['date_time', 'runs', 'import', 'init', 'reset', 'first_step', 'total', 'pygame']
+    col_widths = [19, 5, 10, 10, 10, 10, 10, 6]
+    if not os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE, "w") as f:
+            header = "|"
+            for i,header_name in enumerate(header_names):
+                header += f" {header_name.ljust(col_widths[i])} |"
+            f.write(header + "\n")
+            f.write("-" * len(header) + "\n")
+
+    def avg(key):
+        return f"{sum(run[key] for run in runs)/len(runs):.4f}"
+
+    body_data = [
+        datetime.now().strftime("%d.%m.%Y %H:%M:%S"), n_runs,
+        avg("import"), avg("init"), avg("reset"), avg("first_step"), avg("total"),
+        any(run["pygame_loaded"] for run in runs)
+    ]
+    with open(OUTPUT_FILE, "a") as f:
+        body = "|"
+        for i,body_name in enumerate(body_data):
+            body += f" {str(body_name).ljust(col_widths[i])} |"
+        f.write(body + "\n")
+    print(f"Avg total: {avg('total')} s")
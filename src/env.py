@@ -1,42 +1,37 @@
-import pygame
 import numpy as np
 from pettingzoo import ParallelEnv
 from gymnasium import spaces
 import functools
+import pickle
 
 from task_management.task_manager import TaskManager1
-from scene.scene import Scene
-from rendering.gui import GUI
-from rendering.camera import Camera
-from utilities.configuration import FONT_PATH, ENV_PARAMS
+from scene.scene import Scene, CropField
+from utilities.configuration import FONT_PATH, ENV_PARAMS, BATTERY_DISCHARGED_SOC, SCENE_CACHE_DIR
 ENV_SIMULATION_PARAMS = ENV_PARAMS["simulation"]
 ENV_RENDER_PARAMS = ENV_PARAMS["render"]
 ENV_RENDER_GUI_PARAMS = ENV_PARAMS["render"]["gui"]
 
 from utilities.create import init_agents
-from rendering.render import (
-    BG_COLOR,
-    render_agents,
-    render_fps,
-    render_mouse_scene_pos,
-    render_gui_step_count,
-    render_gui_date_time,
-    render_gui_field_params,
-    render_gui_spawning_area_params,
-    render_gui_agents,
-    render_gui_stations,
-    render_gui_crop_field,
-    render_gui_tasks
-)
+from utilities.profiler import Profiler
+from agent.fleet import Fleet
+from agent.agent_state_machine import TravelState
 
 
 class ContinuousMARLEnv(ParallelEnv):
     metadata = {'render.modes': ['human', 'rgb_array'], 'render_fps': ENV_SIMULATION_PARAMS["fps"]}
 
-    def __init__(self):
+    def __init__(self, navmesh=None):
         
         super().__init__()
-        self.scene = Scene(start_date_time=ENV_SIMULATION_PARAMS["date_time"])
+        self.scene = Scene(
+            start_date_time=ENV_SIMULATION_PARAMS["date_time"],
+            navmesh=navmesh,
+            crop_regrowth=ENV_SIMULATION_PARAMS["crop_regrowth"],
+            cache_dir=SCENE_CACHE_DIR if ENV_SIMULATION_PARAMS["scene_cache"] else None,
+            compute_travel_distances=ENV_SIMULATION_PARAMS["travel_distances"],
+            navmesh_triangulation=ENV_SIMULATION_PARAMS["navmesh_triangulation"],
+            navmesh_merge_polygons=ENV_SIMULATION_PARAMS["navmesh_merge_polygons"]
+        )
 
         self.n_agents = ENV_SIMULATION_PARAMS["n_agents"]
         self.agents, self.agent_objects = init_agents(self.n_agents, self.scene.config["spawning_area"], self.scene.navmesh)
@@ -48,18 +43,28 @@ class ContinuousMARLEnv(ParallelEnv):
         self.task_manager.stations = self.scene.station_objects
 
         self.simulation_step = ENV_SIMULATION_PARAMS["simulation_step"]
+        self.use_fleet_engine = ENV_SIMULATION_PARAMS["fleet_engine"]
+        self.time_skipping = ENV_SIMULATION_PARAMS["time_skipping"]
+        self.max_time_skip = ENV_SIMULATION_PARAMS["max_time_skip"]
+        self.adaptive_step = ENV_SIMULATION_PARAMS["adaptive_step"]
+        self.fleet = None
+
+        self.profiler = Profiler()
+        self.profile_dump_interval = ENV_SIMULATION_PARAMS["profile_dump_interval"]
+        self.profile_file = ENV_SIMULATION_PARAMS["profile_file"]
+        self._profiling = ENV_SIMULATION_PARAMS["profile"]
 
         # Define agents
         self.possible_agents = [f"agent_{i}" for i in range(self.n_agents)]
         self.agent_name_mapping = dict(zip(self.possible_agents, list(range(self.n_agents))))
 
-        # Pygame rendering setup
+        # Pygame rendering setup (pygame and renderers are loaded on first render call)
         self.screen = None
         self.static_surface = None
         self.dynamic_surface = None
         self.screen_size = (1200,600)
         self.clock = None
-        self.camera = Camera()
+        self.camera = None
 
     def reset(self, seed:int=None, options=None):
         # Reset the environment to initial state
@@ -68,49 +73,202 @@ class ContinuousMARLEnv(ParallelEnv):
         self.agents, self.agent_objects = init_agents(self.n_agents, self.scene.config["spawning_area"], self.scene.navmesh)
         self.scene.reset()
         self.task_manager.reset(self)
+        self.fleet = Fleet(self.agent_objects.values()) if self.use_fleet_engine else None
+        self.set_profiling(self._profiling, clear=True)
 
         self.rewards = {agent_id: 0 for agent_id in self.agents}
         self.terminations = {agent_id: False for agent_id in self.agents}
         self.truncations = {agent_id: False for agent_id in self.agents}
         self.infos = {agent_id: {} for agent_id in self.agents}
 
-        observations = {agent_id: self.observe(agent_id) for agent_id in self.agents}
+        self._init_buffers()
+        self._observe_all()
+        observation_array = self.observation_buffer.copy()
+        observations = {agent_id: observation_array[i] for i, agent_id in enumerate(self.agents)}
 
         return observations, self.infos
 
-    def step(self, actions:dict[str:list()]):
+    def _init_buffers(self):
+        """Preallocates arrays that step_arrays writes into (rows in order of agent_objects)"""
+        n_agents = len(self.agent_objects)
+        self.observation_buffer = np.zeros((n_agents, 4), dtype=np.float32)
+        self.reward_buffer = np.zeros(n_agents)
+        self.termination_buffer = np.zeros(n_agents, dtype=bool)
+        self.truncation_buffer = np.zeros(n_agents, dtype=bool)
+        self._angle_buffer = np.zeros(n_agents)
 
+    def step(self, actions:dict[str:list()]):
+        """
+        PettingZoo API, thin dict layer over step_arrays buffers.
+        Observations are rows of a copy of observation_buffer (only step_arrays returns buffers without copying).
+        """
         if not actions:
             self.agents = []
             return {}, {}, {}, {}, {}
-        
-        self.step_count += self.simulation_step
-
-        # Initialize dicts
-        rewards = {agent_id: 0 for agent_id in self.agents}
-        terminations = {agent_id: False for agent_id in self.agents}
-        truncations = {agent_id: False for agent_id in self.agents}
-        infos = {agent_id: {} for agent_id in self.agents}
-
-        self.scene.update(self.simulation_step)
-        for agent_id, action in actions.items():
-            agent = self.agent_objects[agent_id]
-            rot_input, acc_input = action
-            
-            # Update agent state
-            agent.update(self.simulation_step, self.scene.date_time_manager) # simulation step - 1 second
-        
-        # Check if crop field is processed
-        is_processed = self.scene.crop_field.is_processed()
-        terminations = {agent_id: is_processed for agent_id in self.agents}
 
+        self._advance(actions.keys())
 
-        observations = {agent_id: self.observe(agent_id) for agent_id in self.agents}
+        observation_array = self.observation_buffer.copy()
+        observations = {agent_id: observation_array[i] for i, agent_id in enumerate(self.agents)}
+        rewards = dict(zip(self.agents, self.reward_buffer.tolist()))
+        terminations = dict(zip(self.agents, self.termination_buffer.tolist()))
+        truncations = dict(zip(self.agents, self.truncation_buffer.tolist()))
+        if self.profiler.enabled: infos = {agent_id: {"profile": self.profiler.stats} for agent_id in self.agents}
+        else: infos = {agent_id: {} for agent_id in self.agents}
         return observations, rewards, terminations, truncations, infos
-        
+
+    def step_arrays(self, actions:np.ndarray=None):
+        """
+        Array-native step of all agents, results are written into preallocated buffers.
+        actions (n_agents, 2) are not used yet (agents follow their tasks).
+        Returns (observations (n_agents, 4), rewards (n_agents,), terminations (n_agents,), truncations (n_agents,)),
+        same arrays every step.
+        """
+        self._advance(self.agent_objects.keys())
+        return self.observation_buffer, self.reward_buffer, self.termination_buffer, self.truncation_buffer
+
+    def _advance(self, agent_ids):
+        """Advances simulation (agents with agent_ids) by one step and fills buffers"""
+        simulation_step = self.get_next_event_step() if self.time_skipping or self.adaptive_step else self.simulation_step
+        # Longer step with travelling agents is bounded by their travel plans
+        fast_forward = self.adaptive_step and simulation_step > self.simulation_step
+        self.step_count += simulation_step
+
+        self.scene.update(simulation_step)
+        if self.fleet is not None:
+            # Batched update of all agents
+            self.fleet.update(simulation_step, self.scene.date_time_manager, fast_forward=fast_forward)
+        else:
+            for agent_id in agent_ids:
+                agent = self.agent_objects[agent_id]
+                # Update agent state
+                agent.update(simulation_step, self.scene.date_time_manager, fast_forward) # simulation step - 1 second (or time to next event)
+
+        # Check if crop field is processed
+        self.reward_buffer.fill(0)
+        self.termination_buffer.fill(self.scene.crop_field.is_processed())
+        self.truncation_buffer.fill(False)
+        self._observe_all()
+
+        if self.profiler.enabled and self.profile_dump_interval and (self.step_count-simulation_step)//self.profile_dump_interval != self.step_count//self.profile_dump_interval:
+            self.profiler.dump(self.profile_file, header=f"Step: {self.step_count}")
+
+    def get_next_event_step(self):
+        """
+        Returns time (s) to the earliest upcoming event (crop scanned/processed/regrown, battery full or
+        reaching a threshold, agent needing to move or leaving a steady travel phase).
+        Nothing but counters and steady travel change until then.
+        """
+        soc_thresholds = [BATTERY_DISCHARGED_SOC] + self.task_manager.get_battery_thresholds()
+        step = min(self.max_time_skip, self.scene.crop_field.get_time_to_regrowth())
+        if step <= self.simulation_step: return self.simulation_step
+        travelling = []
+        for agent in self.agent_objects.values():
+            if isinstance(agent.state, TravelState):
+                if not self.adaptive_step: return self.simulation_step
+                travelling.append(agent)
+                continue
+            if not self.time_skipping: return self.simulation_step
+            step = min(step, agent.state.get_time_to_event(soc_thresholds, self.scene.date_time_manager))
+            if step <= self.simulation_step: return self.simulation_step
+        # Travel horizons are simulated, so they are bounded by the other events first
+        for agent in travelling:
+            step = min(step, agent.state.get_time_to_event(soc_thresholds, self.scene.date_time_manager, max_time=step))
+            if step <= self.simulation_step: return self.simulation_step
+        return step
+
+    def snapshot(self) -> bytes:
+        """
+        Returns compact byte buffer with all mutable simulation state: agents (poses, batteries, states,
+        paths, tasks), crops and rows, station queues, clock and task manager counters.
+        Navmesh, config and pygame objects are not included (restore into env built from same config).
+        """
+        state = {
+            "step_count": self.step_count,
+            "agents": {agent_id: agent.snapshot() for agent_id, agent in self.agent_objects.items()},
+            "scene": self.scene.snapshot(),
+            "task_manager": self.task_manager.snapshot(),
+        }
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def restore(self, snapshot:bytes):
+        """Restores state from snapshot (continuation of simulation from that point)"""
+        state = pickle.loads(snapshot)
+        agents_state = state["agents"]
+        if list(agents_state.keys()) != list(self.agent_objects.keys()):
+            self.n_agents = len(agents_state)
+            self.agents, self.agent_objects = init_agents(self.n_agents, self.scene.config["spawning_area"], self.scene.navmesh)
+            self.task_manager.reset(self)
+        self.agents = list(self.agent_objects.keys())
+        self.step_count = state["step_count"]
+
+        self.scene.restore(state["scene"], self.agent_objects)
+        self.task_manager.restore(state["task_manager"])
+        for agent_id, agent in self.agent_objects.items():
+            agent_state = agents_state[agent_id]
+            agent.restore(agent_state, self.task_manager.restore_task(agent_state["task"]))
+        self.fleet = Fleet(self.agent_objects.values()) if self.use_fleet_engine else None
+        self.set_profiling(self._profiling)
+        self._init_buffers()
+        self._observe_all()
+
+    def set_profiling(self, enabled:bool, clear:bool=False):
+        """
+        Switches timing of subsystems on/off (wrappers are re-attached to current scene/agents objects).
+        clear -> collected stats are cleared.
+        """
+        self._profiling = enabled
+        profiler = self.profiler
+        profiler.unwrap_all()
+        profiler.enabled = enabled
+        if clear: profiler.reset()
+        if not enabled: return
+
+        profiler.wrap(self, "_advance", profiler.total_name)
+        profiler.wrap(self, "get_next_event_step", "env.get_next_event_step")
+        profiler.wrap(self.scene, "update", "Scene.update")
+        profiler.wrap(self.scene.crop_field, "update_row_processing_status", "CropField.update_row_processing_status")
+        profiler.wrap(self.task_manager, "assign_tasks", "TaskManager.assign_tasks")
+        # Agents can hold navmesh built before last scene reset
+        navmeshes = {id(navmesh): navmesh for navmesh in [self.scene.navmesh] + [agent.navmesh for agent in self.agent_objects.values()]}
+        for navmesh in navmeshes.values():
+            profiler.wrap(navmesh, "find_shortest_path", "NavMesh.find_shortest_path")
+        if self.fleet is not None:
+            profiler.wrap(self.fleet, "update", "Fleet.update")
+        for agent in self.agent_objects.values():
+            profiler.wrap(agent, "update", lambda agent: f"Agent.update[{type(agent.state).__name__}]")
+            for state in (agent.idle_state, agent.travel_state, agent.charging_state, agent.work_scan_state, agent.work_process_state):
+                profiler.wrap(state, "update", f"State.update[{type(state).__name__}]")
+
+    def profile_report(self) -> str:
+        """Returns table of timings collected by profiler (see set_profiling)"""
+        return self.profiler.report()
+
+    def _observe_all(self):
+        """Writes observations of all agents into observation_buffer"""
+        observations = self.observation_buffer
+        if self.fleet is not None:
+            # Agents of env are contiguous rows of fleet (fleet can be shared by many envs)
+            start = next(iter(self.agent_objects.values())).fleet_index if observations.shape[0] else 0
+            rows = slice(start, start + observations.shape[0])
+            direction = self.fleet.direction[rows]
+            observations[:, :2] = self.fleet.position[rows]
+            observations[:, 2] = self.fleet.velocity_l[rows]
+            np.arctan2(direction[:, 1], direction[:, 0], out=self._angle_buffer)
+            observations[:, 3] = np.degrees(self._angle_buffer, out=self._angle_buffer)
+            return
+        for i, agent in enumerate(self.agent_objects.values()):
+            position = agent.position
+            observations[i] = (position.x, position.y, agent.velocity_l, agent.direction.get_angle("deg"))
+
     def observe(self, agent_id):
         # Return the observation for the specified agent
         agent = self.agent_objects[agent_id]
+        if self.fleet is not None:
+            i = agent.fleet_index
+            x, y = self.fleet.position[i]
+            dx, dy = self.fleet.direction[i]
+            return np.array([x, y, self.fleet.velocity_l[i], np.degrees(np.arctan2(dy, dx))], dtype=np.float32)
         return np.array([
             agent.position.x,
             agent.position.y,
@@ -119,6 +277,7 @@ class ContinuousMARLEnv(ParallelEnv):
         ], dtype=np.float32)
 
     def handle_events(self):
+        import pygame
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # Handle window close
                 pygame.quit()
@@ -127,8 +286,26 @@ class ContinuousMARLEnv(ParallelEnv):
             self.gui.handle_event(event)
             
     def render(self, mode='human'):
+        import pygame
+        from rendering.render import (
+            BG_COLOR,
+            render_agents,
+            render_fps,
+            render_mouse_scene_pos,
+            render_gui_step_count,
+            render_gui_date_time,
+            render_gui_field_params,
+            render_gui_spawning_area_params,
+            render_gui_agents,
+            render_gui_stations,
+            render_gui_crop_field,
+            render_gui_tasks
+        )
         if self.screen is None and mode == 'human':
+            from rendering.gui import GUI
+            from rendering.camera import Camera
             pygame.init()
+            if self.camera is None: self.camera = Camera()
             self.screen = pygame.display.set_mode(self.screen_size)
             self.static_surface = pygame.Surface(self.screen_size)
             self.dynamic_surface = pygame.Surface(self.screen_size, pygame.SRCALPHA)
@@ -163,8 +340,9 @@ class ContinuousMARLEnv(ParallelEnv):
 
                 if ENV_RENDER_GUI_PARAMS["step_count"]: render_gui_step_count(self.gui, self.step_count)
                 if ENV_RENDER_GUI_PARAMS["date_time"]: render_gui_date_time(self.gui, self.scene.date_time_manager)
-                if ENV_RENDER_GUI_PARAMS["field_params"]: render_gui_field_params(self.gui, ENV_SIMULATION_PARAMS["scene_config"]["field"])
-                if ENV_RENDER_GUI_PARAMS["spawning_area_params"]: render_gui_spawning_area_params(self.gui, ENV_SIMULATION_PARAMS["scene_config"]["spawning_area"])
+                if ENV_RENDER_GUI_PARAMS["field_params"]:
+                    for field_config in CropField.get_field_configs(self.scene.config["field"]): render_gui_field_params(self.gui, field_config)
+                if ENV_RENDER_GUI_PARAMS["spawning_area_params"]: render_gui_spawning_area_params(self.gui, self.scene.config["spawning_area"])
                 if ENV_RENDER_GUI_PARAMS["agent_stats"]: render_gui_agents(self.gui, self.agent_objects)
                 if ENV_RENDER_GUI_PARAMS["station_stats"]: render_gui_stations(self.gui, self.scene.station_objects)
                 if ENV_RENDER_GUI_PARAMS["crop_field_stats"]: render_gui_crop_field(self.gui, self.scene.crop_field)
@@ -181,6 +359,7 @@ class ContinuousMARLEnv(ParallelEnv):
 
     def close(self):
         if self.screen is not None:
+            import pygame
             pygame.quit()
             self.screen = None
 
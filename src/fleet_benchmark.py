@@ -0,0 +1,78 @@
+import sys
+import time
+import random
+import numpy as np
+
+from utilities.configuration import ENV_PARAMS
+ENV_SIMULATION_PARAMS = ENV_PARAMS["simulation"]
+
+"""
+Compares wall time of per agent updates (Agent.update loop) and fleet engine (Fleet.update)
+for the same seeded simulation. Usage: python fleet_benchmark.py [n_steps] [n_agents ...]
+With --batched K compares K seeded episodes run one after another and in one BatchedFarmEnv.
+"""
+
+def measure(n_agents:int, fleet_engine:bool, n_steps:int):
+    """Returns (time (s) spent in env steps, sum of agent positions) of n_steps steps from seeded reset"""
+    from env import ContinuousMARLEnv
+    ENV_SIMULATION_PARAMS["n_agents"] = n_agents
+    ENV_SIMULATION_PARAMS["fleet_engine"] = fleet_engine
+    env = ContinuousMARLEnv()
+    random.seed(0)
+    np.random.seed(0)
+    env.reset()
+    step_time = 0
+    for _ in range(n_steps):
+        env.task_manager.assign_tasks()
+        start = time.perf_counter()
+        env.step_arrays()
+        step_time += time.perf_counter() - start
+    position_sum = sum(agent.position.x + agent.position.y for agent in env.agent_objects.values())
+    return step_time, position_sum
+
+
+def measure_episodes(n_instances:int, batched:bool):
+    """Returns (wall time (s), final step count of each instance) of n_instances seeded episodes (instance k has seed k)"""
+    ENV_SIMULATION_PARAMS["fleet_engine"] = False
+    start = time.perf_counter()
+    if batched:
+        from batched_env import BatchedFarmEnv
+        batched_env = BatchedFarmEnv(n_instances)
+        batched_env.reset(seed=0)
+        while not batched_env.done.all():
+            batched_env.assign_tasks()
+            batched_env.step()
+        return time.perf_counter() - start, [env.step_count for env in batched_env.envs]
+
+    from env import ContinuousMARLEnv
+    env = ContinuousMARLEnv()
+    step_counts = []
+    for k in range(n_instances):
+        random.seed(k)
+        np.random.seed(k)
+        env.reset()
+        while True:
+            env.task_manager.assign_tasks()
+            _, _, terminations, truncations = env.step_arrays()
+            if terminations.any() or truncations.any(): break
+        step_counts.append(env.step_count)
+    return time.perf_counter() - start, step_counts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--batched":
+        n_instances = int(sys.argv[2])
+        serial_time, serial_steps = measure_episodes(n_instances, batched=False)
+        batched_time, batched_steps = measure_episodes(n_instances, batched=True)
+        print(f"{n_instances} episodes | serial: {serial_time:.2f} s | batched: {batched_time:.2f} s | speedup: {serial_time/batched_time:.2f}x | same: {serial_steps == batched_steps}")
+        sys.exit()
+
+    n_steps = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    options_n_agents = [int(arg) for arg in sys.argv[2:]] or [4, 50, 500]
+
+    print(f"| {'n_agents'.ljust(8)} | {'loop (s)'.ljust(9)} | {'fleet (s)'.ljust(9)} | {'speedup'.ljust(7)} | {'same'.ljust(5)} |")
+    for n_agents in options_n_agents:
+        loop_time, loop_positions = measure(n_agents, False, n_steps)
+        fleet_time, fleet_positions = measure(n_agents, True, n_steps)
+        same = loop_positions == fleet_positions
+        print(f"| {str(n_agents).ljust(8)} | {loop_time:9.2f} | {fleet_time:9.2f} | {loop_time/fleet_time:6.2f}x | {str(same).ljust(5)} |")
@@ -2,6 +2,8 @@ import time
 import pygame
 
 from env import ContinuousMARLEnv
+from recording.trajectory import TrajectoryRecorder
+from utilities.frame_writer import open_frame_writer
 from task_management.task_manager import TaskManager1
 from utilities.configuration import ENV_PARAMS
 ENV_RENDER_INTERVAL = ENV_PARAMS["simulation"]["render_interval"]
@@ -23,6 +25,8 @@ def main():
 
     render_env = False if ENV_RENDER_INTERVAL==0 else True
     take_screenshots = False
+    screenshots_output = "../dev/" # folder -> PNG frames named by step_count, .gif / .png -> animated file (streamed)
+    record_trajectory = False # compact per step trajectory (see recording/trajectory.py) instead of screenshots
     
     n_episodes = 1
     times = []
@@ -30,7 +34,10 @@ def main():
     for episode in range(n_episodes):
         print(f"Episode {episode+1}/{n_episodes}")
         observations, _ = env.reset()
+        recorder = TrajectoryRecorder(f"../dev/trajectory_{episode}", env) if record_trajectory else None
+        frame_writer = open_frame_writer(screenshots_output) if render_env and take_screenshots else None
         if render_env: env.render()
+        last_render_step = 0
         done = False
         total_reward = 0
 
@@ -43,11 +50,13 @@ def main():
             
             # Step the environment
             next_observations, rewards, terminations, truncations, infos = env.step(actions)
-            if render_env and env.step_count%ENV_RENDER_INTERVAL==0:
+            if recorder is not None: recorder.record()
+            # with time skipping step_count can jump over multiples of render interval
+            if render_env and env.step_count//ENV_RENDER_INTERVAL != last_render_step//ENV_RENDER_INTERVAL:
+                last_render_step = env.step_count
                 env.render() # render every n simulation frames
-                if take_screenshots:
-                    screenshot = pygame.display.get_surface()  # Get the current screen surface
-                    pygame.image.save(screenshot, f"../dev/{str(env.step_count).zfill(6)}.png")  # Save it as a PNG file
+                if frame_writer is not None:
+                    frame_writer.write(pygame.display.get_surface(), env.step_count)  # Encoded in background thread
             #if env.step_count%300==0: input("Enter")
             
             # Accumulate rewards
@@ -56,6 +65,8 @@ def main():
 
             observations = next_observations
 
+        if recorder is not None: recorder.close()
+        if frame_writer is not None: frame_writer.close()
         end_time = time.time()
         duration = end_time-start_time
         times.append(duration)
@@ -1,5 +1,8 @@
 import math
+import heapq
+import itertools
 import numpy as np
+from collections import OrderedDict
 import triangle as tr
 import networkx as nx
 
@@ -28,10 +31,13 @@ class Segment:
         return f'Segment(p1={self.p1}, p2={self.p2})'
 
 class Polygon:
-    def __init__(self, points:list[Point]):
+    def __init__(self, points:list[Point], indices:list[int]=None):
+        """indices: indexes of points in navmesh vertices (in same order as points)"""
         self.points = points
+        self.indices = indices
         if self.is_clockwise():
             self.points = list(reversed(points))
+            if indices is not None: self.indices = list(reversed(indices))
         self.create()
     
     def create(self):
@@ -39,6 +45,18 @@ class Polygon:
         for i in range(len(self.points)):
             self.segments.append(Segment(self.points[i], self.points[(i+1)%len(self.points)]))
         self.center = self.calculate_center()
+        self.bounds = (
+            min(p.x for p in self.points), min(p.y for p in self.points),
+            max(p.x for p in self.points), max(p.y for p in self.points)
+        )
+        # Normalized edge functions a*x + b*y + c (distance from edge, positive inside counter-clockwise polygon)
+        self.edge_functions = []
+        for segment in self.segments:
+            a, b = segment.p1.y - segment.p2.y, segment.p2.x - segment.p1.x
+            length = math.sqrt(a*a + b*b)
+            if length == 0: continue
+            a, b = a / length, b / length
+            self.edge_functions.append((a, b, -(a*segment.p1.x + b*segment.p1.y)))
 
     def calculate_center(self):
         if len(self.points) < 3:
@@ -72,6 +90,18 @@ class Polygon:
             if segment_ == segment: return True
         return False
     
+    def get_point_side(self, x:float, y:float, epsilon:float=1e-9):
+        """
+        Returns 1 if point is inside convex polygon, -1 if outside, 0 if it is within epsilon from some edge
+        (result of ray-casting is not obvious there, see is_point_in_poly)
+        """
+        side = 1
+        for a, b, c in self.edge_functions:
+            distance = a*x + b*y + c
+            if distance < -epsilon: return -1
+            if distance <= epsilon: side = 0
+        return side
+
     def is_point_in_poly(self, point: Point):
         # Ray-casting algorithm to check if the point is inside the polygon
         count = 0
@@ -156,14 +186,100 @@ class Polygon:
         return f'Polygon(points={self.points})'
     
 
+class LRUCache:
+    """Bounded mapping which drops least recently used items, counts hits and misses of get"""
+    def __init__(self, max_size:int):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size: self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+    def __repr__(self):
+        return f'LRUCache(size={len(self.items)}/{self.max_size}, hits={self.hits}, misses={self.misses})'
+
+
 class NavMesh:
-    def __init__(self, boundary, points=[], obstacles=[]):
+    TRIANGULATION_FLAGS = "pq10" # Triangle flags: p - boundary and obstacle segments (required), q<angle> - minimum angle, a<area> - maximum area
+    POINT_INDEX_CELLS_PER_POLYGON = 1 # average number of point index cells per polygon
+    PATH_CACHE_SIZE = 1024 # paths between exact end points
+    CORRIDOR_CACHE_SIZE = 4096 # polygon corridors between (start polygon, end polygon)
+
+    def __init__(self, boundary, points=[], obstacles=[], arrays:dict=None, triangulation_flags:str=TRIANGULATION_FLAGS, merge_polygons:bool=False):
+        """
+        arrays (from to_arrays, e.g. scene cache) are used instead of triangulation and graph building.
+        merge_polygons merges triangles into larger convex polygons (smaller graph), see _optimize.
+        """
+        if "p" not in triangulation_flags:
+            raise ValueError(f"Triangulation flags '{triangulation_flags}' must contain 'p' (boundary and obstacle segments)")
+        self.triangulation_flags = triangulation_flags
+        self.merge_polygons = merge_polygons
         self.boundary = np.array(boundary)
         self.obstacles = [np.array(obs) for obs in obstacles]
         self.vertices, self.triangles, self.portals = [], [], []
-        self.graph = nx.Graph()
+        self.graph = nx.Graph() # only for debugging / rendering, paths are searched in CSR arrays
+        self.graph_edges = [] # (i, j, weight) in order of adding to graph
+        self.edge_portals = {} # (i, j) -> shared segment (p1, p2) as oriented in polygon i
+        # Graph in CSR arrays: neighbours of polygon i are graph_indices[graph_indptr[i]:graph_indptr[i+1]]
+        self.graph_indptr = np.zeros(1, dtype=np.int32)
+        self.graph_indices = np.zeros(0, dtype=np.int32)
+        self.graph_weights = np.zeros(0, dtype=np.float64)
+        self.graph_centers = np.zeros((0, 2), dtype=np.float64)
+        self.path_cache = LRUCache(self.PATH_CACHE_SIZE) # (start, end) -> (path, distance, portals)
+        self.corridor_cache = LRUCache(self.CORRIDOR_CACHE_SIZE) # (start polygon, end polygon) -> polygon indexes
         self.polygons = []
-        self._triangulate(points)
+        self.polygon_indices = [] # vertex indexes of every polygon (counter-clockwise)
+        self._point_index = [] # polygon indexes (ascending) overlapping each grid cell, row-major
+        self._point_index_origin, self._point_index_cell_size, self._point_index_shape = (0, 0), 1, (0, 0)
+        if arrays is None: self._triangulate(points)
+        else: self._load_arrays(arrays)
+
+    def to_arrays(self) -> dict:
+        """Returns triangulation and graph as arrays"""
+        return {
+            "vertices": np.array(self.vertices, dtype=np.float64).reshape(-1, 2),
+            "triangles": np.array(self.triangles, dtype=np.int32).reshape(-1, 3),
+            "polygon_indptr": np.cumsum([0] + [len(indices) for indices in self.polygon_indices], dtype=np.int64),
+            "polygon_vertices": np.array([index for indices in self.polygon_indices for index in indices], dtype=np.int32),
+            "edges": np.array([(i, j) for i, j, _ in self.graph_edges], dtype=np.int32).reshape(-1, 2),
+            "edge_weights": np.array([weight for _, _, weight in self.graph_edges], dtype=np.float64),
+            "edge_portals": np.array([
+                [[(p.x, p.y) for p in self.edge_portals[(i, j)]], [(p.x, p.y) for p in self.edge_portals[(j, i)]]]
+                for i, j, _ in self.graph_edges
+            ], dtype=np.float64).reshape(-1, 2, 2, 2),
+        }
+
+    def _load_arrays(self, arrays:dict):
+        self.vertices = np.asarray(arrays["vertices"]).tolist()
+        self.triangles = np.array(arrays["triangles"])
+        indptr, polygon_vertices = np.asarray(arrays["polygon_indptr"]).tolist(), np.asarray(arrays["polygon_vertices"]).tolist()
+        self._create_polygons([polygon_vertices[start:end] for start, end in zip(indptr, indptr[1:])])
+        edges = np.asarray(arrays["edges"]).tolist()
+        weights = np.asarray(arrays["edge_weights"]).tolist()
+        portals = [
+            tuple((Point(*p1), Point(*p2)) for p1, p2 in edge_portals)
+            for edge_portals in np.asarray(arrays["edge_portals"]).tolist()
+        ]
+        self._set_graph([(i, j, weight) for (i, j), weight in zip(edges, weights)], portals)
     
     def _triangulate(self, extra_points):
         # Make points
@@ -181,110 +297,343 @@ class NavMesh:
             segments.extend([[start_index + i, start_index + (i + 1) % len(obs)] for i in range(len(obs))])
         # Pack and triangulate
         data = {'vertices': np.array(points), 'segments': np.array(segments), 'holes': np.array(holes)}
-        #triangulated = tr.triangulate(data, 'p')
-        triangulated = tr.triangulate(data, 'pq10')
+        triangulated = tr.triangulate(data, self.triangulation_flags)
         if 'triangles' in triangulated:
             self.triangles = triangulated['triangles']
             self.vertices = triangulated['vertices']
             # Round vertices
             precision = 8
             self.vertices = [[round(v[0], precision), round(v[1], precision)] for v in self.vertices]
-            # Generate polygons
-            self.polygons = []
-            for tri in self.triangles:
-                pts = []
-                for index in tri:
-                    pts.append(Point(self.vertices[index][0], self.vertices[index][1]))
-                polygon = Polygon(pts)
-                self.polygons.append(polygon)
-            # self._optimize()
+            polygons = self.triangles.tolist()
+            if self.merge_polygons: polygons = self._optimize(polygons)
+            self._create_polygons(polygons)
             self._build_graph()
 
-    def _optimize(self):
-        """ Combines polygons to make navmesh faster """
-        # Get segments of all polygons
-        segments = []
-        for poly in self.polygons:
-            for segment in poly.segments:
-                if segment in segments: continue
-                segments.append(segment)
-
-        def find_polygons_with_segment(segment, polygons):
-            found_polys = []
-            for poly in polygons:
-                if poly.contains_segment(segment): found_polys.append(poly)
-            return found_polys
-
-        def merge_polys(poly1, poly2):
-            common_segment = None
-            for segment in poly1.segments:
-                if poly2.contains_segment(segment):
-                    common_segment = segment
-                    break
-            if common_segment is None: raise ValueError("No common segment - Shouldn't happen")
-
-            def get_points_in_order(poly, common_segment):
-                # get common segment of poly
-                common_seg = None
-                for seg in poly.segments:
-                    if seg == common_segment:
-                        common_seg = seg
-                        break
-                # find point indexes of common segment for poly
-                segment_indexes = []
-                for i, p in enumerate(poly.points):
-                    if p in (common_segment.p1, common_segment.p2): segment_indexes.append(i)
-                if len(segment_indexes) != 2: raise ValueError("Not 2 point for segment - Shouldn't happen")
-                segment_end_index = segment_indexes[0] if common_seg.p2==poly.points[segment_indexes[0]] else segment_indexes[1]
-                # add poly points
-                points_in_order = []
-                for i in range(len(poly.points)):
-                    index = (segment_end_index + i) % len(poly.points)
-                    points_in_order.append(poly.points[index])
-                return points_in_order
-
-            new_points = get_points_in_order(poly1, common_segment)
-            new_points2 = get_points_in_order(poly2, common_segment)
-            for p in new_points2:
-                if p in new_points: continue # skip segment points
-                new_points.append(p)
-            if len(new_points) != len(poly1.points) + len(poly2.points) - 2: return None
-
-            return Polygon(new_points)
-
-        
-        for i, segment in enumerate(segments):
-            polys_with_segment = find_polygons_with_segment(segment, self.polygons)
-            if len(polys_with_segment) > 2:
-                raise ValueError("More than 2 poly have common segment. Shouldn't happen")
-            if len(polys_with_segment) != 2: continue # boundary / hole segment
-            merged_poly = merge_polys(polys_with_segment[0], polys_with_segment[1])
-            if merged_poly is None: continue
-            if not merged_poly.is_convex(): continue
-            if abs(polys_with_segment[0].get_area()+polys_with_segment[1].get_area()-merged_poly.get_area()) > 0.00002:
-                raise ValueError(f"Area of merged poly should be same: {polys_with_segment[0].get_area()+polys_with_segment[1].get_area()} != {merged_poly.get_area()}")
-            self.polygons.remove(polys_with_segment[0])
-            self.polygons.remove(polys_with_segment[1])
-            self.polygons.append(merged_poly)
-
+    def _create_polygons(self, polygons:list=None):
+        """Creates polygons from lists of vertex indexes (triangles if None)"""
+        if polygons is None: polygons = np.asarray(self.triangles).tolist()
+        self.polygons = []
+        for indices in polygons:
+            pts = []
+            for index in indices:
+                pts.append(Point(self.vertices[index][0], self.vertices[index][1]))
+            polygon = Polygon(pts, list(indices))
+            self.polygons.append(polygon)
+        self.polygon_indices = [polygon.indices for polygon in self.polygons]
+        self._build_point_index()
+
+    def _build_point_index(self):
+        """Uniform grid over polygon bounding boxes for _find_poly_containing_point"""
+        self._point_index = []
+        self._point_index_shape = (0, 0)
+        if len(self.polygons) == 0: return
+        min_x = min(poly.bounds[0] for poly in self.polygons)
+        min_y = min(poly.bounds[1] for poly in self.polygons)
+        max_x = max(poly.bounds[2] for poly in self.polygons)
+        max_y = max(poly.bounds[3] for poly in self.polygons)
+        area = max((max_x - min_x) * (max_y - min_y), 1e-12)
+        cell_size = math.sqrt(area / (len(self.polygons) * self.POINT_INDEX_CELLS_PER_POLYGON))
+        cells_x = math.floor((max_x - min_x) / cell_size) + 1
+        cells_y = math.floor((max_y - min_y) / cell_size) + 1
+        self._point_index_origin, self._point_index_cell_size, self._point_index_shape = (min_x, min_y), cell_size, (cells_x, cells_y)
+        self._point_index = [[] for _ in range(cells_x*cells_y)]
+        for i, poly in enumerate(self.polygons):
+            x0, y0, x1, y1 = poly.bounds
+            ix0, iy0 = math.floor((x0 - min_x) / cell_size), math.floor((y0 - min_y) / cell_size)
+            ix1, iy1 = math.floor((x1 - min_x) / cell_size), math.floor((y1 - min_y) / cell_size)
+            for iy in range(iy0, iy1+1):
+                for ix in range(ix0, ix1+1):
+                    self._point_index[iy*cells_x + ix].append(i)
+
+    def _optimize(self, polygons:list) -> list:
+        """
+        Combines polygons to make navmesh faster. Neighbouring convex polygons (lists of vertex indexes) are merged while
+        result stays convex, merges giving larger polygons first. Neighbours are found by hashing directed segments
+        (segment a->b of one polygon is b->a in its counter-clockwise neighbour).
+        Returns merged polygons (counter-clockwise) in order of their first original polygon.
+        """
+        vertices = self.vertices
+
+        def signed_area(indices):
+            return sum(
+                vertices[a][0]*vertices[b][1] - vertices[b][0]*vertices[a][1]
+                for a, b in zip(indices, indices[1:] + indices[:1])
+            ) / 2
+
+        def turn(a, b, c):
+            """Cross product of a->b and b->c (>= 0 for convex vertex b of counter-clockwise polygon)"""
+            (ax, ay), (bx, by), (cx, cy) = vertices[a], vertices[b], vertices[c]
+            return (bx - ax) * (cy - by) - (by - ay) * (cx - bx)
+
+        def segments(indices):
+            return zip(indices, indices[1:] + indices[:1])
+
+        polygons = [list(indices) if signed_area(list(indices)) >= 0 else list(reversed(indices)) for indices in polygons]
+        areas = [signed_area(indices) for indices in polygons]
+        alive = [True] * len(polygons)
+        first_polygon = list(range(len(polygons)))
+        segment_polygon = {} # directed segment (a, b) -> polygon
+        for i, indices in enumerate(polygons):
+            for segment in segments(indices): segment_polygon[segment] = i
+
+        def merge(i, j, a, b):
+            """Returns polygon i merged with j over segment a->b of i, None if result isn't convex"""
+            indices_i, indices_j = polygons[i], polygons[j]
+            b_index, a_index = indices_i.index(b), indices_j.index(a)
+            path_i = indices_i[b_index:] + indices_i[:b_index] # b ... a
+            path_j = indices_j[a_index:] + indices_j[:a_index] # a ... b
+            merged = path_i + path_j[1:-1]
+            if len(set(merged)) != len(merged): return None
+            # Only angles at b (first) and a (end of path_i) change
+            n = len(merged)
+            for k in (0, len(path_i) - 1):
+                if turn(merged[k-1], merged[k], merged[(k+1) % n]) < 0: return None
+            return merged
+
+        queue = []
+        counter = itertools.count()
+        def push_merges(i):
+            for a, b in segments(polygons[i]):
+                j = segment_polygon.get((b, a))
+                if j is None or not alive[j]: continue
+                merged = merge(i, j, a, b)
+                if merged is not None: heapq.heappush(queue, (-(areas[i] + areas[j]), next(counter), i, j, merged))
+
+        for i in range(len(polygons)): push_merges(i)
+        while queue:
+            _, _, i, j, merged = heapq.heappop(queue)
+            if not (alive[i] and alive[j]): continue
+            alive[i] = alive[j] = False
+            k = len(polygons)
+            polygons.append(merged)
+            areas.append(areas[i] + areas[j])
+            alive.append(True)
+            first_polygon.append(min(first_polygon[i], first_polygon[j]))
+            for segment in segments(merged): segment_polygon[segment] = k
+            push_merges(k)
+
+        merged_polygons = [i for i in range(len(polygons)) if alive[i]]
+        merged_polygons.sort(key=lambda i: first_polygon[i])
+        return [polygons[i] for i in merged_polygons]
 
     def _build_graph(self):
-        self.graph.clear()
         def distance(p1, p2):
             """Helper function to calculate the Euclidean distance between two points."""
             return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-        
-        for i, poly1 in enumerate(self.polygons):
-            for j in range(i+1, len(self.polygons)):
-                poly2 = self.polygons[j]
-                if self._find_shared_segment(poly1, poly2) is not None:
-                    p1 = poly1.center
-                    p2 = poly2.center
-                    edge_length = distance(p1,p2)
-                    self.graph.add_edge(i, j, weight=edge_length)
-        
+
+        # Polygons sharing segment are found in one pass over segments hashed by their (unordered) end points
+        segment_polygons = {}
+        for i, poly in enumerate(self.polygons):
+            for segment in poly.segments:
+                key = tuple(sorted(((segment.p1.x, segment.p1.y), (segment.p2.x, segment.p2.y))))
+                segment_polygons.setdefault(key, []).append((i, segment))
+
+        shared_segments = {}
+        for polygons in segment_polygons.values():
+            for a in range(len(polygons)):
+                for b in range(a+1, len(polygons)):
+                    (i, segment_i), (j, segment_j) = sorted((polygons[a], polygons[b]), key=lambda item: item[0])
+                    if i == j: continue
+                    shared_segments.setdefault((i, j), (segment_i, segment_j))
+
+        edges, portals = [], []
+        for i, j in sorted(shared_segments):
+            segment_i, segment_j = shared_segments[(i, j)]
+            edges.append((i, j, distance(self.polygons[i].center, self.polygons[j].center)))
+            portals.append(((segment_i.p1, segment_i.p2), (segment_j.p1, segment_j.p2)))
+        self._set_graph(edges, portals)
+
+    def _set_graph(self, edges:list, portals:list):
+        """Sets graph edges (i, j, weight) with portals ((p1, p2) in polygon i, (p1, p2) in polygon j) of each edge"""
+        self.graph.clear()
+        self.graph_edges = edges
+        self.edge_portals = {}
+        for (i, j, weight), (portal_i, portal_j) in zip(edges, portals):
+            self.graph.add_edge(i, j, weight=weight)
+            self.edge_portals[(i, j)] = portal_i
+            self.edge_portals[(j, i)] = portal_j
+        self._build_csr()
+
+    def _build_csr(self):
+        """Converts graph edges to CSR arrays (neighbours in order of adding edges) and allocates search buffers"""
+        n = len(self.polygons)
+        neighbours = [[] for _ in range(n)]
+        for i, j, weight in self.graph_edges:
+            neighbours[i].append((j, weight))
+            neighbours[j].append((i, weight))
+        self.graph_indptr = np.zeros(n+1, dtype=np.int32)
+        self.graph_indptr[1:] = np.cumsum([len(node_neighbours) for node_neighbours in neighbours])
+        self.graph_indices = np.array([j for node_neighbours in neighbours for j, _ in node_neighbours], dtype=np.int32)
+        self.graph_weights = np.array([weight for node_neighbours in neighbours for _, weight in node_neighbours], dtype=np.float64)
+        self.graph_centers = np.array([(poly.center.x, poly.center.y) for poly in self.polygons], dtype=np.float64).reshape(-1, 2)
+        # Search runs on lists (faster scalar access than numpy), buffers are reused between searches
+        self._csr = (self.graph_indptr.tolist(), self.graph_indices.tolist(), self.graph_weights.tolist())
+        self._centers = (self.graph_centers[:, 0].tolist(), self.graph_centers[:, 1].tolist())
+        self._search_id = 0
+        self._search_costs = [0.0] * n
+        self._search_parents = [-1] * n
+        self._search_opened = [0] * n # search id in which node got cost
+        self._search_closed = [0] * n # search id in which node was expanded
+        # Portal search (merged polygons): state 2*e enters polygon j and state 2*e+1 enters polygon i of edge e = (i, j)
+        self._polygon_portals = [[] for _ in range(n)] # states leaving every polygon
+        self._portal_targets = [] # polygon entered by every state
+        midpoints_x, midpoints_y = [], []
+        for e, (i, j, _) in enumerate(self.graph_edges):
+            p1, p2 = self.edge_portals[(i, j)]
+            midpoints_x.append((p1.x + p2.x) / 2)
+            midpoints_y.append((p1.y + p2.y) / 2)
+            self._polygon_portals[i].append(2*e)
+            self._polygon_portals[j].append(2*e + 1)
+            self._portal_targets += [j, i]
+        self._portal_midpoints = (midpoints_x, midpoints_y)
+        n_states = len(self._portal_targets)
+        self._portal_costs = [0.0] * n_states
+        self._portal_parents = [-1] * n_states
+        self._portal_opened = [0] * n_states
+        self._portal_closed = [0] * n_states
+        # Cached paths belong to previous graph
+        self.path_cache.clear()
+        self.corridor_cache.clear()
+
+    def _astar(self, start:int, goal:int) -> list:
+        """
+        A* over CSR graph with Euclidean distance between polygon centers as heuristic (admissible and consistent,
+        edge weights are distances between centers). Returns list of polygon indexes from start to goal.
+        """
+        if not self._search(start, goal):
+            raise nx.NetworkXNoPath(f"Polygon {goal} not reachable from {start}")
+        return self._get_search_corridor(goal)
+
+    def _search(self, start:int, goal:int=None) -> bool:
+        """
+        Searches graph from start polygon into search buffers, returns True if goal was reached.
+        Without goal, whole graph is searched (Dijkstra) and corridors to all polygons can be read with _get_search_corridor.
+        """
+        indptr, indices, weights = self._csr
+        centers_x, centers_y = self._centers
+        costs, parents, opened, closed = self._search_costs, self._search_parents, self._search_opened, self._search_closed
+        self._search_id += 1
+        search_id = self._search_id
+        if goal is not None: goal_x, goal_y = centers_x[goal], centers_y[goal]
+
+        counter = itertools.count() # ties are expanded in order of pushing
+        costs[start], parents[start], opened[start] = 0.0, -1, search_id
+        h = math.hypot(goal_x - centers_x[start], goal_y - centers_y[start]) if goal is not None else 0.0
+        queue = [(h, next(counter), start)]
+        while queue:
+            _, _, node = heapq.heappop(queue)
+            if node == goal: return True
+            if closed[node] == search_id: continue
+            closed[node] = search_id
+            cost = costs[node]
+            for k in range(indptr[node], indptr[node+1]):
+                neighbour = indices[k]
+                if closed[neighbour] == search_id: continue
+                neighbour_cost = cost + weights[k]
+                if opened[neighbour] == search_id and costs[neighbour] <= neighbour_cost: continue
+                costs[neighbour], parents[neighbour], opened[neighbour] = neighbour_cost, node, search_id
+                h = math.hypot(goal_x - centers_x[neighbour], goal_y - centers_y[neighbour]) if goal is not None else 0.0
+                heapq.heappush(queue, (neighbour_cost + h, next(counter), neighbour))
+        return goal is None
+
+    def _get_search_corridor(self, goal:int) -> list:
+        """Returns polygon indexes from start of last _search to goal, None if goal wasn't reached"""
+        if self._search_opened[goal] != self._search_id: return None
+        parents = self._search_parents
+        corridor = [goal]
+        while parents[goal] != -1:
+            goal = parents[goal]
+            corridor.append(goal)
+        return corridor[::-1]
+
+    def _search_portals(self, start:Point, start_poly:int, end:Point=None, end_poly:int=None) -> int:
+        """
+        A* through portals for merged polygons, whose centers can be far from paths through them (e.g. polygon of whole
+        row corridor). Costs are straight line distances from start over portal midpoints to end, heuristic is distance
+        to end. Without end, all portals are searched (Dijkstra) and corridors can be read with _get_portal_corridor.
+        Returns last state of path to end (-1 if end is in start polygon, None if not reachable).
+        """
+        if start_poly == end_poly: return -1
+        midpoints_x, midpoints_y = self._portal_midpoints
+        targets, polygon_portals = self._portal_targets, self._polygon_portals
+        costs, parents, opened, closed = self._portal_costs, self._portal_parents, self._portal_opened, self._portal_closed
+        self._search_id += 1
+        search_id = self._search_id
+
+        counter = itertools.count()
+        queue = []
+        for state in polygon_portals[start_poly]:
+            e = state >> 1
+            cost = math.hypot(midpoints_x[e] - start.x, midpoints_y[e] - start.y)
+            costs[state], parents[state], opened[state] = cost, -1, search_id
+            h = math.hypot(end.x - midpoints_x[e], end.y - midpoints_y[e]) if end is not None else 0.0
+            heapq.heappush(queue, (cost + h, next(counter), state))
+        while queue:
+            _, _, state = heapq.heappop(queue)
+            if state < 0: return -state - 2 # path to end through state
+            if closed[state] == search_id: continue
+            closed[state] = search_id
+            cost = costs[state]
+            e = state >> 1
+            x, y = midpoints_x[e], midpoints_y[e]
+            polygon = targets[state]
+            if polygon == end_poly:
+                heapq.heappush(queue, (cost + math.hypot(end.x - x, end.y - y), next(counter), -state - 2))
+                continue
+            for next_state in polygon_portals[polygon]:
+                next_e = next_state >> 1
+                if next_e == e or closed[next_state] == search_id: continue
+                next_cost = cost + math.hypot(midpoints_x[next_e] - x, midpoints_y[next_e] - y)
+                if opened[next_state] == search_id and costs[next_state] <= next_cost: continue
+                costs[next_state], parents[next_state], opened[next_state] = next_cost, state, search_id
+                h = math.hypot(end.x - midpoints_x[next_e], end.y - midpoints_y[next_e]) if end is not None else 0.0
+                heapq.heappush(queue, (next_cost + h, next(counter), next_state))
+        return None
+
+    def _get_portal_corridor(self, start_poly:int, state:int) -> list:
+        """Returns polygon indexes from start_poly to polygon entered by state of last _search_portals"""
+        corridor = []
+        while state != -1:
+            corridor.append(self._portal_targets[state])
+            state = self._portal_parents[state]
+        corridor.append(start_poly)
+        return corridor[::-1]
+
+    def _get_portal_search_corridor(self, start:Point, start_poly:int, end:Point, end_poly:int) -> list:
+        """Returns corridor to end after _search_portals without end (None if not reachable)"""
+        if start_poly == end_poly: return [start_poly]
+        midpoints_x, midpoints_y = self._portal_midpoints
+        best_state, best_cost = None, math.inf
+        for state in self._polygon_portals[end_poly]:
+            state ^= 1 # state entering end_poly
+            if self._portal_opened[state] != self._search_id: continue
+            e = state >> 1
+            cost = self._portal_costs[state] + math.hypot(end.x - midpoints_x[e], end.y - midpoints_y[e])
+            if cost < best_cost: best_state, best_cost = state, cost
+        if best_state is None: return None
+        return self._get_portal_corridor(start_poly, best_state)
+
+    def _get_corridor(self, start:Point, start_poly:int, end:Point, end_poly:int) -> list:
+        """Returns polygon indexes from start_poly to end_poly (through portals for merged polygons)"""
+        if self.merge_polygons:
+            # Corridor depends on end points, only polygons of triangulation share corridors
+            state = self._search_portals(start, start_poly, end, end_poly)
+            if state is None: raise nx.NetworkXNoPath(f"Polygon {end_poly} not reachable from {start_poly}")
+            return self._get_portal_corridor(start_poly, state)
+        corridor = self.corridor_cache.get((start_poly, end_poly))
+        if corridor is None:
+            corridor = self._astar(start_poly, end_poly)
+            self.corridor_cache.put((start_poly, end_poly), corridor)
+        return corridor
 
     def find_shortest_path(self, start, end):
+        """Returns path points (without start) and path length, results are cached (see get_cache_stats)"""
+        key = (start[0], start[1], end[0], end[1])
+        cached = self.path_cache.get(key)
+        if cached is not None:
+            path, dist, self.portals = cached
+            return list(path), dist
+
         start = Point(start[0], start[1])
         end = Point(end[0], end[1])
         start_poly = self._find_poly_containing_point(start)
@@ -293,15 +642,55 @@ class NavMesh:
             start_poly = self._find_closest_poly(start)
         if end_poly is None:
             end_poly = self._find_closest_poly(end)
-        shortest_path = nx.astar_path(self.graph, start_poly, end_poly)
+        shortest_path = self._get_corridor(start, start_poly, end, end_poly)
         portals = [(start, start)]
         for i in range(len(shortest_path) - 1):
-            shared_segment = self._find_shared_segment(self.polygons[shortest_path[i]], self.polygons[shortest_path[i + 1]])
-            if shared_segment:
-                portals.append((shared_segment.p1, shared_segment.p2))
+            portals.append(self.edge_portals[(shortest_path[i], shortest_path[i + 1])])
         portals.append((end, end))
         self.portals = portals
-        return self._funnel_algorithm(portals)
+        path, dist = self._funnel_algorithm(portals)
+        self.path_cache.put(key, (path, dist, portals))
+        return list(path), dist
+
+    def get_path_lengths(self, start, ends:list) -> list:
+        """
+        Returns lengths of paths from start to every end point (inf if not reachable or end is nan).
+        Corridors to all ends come from one search of whole graph, so it is much faster than find_shortest_path for every end.
+        """
+        start = Point(start[0], start[1])
+        start_poly = self._find_poly_containing_point(start)
+        if start_poly is None: start_poly = self._find_closest_poly(start)
+        if start_poly is None: return [math.inf] * len(ends)
+        if self.merge_polygons: self._search_portals(start, start_poly)
+        else: self._search(start_poly)
+
+        lengths = []
+        for end in ends:
+            if math.isnan(end[0]) or math.isnan(end[1]):
+                lengths.append(math.inf)
+                continue
+            end = Point(end[0], end[1])
+            end_poly = self._find_poly_containing_point(end)
+            if end_poly is None: end_poly = self._find_closest_poly(end)
+            if self.merge_polygons: corridor = self._get_portal_search_corridor(start, start_poly, end, end_poly)
+            else: corridor = self._get_search_corridor(end_poly)
+            if corridor is None:
+                lengths.append(math.inf)
+                continue
+            portals = [(start, start)]
+            for i in range(len(corridor) - 1):
+                portals.append(self.edge_portals[(corridor[i], corridor[i + 1])])
+            portals.append((end, end))
+            _, dist = self._funnel_algorithm(portals, max_pts=len(portals)+1)
+            lengths.append(dist)
+        return lengths
+
+    def get_cache_stats(self) -> dict:
+        """Returns size, hits and misses of path and corridor caches"""
+        return {
+            name: {"size": len(cache), "hits": cache.hits, "misses": cache.misses}
+            for name, cache in (("path", self.path_cache), ("corridor", self.corridor_cache))
+        }
 
     def _triarea2(self, a:Point, b:Point, c:Point):
         """
@@ -422,25 +811,20 @@ class NavMesh:
         return None
 
     def _find_poly_containing_point(self, point):
-        for i, poly in enumerate(self.polygons):
-            if poly.is_point_in_poly(point):
+        """Returns index of first polygon containing point, only polygons in grid cell of point are tested"""
+        cells_x, cells_y = self._point_index_shape
+        ix = math.floor((point.x - self._point_index_origin[0]) / self._point_index_cell_size)
+        iy = math.floor((point.y - self._point_index_origin[1]) / self._point_index_cell_size)
+        if not (0 <= ix < cells_x and 0 <= iy < cells_y): return None
+        for i in self._point_index[iy*cells_x + ix]:
+            poly = self.polygons[i]
+            side = poly.get_point_side(point.x, point.y)
+            if side > 0 or (side == 0 and poly.is_point_in_poly(point)):
                 return i
         return None
 
     def _find_closest_poly(self, point:Point):
-        # Helper function to calculate the distance between two points
-        def _distance(p1, p2):
-            return math.sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
-        
-        min_distance = float('inf')
-        closest_poly_index = None
-        
-        # Iterate through all polys
-        for i, poly in enumerate(self.polygons):
-            dist = _distance(point, poly.center)
-            
-            if dist < min_distance:
-                min_distance = dist
-                closest_poly_index = i
-        
-        return closest_poly_index
+        """Returns index of polygon with closest center (first one if more are equally close)"""
+        if len(self.graph_centers) == 0: return None
+        distances = np.sqrt((point.x - self.graph_centers[:, 0])**2 + (point.y - self.graph_centers[:, 1])**2)
+        return int(np.argmin(distances))
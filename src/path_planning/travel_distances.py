@@ -0,0 +1,101 @@
+import math
+import numpy as np
+
+from path_planning.navmesh import NavMesh, LRUCache
+
+
+class TravelDistances:
+    """
+    Precomputed navmesh path lengths between key points of scene: end crops (first and last) of every row and charging stations.
+    Rows are corridors between row separators, so travel to any crop of other row goes through one of its end crops and then
+    straight along the row, and travel from position inside a row leaves it through one of its end crops.
+    Distances from positions outside of rows are computed with one batched navmesh search (get_path_lengths) and cached.
+    Station queue slots and spawn positions are not key points: they are only targets of tasks (never ranked by distance)
+    and spawn positions are random for every reset, end crops cover every crop and stations cover station selection.
+
+    Attributes:
+        points (np.ndarray): (n_points, 2) key points, end crops of row r are 2*r and 2*r+1, then charging stations (nan for empty rows)
+        distances (np.ndarray): (n_points, n_points) symmetric navmesh path lengths between key points (inf if not reachable)
+        station_points (dict): Index of key point of every charging station by station id
+        source_cache (LRUCache): Distances from position to all key points by position
+    """
+    SOURCE_CACHE_SIZE = 256
+
+    def __init__(self, navmesh:NavMesh, crop_field, stations:dict, arrays:dict=None):
+        """arrays (from to_arrays, e.g. scene cache) are used instead of computing distances"""
+        self.navmesh = navmesh
+        self.crop_field = crop_field
+        self.points = self.get_key_points(crop_field, stations)
+        self.station_points = {station_id: 2*crop_field.n_rows + i for i, station_id in enumerate(stations)}
+        self.source_cache = LRUCache(self.SOURCE_CACHE_SIZE)
+        if arrays is not None and len(arrays["points"]) == len(self.points) and np.array_equal(arrays["points"], self.points, equal_nan=True):
+            self.distances = np.asarray(arrays["distances"])
+        else:
+            self.distances = self._compute_distances()
+
+    @staticmethod
+    def get_key_points(crop_field, stations:dict) -> np.ndarray:
+        rows = np.arange(crop_field.n_rows)
+        last = np.maximum(np.array(crop_field.row_lengths, dtype=np.int64) - 1, 0)
+        row_ends = np.stack([crop_field.positions[rows, 0], crop_field.positions[rows, last]], axis=1).reshape(-1, 2)
+        station_points = np.array([tuple(station.position) for station in stations.values()], dtype=np.float64).reshape(-1, 2)
+        return np.concatenate([row_ends, station_points])
+
+    def to_arrays(self) -> dict:
+        return {"points": self.points, "distances": self.distances}
+
+    def _compute_distances(self) -> np.ndarray:
+        """Every key point is source of one navmesh search to key points after it"""
+        n_points = len(self.points)
+        distances = np.full((n_points, n_points), np.inf)
+        valid = np.flatnonzero(~np.isnan(self.points).any(axis=1))
+        distances[valid, valid] = 0
+        for i, source in enumerate(valid):
+            targets = valid[i+1:]
+            if len(targets) == 0: continue
+            lengths = self.navmesh.get_path_lengths(self.points[source], self.points[targets].tolist())
+            distances[source, targets] = lengths
+            distances[targets, source] = lengths
+        return distances
+
+    def _get_source(self, position) -> tuple:
+        """Returns distances from position to all key points (list) and row containing position (None if outside rows)"""
+        x, y = position
+        key = (float(x), float(y))
+        source = self.source_cache.get(key)
+        if source is not None: return source
+
+        row = self.crop_field.get_row_at(key)
+        if row is not None:
+            first, last = self.points[2*row], self.points[2*row+1]
+            to_first, to_last = math.hypot(x - first[0], y - first[1]), math.hypot(x - last[0], y - last[1])
+            to_points = np.minimum(to_first + self.distances[2*row], to_last + self.distances[2*row+1])
+        else:
+            to_points = np.array(self.navmesh.get_path_lengths(key, self.points.tolist()))
+        source = (to_points.tolist(), row)
+        self.source_cache.put(key, source)
+        return source
+
+    def get_crop_distances(self, position, crops) -> list:
+        """Returns navmesh travel distances from position to crops"""
+        to_points, source_row = self._get_source(position)
+        x, y = position
+        positions = self.crop_field.positions
+        distances = []
+        for crop in crops:
+            row = crop.row
+            crop_x, crop_y = positions[row, crop.n]
+            if row == source_row:
+                distances.append(math.hypot(x - crop_x, y - crop_y))
+                continue
+            (first_x, first_y), (last_x, last_y) = self.points[2*row], self.points[2*row+1]
+            distances.append(min(
+                to_points[2*row] + math.hypot(first_x - crop_x, first_y - crop_y),
+                to_points[2*row+1] + math.hypot(last_x - crop_x, last_y - crop_y),
+            ))
+        return distances
+
+    def get_station_distance(self, position, station_id:str) -> float:
+        """Returns navmesh travel distance from position to charging station"""
+        to_points, _ = self._get_source(position)
+        return to_points[self.station_points[station_id]]
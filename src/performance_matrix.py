@@ -1,5 +1,10 @@
+import os
+import csv
+import json
 import time
-import pygame
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from env import ContinuousMARLEnv
 from task_management.task_manager import TaskManager1
@@ -7,44 +12,76 @@ from utilities.configuration import ENV_PARAMS
 ENV_RENDER_INTERVAL = ENV_PARAMS["simulation"]["render_interval"]
 
 OUTPUT_FILE = "performance_matrix.txt"
+OUTPUT_CSV_FILE = "performance_matrix.csv"
+OUTPUT_JSONL_FILE = "performance_matrix.jsonl"
 
-if __name__ == "__main__":
+# Env of worker process (built once in init_worker and reused for all its episodes)
+_env = None
+
+def init_worker():
+    global _env
+    _env = ContinuousMARLEnv()
+
+def run_episode(env):
+    observations, _ = env.reset()
+    done = False
+    total_reward = 0
+
+    while not done:
+
+        env.task_manager.assign_tasks()
+        # Get actions
+        actions = {agent: (1,1) for agent in env.agents}
+
+        # Step the environment
+        next_observations, rewards, terminations, truncations, infos = env.step(actions)
+
+        # for debuging
+        # if env.step_count%600==0:
+        #     print(env.step_count)
+        #     env.render()
+        #     # screenshot = pygame.display.get_surface()  # Get the current screen surface
+        #     # pygame.image.save(screenshot, f"../dev/{env.n_agents}_{env.task_manager.strategy}/{env.step_count}.png")  # Save it as a PNG file
+
+        # Accumulate rewards
+        total_reward += sum(rewards.values())
+        done = all(terminations.values()) or all(truncations.values())
+
+        observations = next_observations
+
+    return {"steps": env.step_count}
 
-    env = ContinuousMARLEnv()
-
-    def run_episode(env):
-        observations, _ = env.reset()
-        done = False
-        total_reward = 0
-
-        while not done:
-            
-            env.task_manager.assign_tasks()
-            # Get actions
-            actions = {agent: (1,1) for agent in env.agents}
-            
-            # Step the environment
-            next_observations, rewards, terminations, truncations, infos = env.step(actions)
-
-            # for debuging
-            # if env.step_count%600==0:
-            #     print(env.step_count)
-            #     env.render()
-            #     # screenshot = pygame.display.get_surface()  # Get the current screen surface
-            #     # pygame.image.save(screenshot, f"../dev/{env.n_agents}_{env.task_manager.strategy}/{env.step_count}.png")  # Save it as a PNG file
-            
-            # Accumulate rewards
-            total_reward += sum(rewards.values())
-            done = all(terminations.values()) or all(truncations.values())
-
-            observations = next_observations
-        
-        return {"steps": env.step_count}
+def run_job(n_agents, strategy, episode, seed):
+    """Runs one episode in worker process"""
+    # Workers inherit the same random state -> every episode is seeded
+    random.seed(seed)
+    np.random.seed(seed)
+    _env.n_agents = n_agents
+    _env.task_manager.strategy = strategy
+    start = time.time()
+    res = run_episode(_env)
+    return {"n_agents": n_agents, "strategy": strategy, "episode": episode, "seed": seed,
+            "steps": res["steps"], "wall_time": round(time.time()-start, 3)}
 
+def seconds_to_dhms(seconds):
+    days = round(seconds // 86400)
+    hours = (seconds % 86400) // 3600
+    minutes = (seconds % 3600) // 60
+    seconds = seconds % 60
+
+    # Format each unit with leading zeros
+    hours = str(round(hours)).zfill(2)
+    minutes = str(round(minutes)).zfill(2)
+    seconds = str(round(seconds)).zfill(2)
+
+    return f"{days}:{hours}:{minutes}:{seconds}"
+
+
+if __name__ == "__main__":
 
     options_n_agents = list(reversed([1,2,3,4]))
     options_strategies = [0, 1]
-    
+
     n_episodes = 10
 
     header_names = ['n_agents', 'strategy', 'episodes', 'time_avg', 'time_min', 'time_max']
@@ -55,35 +92,39 @@ if __name__ == "__main__":
             header += f" {header_name.ljust(col_widths[i])} |"
         f.write(header + "\n")
         f.write("-" * len(header) + "\n")
-    
-    def seconds_to_dhms(seconds):
-        days = round(seconds // 86400)
-        hours = (seconds % 86400) // 3600
-        minutes = (seconds % 3600) // 60
-        seconds = seconds % 60
-
-        # Format each unit with leading zeros
-        hours = str(round(hours)).zfill(2)
-        minutes = str(round(minutes)).zfill(2)
-        seconds = str(round(seconds)).zfill(2)
-
-        return f"{days}:{hours}:{minutes}:{seconds}"
-    
+
+    jobs = [
+        (n_agents, strategy, episode)
+        for n_agents in options_n_agents
+        for strategy in options_strategies
+        for episode in range(n_episodes)
+    ]
+    steps = {(n_agents, strategy): [] for n_agents in options_n_agents for strategy in options_strategies}
+
+    csv_fields = ["n_agents", "strategy", "episode", "seed", "steps", "wall_time"]
+    with open(OUTPUT_CSV_FILE, "w", newline="") as csv_file, open(OUTPUT_JSONL_FILE, "w") as jsonl_file:
+        csv_writer = csv.DictWriter(csv_file, fieldnames=csv_fields)
+        csv_writer.writeheader()
+
+        with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=init_worker) as executor:
+            futures = [executor.submit(run_job, n_agents, strategy, episode, seed) for seed, (n_agents, strategy, episode) in enumerate(jobs)]
+            # Stream results as they finish
+            for n_done, future in enumerate(as_completed(futures), start=1):
+                res = future.result()
+                print(f"Done {n_done}/{len(jobs)} | Episode {res['episode']+1}/{n_episodes} | n_agents: {res['n_agents']}, strategy: {res['strategy']}, steps: {res['steps']}")
+                steps[(res["n_agents"], res["strategy"])].append(res["steps"])
+                csv_writer.writerow(res)
+                jsonl_file.write(json.dumps(res) + "\n")
+                csv_file.flush()
+                jsonl_file.flush()
+
     for n_agents in options_n_agents:
-        env.n_agents = n_agents
         for strategy in options_strategies:
-            env.task_manager.strategy = strategy
-
-            steps = []
-            for episode in range(n_episodes):
-                print(f"Episode {episode+1}/{n_episodes} | n_agents: {n_agents}, strategy: {strategy}")
-                res = run_episode(env)
-                steps.append(res["steps"])
-            
+            cell_steps = steps[(n_agents, strategy)]
             with open(OUTPUT_FILE, "a") as f:
-                step_avg = sum(steps)/len(steps)
-                step_min = min(steps)
-                step_max = max(steps)
+                step_avg = sum(cell_steps)/len(cell_steps)
+                step_min = min(cell_steps)
+                step_max = max(cell_steps)
                 time_avg = seconds_to_dhms(step_avg)
                 time_min = seconds_to_dhms(step_min)
                 time_max = seconds_to_dhms(step_max)
@@ -93,5 +134,3 @@ if __name__ == "__main__":
                 for i,body_name in enumerate(body_data):
                     body += f" {str(body_name).ljust(col_widths[i])} |"
                 f.write(body + "\n")
-
-        
\ No newline at end of file
@@ -3,6 +3,7 @@ import math
 
 from utilities.utils import Vec2f
 from preview.preview import Preview
+from scene.scene import CropField
 from utilities.configuration import EDITOR_PREVIEW_PARAMS
 
 def project_point_on_line_with_angle(p1: Vec2f, angle: float, p3: Vec2f):
@@ -151,37 +152,39 @@ class SceneEditorPreview(Preview):
                         self.scene.calculate_stations()
 
                     elif self.object_id.startswith("field"):
-                        ltp = self.scene.config["field"]["left_top_pos"]
-                        ang = self.scene.config["field"]["angle"]
-                        nrows = self.scene.config["field"]["n_rows"]
-                        rspa = self.scene.config["field"]["row_spacing"]
-                        ncpr = self.scene.config["field"]["n_crops_per_row"]
-                        cspa = self.scene.config["field"]["crop_spacing"]
+                        field_id, param = self.object_id.split("-")
+                        field_config = CropField.get_field_configs(self.scene.config["field"])[int(field_id.split("_")[1])]
+                        ltp = field_config["left_top_pos"]
+                        ang = field_config["angle"]
+                        nrows = field_config["n_rows"]
+                        rspa = field_config["row_spacing"]
+                        ncpr = field_config["n_crops_per_row"]
+                        cspa = field_config["crop_spacing"]
 
                         rlen = (ncpr-1) * cspa # row length
                         flen = (nrows-1) * rspa # field length
 
-                        if "field-left_top_pos" == self.object_id:
-                            self.scene.config["field"]["left_top_pos"] = new_p
-                        elif "field-angle" == self.object_id:
+                        if "left_top_pos" == param:
+                            field_config["left_top_pos"] = new_p
+                        elif "angle" == param:
                             radius = math.sqrt(rlen**2 + flen**2)
                             _,angle = snap_to_circle_with_radius(ltp, new_p, radius)
                             extra = math.degrees( math.atan2(rlen, flen) )
-                            self.scene.config["field"]["angle"] = round(angle - extra,2)
-                        elif "field-n_rows" == self.object_id:
+                            field_config["angle"] = round(angle - extra,2)
+                        elif "n_rows" == param:
                             _,distance_ = project_point_on_line_with_angle(ltp, ang, new_p)
                             n_rows = int(distance_ / rspa)+1
-                            self.scene.config["field"]["n_rows"] = max(3, n_rows)
-                        elif "field-row_spacing" == self.object_id:
+                            field_config["n_rows"] = max(3, n_rows)
+                        elif "row_spacing" == param:
                             _,distance_ = project_point_on_line_with_angle(ltp, ang, new_p)
-                            self.scene.config["field"]["row_spacing"] = max(0.3, round(distance_,4))
-                        elif "field-n_crops_per_row" == self.object_id:
+                            field_config["row_spacing"] = max(0.3, round(distance_,4))
+                        elif "n_crops_per_row" == param:
                             _,distance_ = project_point_on_line_with_angle(ltp, ang+90, new_p)
                             n_cpr = max(3,int(distance_ / cspa)+1)
-                            self.scene.config["field"]["n_crops_per_row"] = round(n_cpr,2)
-                        elif "field-crop_spacing" == self.object_id:
+                            field_config["n_crops_per_row"] = round(n_cpr,2)
+                        elif "crop_spacing" == param:
                             _,distance_ = project_point_on_line_with_angle(ltp, ang+90, new_p)
-                            self.scene.config["field"]["crop_spacing"] = max(0.2, round(distance_,4))
+                            field_config["crop_spacing"] = max(0.2, round(distance_,4))
                         self.scene.calculate_crop_field()
                         self.scene.calculate_navmesh()
                     
@@ -3,7 +3,7 @@ import pygame
 
 from rendering.gui import GUI
 from rendering.camera import Camera
-from scene.scene import Scene
+from scene.scene import Scene, CropField
 from utilities.create import init_agents
 from utilities.configuration import FONT_PATH
 from rendering.render import (
@@ -45,7 +45,11 @@ class Preview(ABC):
         self.fps = self.SIMULATION_PARAMS["fps"]
         self.camera = Camera()
 
-        self.scene = Scene(start_date_time=self.SIMULATION_PARAMS["date_time"])
+        self.scene = Scene(
+            start_date_time=self.SIMULATION_PARAMS["date_time"],
+            navmesh_triangulation=self.SIMULATION_PARAMS["navmesh_triangulation"],
+            navmesh_merge_polygons=self.SIMULATION_PARAMS["navmesh_merge_polygons"]
+        )
         self.config = self.scene.config
 
         self.step_count = 0
@@ -99,7 +103,8 @@ class Preview(ABC):
 
             if RENDER_GUI_PARAMS["step_count"]: render_gui_step_count(self.gui, self.step_count)
             if RENDER_GUI_PARAMS["date_time"]: render_gui_date_time(self.gui, self.scene.date_time_manager)
-            if RENDER_GUI_PARAMS["field_params"]: render_gui_field_params(self.gui, self.scene.config["field"])
+            if RENDER_GUI_PARAMS["field_params"]:
+                for field_config in CropField.get_field_configs(self.scene.config["field"]): render_gui_field_params(self.gui, field_config)
             if RENDER_GUI_PARAMS["spawning_area_params"]: render_gui_spawning_area_params(self.gui, self.scene.config["spawning_area"])
             if RENDER_GUI_PARAMS["agent_stats"]: render_gui_agents(self.gui, self.agent_objects)
             if RENDER_GUI_PARAMS["station_stats"]: render_gui_stations(self.gui, self.scene.station_objects)
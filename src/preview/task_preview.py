@@ -34,10 +34,9 @@ class TaskPreview(Preview):
 
     def assign_task(self, target_id, index=-1):
         def task_crop(crop_id):
-            crop = self.scene.crop_field.crops_dict[crop_id]
+            crop = self.scene.crop_field.get_crop_by_id(crop_id)
             target = Target(crop.position, None)
-            row_id = f'row_{crop_id.split("_")[1]}'
-            self.scene.crop_field.rows_assign[row_id] = agent_id
+            self.scene.crop_field.assign_row(crop.row, agent_id)
             return Task(
                 task_id=self.task_manager.task_id_counter,
                 agent_id=agent_id,
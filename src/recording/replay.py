@@ -0,0 +1,201 @@
+"""
+Offline replay of trajectory recorded with TrajectoryRecorder.
+
+Frames are rendered with the same render functions as ContinuousMARLEnv.render, in parallel headless
+worker processes, and streamed to animated file. Any simulated time can be rendered directly
+(seek to chunk keyframe + crop events), so runs can stay headless and be visualised afterwards.
+
+Usage (from src):
+    python -m recording.replay <trajectory_folder> <output.gif> [--interval 600] [--start 0] [--end 36000] [--workers 8]
+"""
+
+import os
+import math
+import argparse
+import numpy as np
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from recording.trajectory import TrajectoryReader, TARGET_NONE, TARGET_IDLE
+from scene.scene import Crop, ChargingStation, CROP_STATES
+from task_management.task_manager import Task
+from agent.agent_state_machine import IdleState, TravelState, ChargingState, WorkScanState, WorkProcessState, DischargedState
+from utilities.utils import Vec2f, Target
+from utilities.frame_writer import open_frame_writer
+from utilities.configuration import CROP_SCAN_TIME, CROP_PROCESS_TIME, CROP_GROW_TIME, FONT_PATH
+
+STATE_CLASSES = {cls.code: cls for cls in (IdleState, TravelState, ChargingState, WorkScanState, WorkProcessState, DischargedState)}
+
+
+class ReplayAgent:
+    """Stand-in for Agent with attributes used by render_agents"""
+    def __init__(self, id:str, color:tuple, spawn_position:Vec2f):
+        self.id = id
+        self.color = color
+        self.spawn_position = spawn_position
+        self.position = spawn_position
+        self.direction = Vec2f(1, 0)
+        self.states = {code: cls(self) for code, cls in STATE_CLASSES.items()}
+        self.state = self.states[IdleState.code]
+        self.task = None
+        self.path = [] # paths are not recorded
+
+
+class ReplayCropField:
+    """Stand-in for CropField with attributes used by render_crop_field and render_obstacles"""
+    def __init__(self, crops_dict:dict, obstacles:list):
+        self.crops_dict = crops_dict
+        self.obstacles = obstacles
+        self.padded_obstacles = []
+
+
+class Replay:
+    """
+    Renders recorded trajectory at any simulated time.
+
+    Attributes:
+        reader (TrajectoryReader): Reader of trajectory
+        screen_size (tuple): Size of rendered frames
+        agent_objects (dict): ReplayAgent for every recorded agent
+        crop_field (ReplayCropField): Crops (states are set for rendered time) and obstacles
+        station_objects (dict): Charging stations
+    """
+    def __init__(self, path:str, screen_size:tuple=(1200,600)):
+        # Frames are rendered to surfaces only (no window)
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        from rendering.camera import Camera
+        pygame.init()
+
+        self.reader = TrajectoryReader(path)
+        self.screen_size = screen_size
+        meta = self.reader.meta
+        self.start_date_time = datetime.strptime(meta["start_date_time"], "%d.%m.%Y %H:%M:%S")
+
+        self.agent_objects = {
+            agent_id: ReplayAgent(agent_id, tuple(color), Vec2f(spawn_position))
+            for agent_id, color, spawn_position in zip(meta["agent_ids"], meta["agent_colors"], meta["spawn_positions"])
+        }
+        crops_dict = {
+            crop_id: Crop(crop_id, Vec2f(position.tolist()), CROP_SCAN_TIME, CROP_PROCESS_TIME, CROP_GROW_TIME)
+            for crop_id, position in zip(meta["crop_ids"], self.reader.crop_positions)
+        }
+        self._crops = list(crops_dict.values())
+        obstacles = [[Vec2f(p.tolist()) for p in obstacle] for obstacle in self.reader.obstacles]
+        self.crop_field = ReplayCropField(crops_dict, obstacles)
+        self.station_objects = {
+            station_id: ChargingStation(station_id, Vec2f(position.tolist()), Vec2f(queue_direction), waiting_offset, tuple(color))
+            for station_id, position, queue_direction, waiting_offset, color in zip(
+                meta["station_ids"], self.reader.station_positions, meta["station_queue_directions"], meta["station_waiting_offsets"], meta["station_colors"]
+            )
+        }
+        self._targets = [crop.position for crop in self._crops] + [station.position for station in self.station_objects.values()]
+        self._target_ids = list(crops_dict.keys()) + list(self.station_objects.keys())
+        self._target_objects = self._crops + list(self.station_objects.values())
+
+        self.camera = Camera()
+        self.font = pygame.font.Font(FONT_PATH, 12)
+        self.surface = pygame.Surface(self.screen_size)
+        self.static_surface = None
+
+    def seek(self, time_s:int):
+        """Sets agents and crops to state of last recorded step at or before simulated time time_s"""
+        reader = self.reader
+        chunk_index = reader.find_chunk(time_s)
+        chunk = reader.get_chunk(chunk_index)
+        row = max(0, int(np.searchsorted(chunk["time"], time_s, side="right")) - 1)
+        self.time = int(chunk["time"][row])
+
+        crop_states = reader.get_crop_states(chunk, row)
+        for crop, code in zip(self._crops, crop_states):
+            crop.state = CROP_STATES[code]
+
+        for i, agent in enumerate(self.agent_objects.values()):
+            x, y = chunk["position"][row, i]
+            heading = math.radians(chunk["heading"][row, i])
+            agent.position = Vec2f(float(x), float(y))
+            agent.direction = Vec2f(math.cos(heading), math.sin(heading))
+            agent.state = agent.states[int(chunk["state"][row, i])]
+            target = int(chunk["target"][row, i])
+            if target == TARGET_NONE: agent.task = None
+            elif target == TARGET_IDLE: agent.task = Task(None, agent.id, "idle", None, Target(agent.spawn_position, None))
+            else: agent.task = Task(None, agent.id, self._target_ids[target], self._target_objects[target], Target(self._targets[target], None))
+
+    def render(self, time_s:int):
+        """Returns surface with scene at simulated time time_s"""
+        from rendering.render import BG_COLOR, COLORS, render_agents, render_crop_field, render_charging_stations, render_obstacles
+        if self.static_surface is None:
+            import pygame
+            self.static_surface = pygame.Surface(self.screen_size)
+            self.static_surface.fill(BG_COLOR)
+            render_obstacles(self.static_surface, self.camera, self.crop_field)
+            render_charging_stations(self.static_surface, self.camera, self.station_objects, self.font)
+
+        self.seek(time_s)
+        self.surface.blit(self.static_surface, (0,0))
+        render_crop_field(self.surface, self.camera, self.crop_field)
+        render_agents(self.surface, self.camera, self.agent_objects)
+        date_time = (self.start_date_time + timedelta(seconds=self.time)).strftime("%d.%m.%Y %H:%M:%S")
+        self.surface.blit(self.font.render(f"{date_time}  step: {self.time}", True, COLORS["text"]), (10, 10))
+        return self.surface
+
+    def render_bytes(self, time_s:int) -> bytes:
+        """Returns RGB bytes of frame at simulated time time_s"""
+        import pygame
+        return pygame.image.tobytes(self.render(time_s), "RGB")
+
+
+# Replay of worker process (built once in init_worker and reused for all its frames)
+_replay = None
+
+def init_worker(path, screen_size):
+    global _replay
+    _replay = Replay(path, screen_size)
+
+def render_frames(frame_times):
+    """Renders frames in worker process, returns list of RGB bytes"""
+    return [_replay.render_bytes(int(time_s)) for time_s in frame_times]
+
+def get_frame_times(reader:TrajectoryReader, interval:int, start:int=None, end:int=None):
+    start = int(reader.chunk_times[0]) if start is None else start
+    end = reader.get_end_time() if end is None else end
+    return np.arange(start, end+1, interval)
+
+def render_replay(path:str, output:str, interval:int=600, start:int=None, end:int=None, workers:int=None, batch_size:int=8,
+                  screen_size:tuple=(1200,600), frame_duration:int=50):
+    """
+    Renders frames every interval s of simulated time between start and end (whole run by default)
+    in parallel worker processes and streams them to output (.gif / .png -> animated file, otherwise folder of PNG frames).
+    Only few batches per worker are in flight at once, so memory does not grow with number of frames.
+    """
+    workers = workers or os.cpu_count()
+    frame_times = get_frame_times(TrajectoryReader(path), interval, start, end)
+    batches = deque(frame_times[i:i+batch_size] for i in range(0, len(frame_times), batch_size))
+    width, height = screen_size
+    n_written = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path, screen_size)) as executor, \
+         open_frame_writer(output, frame_duration=frame_duration) as writer:
+        # Futures are consumed in submission order (keeps frame order), batches are rendered in parallel
+        pending = deque()
+        while batches or pending:
+            while batches and len(pending) < 2*workers:
+                pending.append(executor.submit(render_frames, batches.popleft()))
+            for frame in pending.popleft().result():
+                writer.write(np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3))
+                n_written += 1
+            print(f"Rendered {n_written}/{len(frame_times)} frames")
+
+    print(f"Replay saved as {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render recorded trajectory to animated file")
+    parser.add_argument("trajectory", help="Folder written by TrajectoryRecorder")
+    parser.add_argument("output", help="Output file (.gif / .png) or folder for PNG frames")
+    parser.add_argument("--interval", type=int, default=600, help="Simulated seconds between frames")
+    parser.add_argument("--start", type=int, default=None, help="Simulated second of first frame")
+    parser.add_argument("--end", type=int, default=None, help="Simulated second of last frame")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: cores)")
+    args = parser.parse_args()
+    render_replay(args.trajectory, args.output, args.interval, args.start, args.end, args.workers)
@@ -0,0 +1,297 @@
+"""
+Compact binary trajectory of simulation run.
+
+Trajectory is a folder with meta.json, static arrays (crop/station positions, obstacles) and chunks.
+Every chunk is a folder of .npy columns (can be loaded with mmap_mode="r"):
+    time_start (1,) uint32, time_delta (rows-1,) uint16/uint32       - simulated time (s from start)
+    position_start (n_agents, 2) int32, position_delta (rows-1, n_agents, 2) int16/int32 - mm
+    heading (rows, n_agents) int16                                   - centidegrees
+    state (rows, n_agents) uint8                                     - AgentStateCode
+    soc (rows, n_agents) uint16                                      - 0.01 %
+    target (rows, n_agents) int32                                    - see TARGET_* codes
+    crop_states (n_crops,) uint8                                     - crop states at first row (keyframe)
+    crop_event_row, crop_event_crop (n_events,) uint32, crop_event_state (n_events,) uint8 - crop state changes
+"""
+
+import os
+import json
+import queue
+import threading
+import numpy as np
+
+
+POSITION_SCALE = 1000 # mm
+HEADING_SCALE = 100 # centidegrees
+SOC_SCALE = 100 # 0.01 %
+
+# Task target codes (crops are 0...n_crops-1, stations n_crops...)
+TARGET_NONE = -1
+TARGET_IDLE = -2
+
+
+def _delta_encode(values:np.ndarray, small_dtype, large_dtype):
+    """Returns (start, deltas) with deltas in small_dtype if they fit else in large_dtype"""
+    deltas = np.diff(values, axis=0)
+    info = np.iinfo(small_dtype)
+    dtype = small_dtype if deltas.size == 0 or (deltas.min() >= info.min and deltas.max() <= info.max) else large_dtype
+    return values[0], deltas.astype(dtype)
+
+def _delta_decode(start:np.ndarray, deltas:np.ndarray):
+    values = np.empty((len(deltas)+1, *np.shape(start)), dtype=np.int64)
+    values[0] = start
+    np.cumsum(deltas, axis=0, out=values[1:])
+    values[1:] += start
+    return values
+
+
+class TrajectoryRecorder:
+    """
+    Streams per step agent poses, states, SoC, task targets and crop state changes of env to folder.
+    Rows are collected in preallocated chunk buffers (fixed memory), full chunks are encoded and
+    written by background thread so simulation loop doesn't wait for disk.
+
+    Attributes:
+        path (str): Folder of trajectory
+        env (ContinuousMARLEnv): Recorded env (reset before recorder is created)
+        chunk_size (int): Number of rows (steps) in chunk
+        max_crop_events (int): Capacity of crop events buffer (chunk is flushed early when it is full,
+            buffer grows if one step changes more crops)
+    """
+    def __init__(self, path:str, env, chunk_size:int=3600, max_crop_events:int=4096):
+        self.path = path
+        self.env = env
+        self.chunk_size = chunk_size
+        self.max_crop_events = max_crop_events
+        os.makedirs(path, exist_ok=True)
+
+        self.agent_ids = list(env.agent_objects.keys())
+        self.crop_ids = env.scene.crop_field.get_crop_ids()
+        self.station_ids = list(env.scene.station_objects.keys())
+        self._target_codes = {crop_id: i for i, crop_id in enumerate(self.crop_ids)}
+        self._target_codes.update({station_id: len(self.crop_ids)+i for i, station_id in enumerate(self.station_ids)})
+        self._target_codes["idle"] = TARGET_IDLE
+
+        n_agents, n_crops = len(self.agent_ids), len(self.crop_ids)
+        self._time = np.zeros(chunk_size, dtype=np.int64)
+        self._position = np.zeros((chunk_size, n_agents, 2), dtype=np.int64)
+        self._heading = np.zeros((chunk_size, n_agents), dtype=np.int16)
+        self._state = np.zeros((chunk_size, n_agents), dtype=np.uint8)
+        self._soc = np.zeros((chunk_size, n_agents), dtype=np.uint16)
+        self._target = np.zeros((chunk_size, n_agents), dtype=np.int32)
+        self._event_row = np.zeros(max_crop_events, dtype=np.uint32)
+        self._event_crop = np.zeros(max_crop_events, dtype=np.uint32)
+        self._event_state = np.zeros(max_crop_events, dtype=np.uint8)
+        self._field_crop_states = env.scene.crop_field.states.reshape(-1) # view, row-major like crop_ids (with padding slots)
+        self._crop_mask = env.scene.crop_field.crop_mask.reshape(-1)
+        self._crop_numbers = np.cumsum(self._crop_mask) - 1 # slot -> index in crop_ids
+        self._crop_states = self._field_crop_states.copy()
+        self._chunk_crop_states = self._crop_states[self._crop_mask]
+        self._row = 0
+        self._n_events = 0
+        self.n_chunks = 0
+        self.n_steps = 0
+
+        self._meta = {
+            "agent_ids": self.agent_ids,
+            "agent_colors": [list(agent.color) for agent in env.agent_objects.values()],
+            "spawn_positions": [tuple(agent.spawn_position) for agent in env.agent_objects.values()],
+            "crop_ids": self.crop_ids,
+            "station_ids": self.station_ids,
+            "station_colors": [list(station.color) for station in env.scene.station_objects.values()],
+            "station_queue_directions": [tuple(station.queue_direction) for station in env.scene.station_objects.values()],
+            "station_waiting_offsets": [station.waiting_offset for station in env.scene.station_objects.values()],
+            "start_date_time": env.scene.start_date_time,
+            "chunk_size": self.chunk_size,
+        }
+        self._write_meta(0, 0)
+        crop_positions = env.scene.crop_field.positions[env.scene.crop_field.crop_mask].astype(np.float32)
+        np.save(os.path.join(path, "crop_positions.npy"), crop_positions)
+        station_positions = np.array([tuple(station.position) for station in env.scene.station_objects.values()], dtype=np.float32).reshape(-1, 2)
+        np.save(os.path.join(path, "station_positions.npy"), station_positions)
+        obstacles = np.array([[tuple(p) for p in obstacle] for obstacle in env.scene.crop_field.obstacles], dtype=np.float32)
+        np.save(os.path.join(path, "obstacles.npy"), obstacles)
+
+        # Background writer, bounded queue keeps memory fixed (record waits only if disk is slower than simulation)
+        self._queue = queue.Queue(maxsize=2)
+        self._writer = threading.Thread(target=self._write_chunks, daemon=True)
+        self._writer.start()
+
+    def record(self):
+        """Appends current state of env as one row (call after every env step)"""
+        env = self.env
+        row = self._row
+
+        # Crop state changes (field stores states as uint8 codes)
+        if not np.array_equal(self._field_crop_states, self._crop_states):
+            crop_states = self._field_crop_states.copy()
+            changed = np.flatnonzero(crop_states != self._crop_states)
+            if self._n_events + len(changed) > self.max_crop_events:
+                self._flush()
+                row = self._row
+                if len(changed) > self.max_crop_events: self._grow_event_buffers(len(changed))
+            n = self._n_events
+            self._event_row[n:n+len(changed)] = row
+            self._event_crop[n:n+len(changed)] = self._crop_numbers[changed]
+            self._event_state[n:n+len(changed)] = crop_states[changed]
+            self._n_events += len(changed)
+            self._crop_states = crop_states
+
+        self._time[row] = env.step_count
+        if env.fleet is not None:
+            start = next(iter(env.agent_objects.values())).fleet_index if self.agent_ids else 0
+            rows = slice(start, start + len(self.agent_ids))
+            np.rint(env.fleet.position[rows] * POSITION_SCALE, out=self._position[row], casting="unsafe")
+            direction = env.fleet.direction[rows]
+            self._heading[row] = np.rint(np.degrees(np.arctan2(direction[:, 1], direction[:, 0])) * HEADING_SCALE)
+            self._soc[row] = np.rint(env.fleet.get_soc()[rows] * SOC_SCALE)
+            self._state[row] = env.fleet.state_code[rows]
+            for i, agent in enumerate(env.agent_objects.values()):
+                self._target[row, i] = self._get_target_code(agent)
+        else:
+            for i, agent in enumerate(env.agent_objects.values()):
+                position = agent.position
+                self._position[row, i] = (round(position.x * POSITION_SCALE), round(position.y * POSITION_SCALE))
+                self._heading[row, i] = round(agent.direction.get_angle("deg") * HEADING_SCALE)
+                self._soc[row, i] = round(agent.battery.get_soc() * SOC_SCALE)
+                self._state[row, i] = agent.state.code
+                self._target[row, i] = self._get_target_code(agent)
+
+        self._row += 1
+        self.n_steps += 1
+        if self._row == self.chunk_size: self._flush()
+
+    def _grow_event_buffers(self, n_events:int):
+        """Grows crop event buffers to hold at least n_events (events of one step can't be split between chunks)"""
+        self.max_crop_events = max(n_events, 2*self.max_crop_events)
+        self._event_row = np.zeros(self.max_crop_events, dtype=np.uint32)
+        self._event_crop = np.zeros(self.max_crop_events, dtype=np.uint32)
+        self._event_state = np.zeros(self.max_crop_events, dtype=np.uint8)
+
+    def _get_target_code(self, agent):
+        if agent.task is None: return TARGET_NONE
+        return self._target_codes[agent.task.target_id]
+
+    def _flush(self):
+        """Encodes rows collected so far and hands them to writer"""
+        rows = self._row
+        if rows == 0: return
+        time_start, time_delta = _delta_encode(self._time[:rows], np.uint16, np.uint32)
+        position_start, position_delta = _delta_encode(self._position[:rows], np.int16, np.int32)
+        n_events = self._n_events
+        columns = {
+            "time_start": np.array([time_start], dtype=np.uint32),
+            "time_delta": time_delta,
+            "position_start": position_start.astype(np.int32),
+            "position_delta": position_delta,
+            "heading": self._heading[:rows].copy(),
+            "state": self._state[:rows].copy(),
+            "soc": self._soc[:rows].copy(),
+            "target": self._target[:rows].copy(),
+            "crop_states": self._chunk_crop_states,
+            "crop_event_row": self._event_row[:n_events].copy(),
+            "crop_event_crop": self._event_crop[:n_events].copy(),
+            "crop_event_state": self._event_state[:n_events].copy(),
+        }
+        self._queue.put((self.n_chunks, columns, self.n_steps))
+        self.n_chunks += 1
+        self._row = 0
+        self._n_events = 0
+        self._chunk_crop_states = self._crop_states[self._crop_mask]
+
+    def _write_chunks(self):
+        while True:
+            item = self._queue.get()
+            if item is None: break
+            chunk_index, columns, n_steps = item
+            chunk_path = os.path.join(self.path, f"chunk_{str(chunk_index).zfill(6)}")
+            os.makedirs(chunk_path, exist_ok=True)
+            for name, values in columns.items():
+                np.save(os.path.join(chunk_path, f"{name}.npy"), values)
+            # Meta covers only chunks already on disk -> trajectory of crashed run stays readable
+            self._write_meta(chunk_index+1, n_steps)
+            self._queue.task_done()
+
+    def _write_meta(self, n_chunks:int, n_steps:int):
+        """Writes meta.json with n_chunks written chunks (replaced atomically)"""
+        meta = {**self._meta, "n_chunks": n_chunks, "n_steps": n_steps}
+        temp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(meta, f, indent=4)
+        os.replace(temp_path, os.path.join(self.path, "meta.json"))
+
+    def close(self):
+        """Writes remaining rows and waits for writer (meta is updated after every written chunk)"""
+        self._flush()
+        self._queue.put(None)
+        self._writer.join()
+
+
+class TrajectoryReader:
+    """
+    Reads trajectory written by TrajectoryRecorder. Chunks are memory mapped and decoded on demand.
+
+    Attributes:
+        meta (dict): Content of meta.json
+        crop_positions (np.ndarray): (n_crops, 2) positions of crops
+        station_positions (np.ndarray): (n_stations, 2) positions of stations
+        obstacles (np.ndarray): (n_obstacles, 4, 2) corners of row separators
+    """
+    def __init__(self, path:str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.crop_positions = np.load(os.path.join(path, "crop_positions.npy"))
+        self.station_positions = np.load(os.path.join(path, "station_positions.npy"))
+        self.obstacles = np.load(os.path.join(path, "obstacles.npy"))
+        self.n_chunks = self.meta["n_chunks"]
+        self._chunk_cache = (None, None)
+        # First simulated time of every chunk (for seeking)
+        self.chunk_times = np.array([int(self._load(k, "time_start")[0]) for k in range(self.n_chunks)], dtype=np.int64)
+
+    def _load(self, chunk_index:int, name:str):
+        return np.load(os.path.join(self.path, f"chunk_{str(chunk_index).zfill(6)}", f"{name}.npy"), mmap_mode="r")
+
+    def get_chunk(self, chunk_index:int) -> dict:
+        """
+        Returns decoded chunk: time (rows,) s, position (rows, n_agents, 2) m, heading (rows, n_agents) deg,
+        state, soc (%), target, crop_states (keyframe at first row), crop_event_row/crop/state
+        """
+        cached_index, chunk = self._chunk_cache
+        if cached_index == chunk_index: return chunk
+        load = lambda name: self._load(chunk_index, name)
+        chunk = {
+            "time": _delta_decode(load("time_start")[0], load("time_delta")),
+            "position": _delta_decode(load("position_start"), load("position_delta")) / POSITION_SCALE,
+            "heading": load("heading") / HEADING_SCALE,
+            "state": np.asarray(load("state")),
+            "soc": load("soc") / SOC_SCALE,
+            "target": np.asarray(load("target")),
+            "crop_states": np.array(load("crop_states")),
+            "crop_event_row": np.asarray(load("crop_event_row")),
+            "crop_event_crop": np.asarray(load("crop_event_crop")),
+            "crop_event_state": np.asarray(load("crop_event_state")),
+        }
+        self._chunk_cache = (chunk_index, chunk)
+        return chunk
+
+    def get_end_time(self) -> int:
+        """Returns simulated time of last recorded step"""
+        return int(self.get_chunk(self.n_chunks-1)["time"][-1])
+
+    def find_chunk(self, time_s:int) -> int:
+        """Returns index of chunk that contains simulated time time_s"""
+        return max(0, int(np.searchsorted(self.chunk_times, time_s, side="right")) - 1)
+
+    def get_crop_states(self, chunk:dict, row:int) -> np.ndarray:
+        """Returns crop states after row of chunk (keyframe + crop events up to row)"""
+        crop_states = chunk["crop_states"].copy()
+        n_events = int(np.searchsorted(chunk["crop_event_row"], row, side="right"))
+        crop_states[chunk["crop_event_crop"][:n_events]] = chunk["crop_event_state"][:n_events]
+        return crop_states
+
+    def iter_rows(self):
+        """Yields (chunk, row) for every recorded step"""
+        for chunk_index in range(self.n_chunks):
+            chunk = self.get_chunk(chunk_index)
+            for row in range(len(chunk["time"])):
+                yield chunk, row
@@ -292,18 +292,16 @@ def render_gui_spawning_area_params(gui, config):
 def render_gui_crop_field(gui, crop_field):
     gui.add_text("")
     gui.add_text("Crop rows:")
-    for row_id in crop_field.rows_states.keys():
-        row_state = crop_field.rows_states[row_id]
-        row_assign = crop_field.rows_assign[row_id]
+    for row, (row_state, row_assign) in enumerate(zip(crop_field.rows_states, crop_field.rows_assign)):
         assigned = (f'{row_assign} '.ljust(9), COLORS["crop_row_assigned"]) if row_assign!=False else ("free ".ljust(9), COLORS["crop_row_free"])
         
         gui.add_text_with_color("▮", COLORS["crop_processed"] if row_state==CropRowState.PROCESSED else COLORS["crop_unprocessed"])
         gui.same_line()
-        gui.add_text(f"{str(row_id).ljust(7)}")
+        gui.add_text(f"{f'row_{row}'.ljust(7)}")
         gui.same_line()
         gui.add_text_with_color(assigned[0], assigned[1])
-        for crop_id, crop in crop_field.crops_dict.items():
-            if crop_id.split("_")[1] != row_id.split("_")[1]: continue
+        for n in range(crop_field.row_lengths[row]):
+            crop = crop_field.get_crop(row, n)
             if crop.state == CropState.UNPROCESSED:
                 color = COLORS["crop_unprocessed"]
             elif crop.state == CropState.SCANNING:
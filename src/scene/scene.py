@@ -1,53 +1,116 @@
-import pygame
 from collections import deque
 import math
+import heapq
+import numpy as np
 import os
 import json
 
 from utilities.utils import Vec2f
-from utilities.utils import generate_colors, padd_obstacle
-from rendering.camera import Camera
+from utilities.utils import generate_colors, padd_obstacles
+from utilities.spatial_grid import SpatialGrid
 from path_planning.navmesh import NavMesh
+from path_planning.travel_distances import TravelDistances
+from scene.scene_cache import get_config_hash, save_arrays, load_arrays
 from utilities.states import CropState, CropRowState
 from utilities.date_time_manager import DateTimeManager
-from utilities.configuration import CROP_SCAN_TIME, CROP_PROCESS_TIME, CHARGING_STATION_WAITING_OFFSET, CONFIG_FILE_PATH
-
-from rendering.render import (
-    render_navmesh,
-    render_graph,
-    render_coordinate_system,
-    render_spawning_area,
-    render_obstacles,
-    render_charging_stations,
-    render_crop_field,
-    render_draggable_points
-)
+from utilities.configuration import CROP_SCAN_TIME, CROP_PROCESS_TIME, CROP_GROW_TIME, CHARGING_STATION_WAITING_OFFSET, CONFIG_FILE_PATH
+
+# Rendering (pygame) is imported only when scene is rendered -> headless simulation doesn't load it
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    import pygame
+    from rendering.camera import Camera
+
+# CropState <-> uint8 code (crop field arrays, snapshots)
+CROP_STATES = list(CropState)
+CROP_STATE_CODES = {state: code for code, state in enumerate(CROP_STATES)}
+PROCESSED_CODE = CROP_STATE_CODES[CropState.PROCESSED]
 
 class Crop:
-    def __init__(self, id:str, position:Vec2f, required_scan_time:int, required_process_time:int, required_grow_time:int, state:CropState=CropState.UNPROCESSED):
+    """
+    View of one crop in CropField arrays (state and worked_time are stored in field arrays, grow_time is derived from field regrowth schedule).
+    Views are created by CropField.get_crop when needed. Crop created without field stores state in its own one element arrays.
+    Changes between processed / not processed state are reported to field (row completion counters).
+
+    Attributes:
+        id (str): Id of crop (crop_{row}_{n})
+        row (int): Index of row
+        n (int): Index of crop in row
+        index (int): Index of crop in flattened field arrays
+        position (Vec2f): Position of crop
+    """
+    def __init__(self, id:str, position:Vec2f, required_scan_time:int, required_process_time:int, required_grow_time:int, state:CropState=CropState.UNPROCESSED,
+                 field:"CropField"=None, row:int=0, n:int=0):
         self.id = id
+        self.row = row
+        self.n = n
         self.position = position
-        self.state = state
-        self.worked_time = 0
+        self.field = field
+        if field is None:
+            self.index = 0
+            self._states = np.zeros(1, dtype=np.uint8)
+            self._worked_time = np.zeros(1, dtype=np.int64)
+            self.state = state
+        else:
+            # State is kept in field arrays
+            self.index = row*field.n_crops_per_row + n
+            self._states = field.states.reshape(-1)
+            self._worked_time = field.worked_time.reshape(-1)
         self.required_scan_time = required_scan_time
         self.required_process_time = required_process_time
-        self.grow_time = 0
         self.required_grow_time = required_grow_time
 
-    def process(self):
-        if self.state == CropState.PROCESSED:
+    @property
+    def state(self) -> CropState:
+        return CROP_STATES[self._states[self.index]]
+
+    @state.setter
+    def state(self, state:CropState):
+        code = CROP_STATE_CODES[state]
+        changed = (code == PROCESSED_CODE) != (self._states[self.index] == PROCESSED_CODE)
+        self._states[self.index] = code
+        if changed and self.field is not None:
+            self.field.on_crop_processed_changed(self.row, self.n, code == PROCESSED_CODE)
+
+    @property
+    def worked_time(self) -> int:
+        return self._worked_time[self.index].item()
+
+    @worked_time.setter
+    def worked_time(self, worked_time:int):
+        self._worked_time[self.index] = worked_time
+
+    @property
+    def grow_time(self) -> int:
+        """Time (s) since crop was processed (advances only if field has regrowth enabled)"""
+        if self.field is None: return 0
+        return self.field.get_grow_time(self.row, self.n)
+
+    def process(self, time_s:int=1):
+        state = self.state
+        if state == CropState.PROCESSED:
             return
         
-        self.worked_time += 1
-        if self.state == CropState.UNPROCESSED and self.worked_time > 0:
-            self.state = CropState.SCANNING
-        elif self.state == CropState.SCANNING and self.worked_time >= self.required_scan_time:
-            self.state = CropState.SCANNED
-            self.worked_time = 0
-        elif self.state == CropState.SCANNED and self.worked_time > 0:
-            self.state = CropState.PROCESSING
-        if  self.state == CropState.PROCESSING and self.worked_time >= self.required_process_time:
-            self.state = CropState.PROCESSED
+        worked_time = self.worked_time + time_s
+        if state == CropState.UNPROCESSED and worked_time > 0:
+            state = CropState.SCANNING
+        elif state == CropState.SCANNING and worked_time >= self.required_scan_time:
+            state = CropState.SCANNED
+            worked_time = 0
+        elif state == CropState.SCANNED and worked_time > 0:
+            state = CropState.PROCESSING
+        if  state == CropState.PROCESSING and worked_time >= self.required_process_time:
+            state = CropState.PROCESSED
+        if state != self.state: self.state = state
+        self.worked_time = worked_time
+    
+    def get_time_to_state_change(self):
+        """Returns how long (s) the crop has to be processed until its state changes"""
+        match self.state:
+            case CropState.SCANNING: return max(1, self.required_scan_time - self.worked_time)
+            case CropState.PROCESSING: return max(1, self.required_process_time - self.worked_time)
+            case CropState.PROCESSED: return math.inf
+        return 1
     
     def quit_work(self):
         match self.state:
@@ -63,126 +126,413 @@ class Crop:
         return f'Crop(id={self.id}, position={self.position}, state={self.state}, worked_time={self.worked_time})'
 
 class CropField:
-    def __init__(self, config):
-        self.rows_states = {}
-        self.rows_assign = {}
-        self.crops_dict = {}
-        _ = self.reset(config)
-
-    def reset(self, config:dict):
-        left_top_pos = config["left_top_pos"]
+    """
+    A class representing a Crop Field (one or more fields of parallel crop rows). State of crops is stored in
+    (n_rows, n_crops_per_row) arrays, rows and crops are indexed by integers (row, n). Rows of all fields are
+    concatenated, rows shorter than n_crops_per_row are padded with slots that are always processed (crop_mask is False).
+
+    Attributes:
+        states (np.ndarray): uint8 codes of crop states (CROP_STATE_CODES)
+        worked_time (np.ndarray): Time (s) crops were worked on in current state
+        positions (np.ndarray): (n_rows, n_crops_per_row, 2) positions of crops (nan in padding)
+        crop_mask (np.ndarray): True for slots with crop
+        row_lengths (list): Number of crops in every row
+        row_directions (np.ndarray): (n_rows, 2) unit direction from first to last crop of every row
+        row_half_widths (np.ndarray): Half width of corridor between row separators of every row
+        obstacle_array (np.ndarray): (n_obstacles, 4, 2) row separators, obstacles are the same as lists of Vec2f
+        regrowth (bool): Processed crops become unprocessed again after their required_grow_time
+        time (int): Simulated time (s) since reset (advanced by update)
+        regrow_time (np.ndarray): Time at which processed crops regrow (inf if not processed or no regrowth)
+        rows_states (list): CropRowState of every row
+        rows_assign (list): Id of agent assigned to every row or False (change with assign_row / release_row)
+        rows_remaining (list): Number of not processed crops in every row
+        n_rows_remaining (int): Number of rows with CropRowState.UNPROCESSED
+        rows_first (list): Index of first not processed crop in every row (n_crops_per_row if none)
+        rows_last (list): Index of last not processed crop in every row (-1 if none)
+        agent_rows (dict): Row assigned to agent by agent id
+        available_rows (set): Rows that are not assigned and have not processed crops
+        crop_index (SpatialGrid): Edge crops (first and last not processed) of every row
+    """
+    OBSTACLE_WIDTH = 0.08
+    OBSTACLE_HEIGHT_OFFSET = 0.2
+    OBSTACLE_PADDING = 0.05
+
+    def __init__(self, config, regrowth:bool=False, geometry:dict=None):
+        self.regrowth = regrowth
+        self.rows_states = []
+        self.rows_assign = []
+        self.rows_remaining = []
+        self.n_rows_remaining = 0
+        self.rows_first = []
+        self.rows_last = []
+        self.agent_rows = {}
+        self.available_rows = set()
+        self.crop_index = SpatialGrid(1)
+        self._indexed_crops = []
+        self._changed_rows = set()
+        self._crops = {}
+        self._crops_dict = None
+        self.draggable_objects = self.reset(config, geometry)
+
+    @staticmethod
+    def generate_field(config:dict):
+        """
+        Returns crop positions (n_rows, n_crops_per_row, 2) and row separator obstacles (n_rows+1, 4, 2) of one field.
+        Positions are accumulated in the same order as chained Vec2f.get_offset_position (same values).
+        """
+        x, y = config["left_top_pos"].x, config["left_top_pos"].y
         angle = config["angle"]
         n_rows = config["n_rows"]
         row_spacing = config["row_spacing"]
         n_crops_per_row = config["n_crops_per_row"]
         crop_spacing = config["crop_spacing"]
         row_length = (n_crops_per_row-1) * crop_spacing
-        field_length = (n_rows-1) * row_spacing
-
-        self.n_rows = n_rows
-        self.n_crops_per_row = n_crops_per_row
-
-        self.rows_states = {f'row_{i}':CropRowState.UNPROCESSED for i in range(n_rows)}
-        self.rows_assign = {f'row_{i}':False for i in range(n_rows)}
-
-        # Generate CropRows with Crops
-        top_pos = left_top_pos
-        for i,row_id in enumerate(self.rows_states.keys()):
-            for n in range(n_crops_per_row):
-                pos = top_pos.get_offset_position(n*crop_spacing, angle+90)
-                crop_id = f'crop_{i}_{n}'
-                self.crops_dict[crop_id] = Crop(
-                    id=crop_id,
-                    position=pos,
-                    required_scan_time=CROP_SCAN_TIME,
-                    required_process_time=CROP_PROCESS_TIME,
-                    required_grow_time=24*3600
-                )
-            top_pos = top_pos.get_offset_position(row_spacing, angle)
+        row_cos, row_sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        crop_cos, crop_sin = math.cos(math.radians(angle+90)), math.sin(math.radians(angle+90))
+
+        def accumulate(start, step, n):
+            return np.cumsum(np.concatenate(([start], np.full(n-1, step)))) if n > 0 else np.zeros(0)
+
+        # Crops, row starts are offset from previous row start
+        row_x = accumulate(x, row_spacing*row_cos, n_rows)
+        row_y = accumulate(y, row_spacing*row_sin, n_rows)
+        crop_offsets = np.arange(n_crops_per_row) * crop_spacing
+        positions = np.empty((n_rows, n_crops_per_row, 2))
+        positions[..., 0] = row_x[:, None] + crop_offsets[None, :]*crop_cos
+        positions[..., 1] = row_y[:, None] + crop_offsets[None, :]*crop_sin
+
+        # Obstacles (separators between rows)
+        start_x = x + (-row_spacing/2)*row_cos
+        start_y = y + (-row_spacing/2)*row_sin
+        start_x, start_y = start_x + (-CropField.OBSTACLE_HEIGHT_OFFSET)*crop_cos, start_y + (-CropField.OBSTACLE_HEIGHT_OFFSET)*crop_sin
+        x1 = accumulate(start_x, row_spacing*row_cos, n_rows+1)
+        y1 = accumulate(start_y, row_spacing*row_sin, n_rows+1)
+        length = row_length + 2*CropField.OBSTACLE_HEIGHT_OFFSET
+        x2, y2 = x1 + length*crop_cos, y1 + length*crop_sin
+        half_width = CropField.OBSTACLE_WIDTH/2
+        obstacles = np.stack([
+            np.stack([x1 + (-half_width)*row_cos, y1 + (-half_width)*row_sin], axis=-1),
+            np.stack([x1 + half_width*row_cos, y1 + half_width*row_sin], axis=-1),
+            np.stack([x2 + half_width*row_cos, y2 + half_width*row_sin], axis=-1),
+            np.stack([x2 + (-half_width)*row_cos, y2 + (-half_width)*row_sin], axis=-1),
+        ], axis=1)
+        return positions, obstacles
+
+    @staticmethod
+    def get_field_configs(config) -> list:
+        """Returns configs of fields (config is dict of one field or list of fields), dicts are not copied"""
+        return config if isinstance(config, list) else [config]
+
+    @staticmethod
+    def build_geometry(config) -> dict:
+        """Returns arrays of field(s) from config: positions (nan padded), row_lengths, obstacles and padded_obstacles"""
+        field_configs = CropField.get_field_configs(config)
+        fields = [CropField.generate_field(field_config) for field_config in field_configs]
+
+        n_rows = sum(len(positions) for positions, _ in fields)
+        n_crops_per_row = max((positions.shape[1] for positions, _ in fields), default=0)
+        row_lengths = np.array([positions.shape[1] for positions, _ in fields for _ in range(len(positions))], dtype=np.int64)
+        all_positions = np.full((n_rows, n_crops_per_row, 2), np.nan)
+        row = 0
+        for positions, _ in fields:
+            all_positions[row:row+len(positions), :positions.shape[1]] = positions
+            row += len(positions)
+        obstacles = np.concatenate([obstacles for _, obstacles in fields]) if fields else np.zeros((0, 4, 2))
+        return {
+            "positions": all_positions,
+            "row_lengths": row_lengths,
+            "obstacles": obstacles,
+            "padded_obstacles": padd_obstacles(obstacles, CropField.OBSTACLE_PADDING),
+        }
+
+    def get_geometry(self) -> dict:
+        """Returns arrays in format of build_geometry"""
+        return {
+            "positions": self.positions,
+            "row_lengths": np.array(self.row_lengths, dtype=np.int64),
+            "obstacles": self.obstacle_array,
+            "padded_obstacles": self.padded_obstacle_array,
+        }
+
+    def reset(self, config, geometry:dict=None):
+        """
+        Builds field from config (dict or list of dicts for multiple fields), returns draggable objects for editor.
+        geometry (from build_geometry / get_geometry, e.g. scene cache) skips generation of positions and obstacles.
+        """
+        if geometry is None: geometry = self.build_geometry(config)
+        field_configs = self.get_field_configs(config)
+
+        self.positions = np.asarray(geometry["positions"])
+        self.row_lengths = np.asarray(geometry["row_lengths"]).tolist()
+        self.n_rows = n_rows = len(self.row_lengths)
+        self.n_crops_per_row = n_crops_per_row = self.positions.shape[1]
+        self.crop_mask = np.arange(n_crops_per_row)[None, :] < np.array(self.row_lengths, dtype=np.int64).reshape(-1, 1)
+
+        self.states = np.where(self.crop_mask, CROP_STATE_CODES[CropState.UNPROCESSED], PROCESSED_CODE).astype(np.uint8)
+        self.worked_time = np.zeros((n_rows, n_crops_per_row), dtype=np.int64)
+        self.regrow_time = np.full((n_rows, n_crops_per_row), np.inf)
+        self.time = 0
+        self._regrowth_queue = [] # heap of (regrow time, row, n)
+        self._crops = {} # Crop views by flat index (created in get_crop)
+        self._crops_dict = None
+
+        self.rows_states = [CropRowState.UNPROCESSED]*n_rows
+        self.rows_assign = [False]*n_rows
+        self.rows_remaining = list(self.row_lengths)
+        self.n_rows_remaining = n_rows
+        self.rows_first = [0]*n_rows
+        self.rows_last = [length-1 for length in self.row_lengths]
+        self.agent_rows = {}
+        self.available_rows = {row for row, length in enumerate(self.row_lengths) if length > 0}
+        self._changed_rows = set(range(n_rows))
+        cell_size = max([max(field_config["row_spacing"], field_config["crop_spacing"]) for field_config in field_configs] + [0.01])
+        self._build_crop_index(cell_size)
+
+        # Row corridors (for get_row_at)
+        row_directions, row_half_widths = [], []
+        for field_config in field_configs:
+            angle = math.radians(field_config["angle"] + 90)
+            row_directions += [(math.cos(angle), math.sin(angle))] * field_config["n_rows"]
+            row_half_widths += [(field_config["row_spacing"] - self.OBSTACLE_WIDTH) / 2] * field_config["n_rows"]
+        self.row_directions = np.array(row_directions, dtype=np.float64).reshape(-1, 2)
+        self.row_half_widths = np.array(row_half_widths, dtype=np.float64)
+        last_crops = self.positions[np.arange(n_rows), np.maximum(np.array(self.row_lengths, dtype=np.int64) - 1, 0)]
+        self._row_extents = np.linalg.norm(last_crops - self.positions[:, 0], axis=1) if n_rows else np.zeros(0)
 
         # Init obstacles
-        self.obstacles = []
-        obstacle_width = 0.08
-        height_offset = 0.2
-        pos1 =  left_top_pos.get_offset_position(-row_spacing/2, angle)
-        pos1 = pos1.get_offset_position(-height_offset, angle+90)
-        for i in range(n_rows+1):
-            pos2 = pos1.get_offset_position(row_length+2*height_offset, angle+90)
-            p1 = pos1.get_offset_position(-obstacle_width/2, angle)
-            p2 = pos1.get_offset_position( obstacle_width/2, angle)
-            p3 = pos2.get_offset_position( obstacle_width/2, angle)
-            p4 = pos2.get_offset_position(-obstacle_width/2, angle)
-            self.obstacles.append([p1,p2,p3,p4])
-            pos1 = pos1.get_offset_position(row_spacing, angle)
-        padding = 0.05
-        self.padded_obstacles = [padd_obstacle(obs,padding) for obs in self.obstacles]
+        self.obstacle_array = np.asarray(geometry["obstacles"])
+        self.padded_obstacle_array = np.asarray(geometry["padded_obstacles"])
+        self.obstacles = [[Vec2f(x, y) for x, y in obstacle] for obstacle in self.obstacle_array.tolist()]
+        self.padded_obstacles = [[Vec2f(x, y) for x, y in obstacle] for obstacle in self.padded_obstacle_array.tolist()]
 
-        # For editor
+        # For editor (ids field_{k}-{param} of field k)
         draggable_objects = {}
-        draggable_objects["field-left_top_pos"] = left_top_pos
-        draggable_objects["field-angle"] = left_top_pos.get_offset_position(field_length, angle).get_offset_position(row_length, angle+90)
-        draggable_objects["field-n_rows"] =  left_top_pos.get_offset_position(row_spacing*(n_rows-1), angle)
-        draggable_objects["field-row_spacing"] = left_top_pos.get_offset_position(row_spacing, angle)
-        draggable_objects["field-n_crops_per_row"] =  left_top_pos.get_offset_position(crop_spacing*(n_crops_per_row-1), angle+90)
-        draggable_objects["field-crop_spacing"] = left_top_pos.get_offset_position(crop_spacing, angle+90)
+        for k, field_config in enumerate(field_configs):
+            left_top_pos = field_config["left_top_pos"]
+            angle = field_config["angle"]
+            row_spacing = field_config["row_spacing"]
+            crop_spacing = field_config["crop_spacing"]
+            row_length = (field_config["n_crops_per_row"]-1) * crop_spacing
+            field_length = (field_config["n_rows"]-1) * row_spacing
+            draggable_objects[f"field_{k}-left_top_pos"] = left_top_pos
+            draggable_objects[f"field_{k}-angle"] = left_top_pos.get_offset_position(field_length, angle).get_offset_position(row_length, angle+90)
+            draggable_objects[f"field_{k}-n_rows"] =  left_top_pos.get_offset_position(row_spacing*(field_config["n_rows"]-1), angle)
+            draggable_objects[f"field_{k}-row_spacing"] = left_top_pos.get_offset_position(row_spacing, angle)
+            draggable_objects[f"field_{k}-n_crops_per_row"] =  left_top_pos.get_offset_position(crop_spacing*(field_config["n_crops_per_row"]-1), angle+90)
+            draggable_objects[f"field_{k}-crop_spacing"] = left_top_pos.get_offset_position(crop_spacing, angle+90)
 
         return draggable_objects
-    
+
+    def get_crop(self, row:int, n:int) -> Crop:
+        """Returns view of crop n in row (created on first request)"""
+        index = row*self.n_crops_per_row + n
+        crop = self._crops.get(index)
+        if crop is None:
+            x, y = self.positions[row, n].tolist()
+            crop = self._crops[index] = Crop(
+                id=f'crop_{row}_{n}',
+                position=Vec2f(x, y),
+                required_scan_time=CROP_SCAN_TIME,
+                required_process_time=CROP_PROCESS_TIME,
+                required_grow_time=CROP_GROW_TIME,
+                field=self,
+                row=row,
+                n=n
+            )
+        return crop
+
+    def get_crop_by_id(self, crop_id:str) -> Crop:
+        _, row, n = crop_id.split("_")
+        return self.get_crop(int(row), int(n))
+
+    def get_crop_ids(self) -> list:
+        """Ids of all crops in row-major order (without creating views)"""
+        return [f'crop_{row}_{n}' for row, length in enumerate(self.row_lengths) for n in range(length)]
+
+    @property
+    def crops(self) -> list:
+        """Views of all crops in row-major order (creates views of whole field)"""
+        return list(self.crops_dict.values())
+
+    @property
+    def crops_dict(self) -> dict:
+        """Views of all crops by crop id (creates views of whole field)"""
+        if self._crops_dict is None:
+            self._crops_dict = {}
+            for row, length in enumerate(self.row_lengths):
+                for n in range(length):
+                    crop = self.get_crop(row, n)
+                    self._crops_dict[crop.id] = crop
+        return self._crops_dict
+
     def update(self, simulation_step):
-        return
-        """ Simulate growing on crops """
-        for crop_id, crop in self.crops_dict.items():
-            if crop.state == CropState.PROCESSED:
-                crop.grow_time += simulation_step
-                if crop.grow_time >= crop.required_grow_time:
-                    crop.state = CropState.UNPROCESSED
-                    crop.grow_time = 0
+        """Advances time and regrows crops whose regrowth is due (only scheduled crops are touched)"""
+        self.time += simulation_step
+        queue = self._regrowth_queue
+        while queue and queue[0][0] <= self.time:
+            regrow_time, row, n = heapq.heappop(queue)
+            if self.regrow_time[row, n] != regrow_time: continue # crop was rescheduled
+            crop = self.get_crop(row, n)
+            crop.worked_time = 0
+            crop.state = CropState.UNPROCESSED
+
+    def get_time_to_regrowth(self):
+        """Returns time (s) until next crop regrows (inf if none is scheduled)"""
+        if not self._regrowth_queue: return math.inf
+        return max(0, int(self._regrowth_queue[0][0]) - self.time)
+
+    def get_grow_time(self, row:int, n:int) -> int:
+        regrow_time = self.regrow_time[row, n]
+        if regrow_time == np.inf: return 0
+        return int(self.time - regrow_time) + self.get_crop(row, n).required_grow_time
+
+    def on_crop_processed_changed(self, row:int, n:int, processed:bool):
+        """
+        Called by Crop n in row when it becomes processed (or not processed anymore),
+        updates row counters, frontier, crop index and regrowth schedule.
+        """
+        self._changed_rows.add(row)
+        if processed and self.regrowth:
+            regrow_time = self.time + self.get_crop(row, n).required_grow_time
+            self.regrow_time[row, n] = regrow_time
+            heapq.heappush(self._regrowth_queue, (regrow_time, row, n))
+        else:
+            self.regrow_time[row, n] = np.inf
+        if not processed:
+            self.rows_remaining[row] += 1
+            self.rows_first[row] = min(self.rows_first[row], n)
+            self.rows_last[row] = max(self.rows_last[row], n)
+            if self.rows_assign[row] is False: self.available_rows.add(row)
+            self._index_row(row)
+            return
+
+        self.rows_remaining[row] -= 1
+        if self.rows_remaining[row] == 0:
+            self.rows_first[row] = self.n_crops_per_row
+            self.rows_last[row] = -1
+            self.available_rows.discard(row)
+        else:
+            # Move frontier over processed crops (every crop is passed once until it is not processed again)
+            row_states = self.states[row]
+            if n == self.rows_first[row]:
+                while row_states[n] == PROCESSED_CODE: n += 1
+                self.rows_first[row] = n
+            elif n == self.rows_last[row]:
+                while row_states[n] == PROCESSED_CODE: n -= 1
+                self.rows_last[row] = n
+        self._index_row(row)
+
+    def _index_row(self, row:int):
+        """Replaces crops of row in crop_index with its current edge crops"""
+        for crop in self._indexed_crops[row]: self.crop_index.remove(crop)
+        self._indexed_crops[row] = sorted(self.get_row_edge_crops(row), key=lambda crop: crop.n) # fixed order -> ties are resolved same in every run
+        for crop in self._indexed_crops[row]: self.crop_index.insert(crop, (crop.position.x, crop.position.y))
+
+    def _build_crop_index(self, cell_size:float):
+        self.crop_index = SpatialGrid(cell_size)
+        self._indexed_crops = [[] for _ in range(self.n_rows)]
+        for row in range(self.n_rows): self._index_row(row)
+
+    def assign_row(self, row:int, agent_id:str):
+        previous_agent_id = self.rows_assign[row]
+        if previous_agent_id is not False and self.agent_rows.get(previous_agent_id) == row: del self.agent_rows[previous_agent_id]
+        self.rows_assign[row] = agent_id
+        self.agent_rows[agent_id] = row
+        self.available_rows.discard(row)
+
+    def release_row(self, row:int):
+        agent_id = self.rows_assign[row]
+        if agent_id is not False and self.agent_rows.get(agent_id) == row: del self.agent_rows[agent_id]
+        self.rows_assign[row] = False
+        if self.rows_remaining[row] > 0: self.available_rows.add(row)
 
     def update_row_processing_status(self):
-        for row_id, row_state in self.rows_states.items():
-            state = CropRowState.PROCESSED
-            for n in range(0,self.n_crops_per_row):
-                crop = self.crops_dict[f"crop_{row_id.split("_")[1]}_{n}"]
-                if crop.state != CropState.PROCESSED:
-                    state = CropRowState.UNPROCESSED
-                    break
-            self.rows_states[row_id] = state
-            if state == CropRowState.PROCESSED:
-                self.rows_assign[row_id] = False
+        """Updates states of rows with changed crops since last call"""
+        for row in self._changed_rows:
+            processed = self.rows_remaining[row] == 0
+            state = CropRowState.PROCESSED if processed else CropRowState.UNPROCESSED
+            if state != self.rows_states[row]:
+                self.n_rows_remaining += -1 if processed else 1
+                self.rows_states[row] = state
+            if processed and self.rows_assign[row] is not False:
+                self.release_row(row)
+        self._changed_rows.clear()
+
+    def get_row_edge_crops(self, row:int) -> set:
+        """Returns first and last not processed crop in row"""
+        if self.rows_remaining[row] == 0: return set()
+        return {self.get_crop(row, self.rows_first[row]), self.get_crop(row, self.rows_last[row])}
 
     def get_available_crops(self, agent_id=None):
-
-        def get_edge_crops_in_row(row_id):
-            crops = set()
-            for n in range(0,self.n_crops_per_row):
-                _crop = self.crops_dict[f"crop_{row_id.split("_")[1]}_{n}"]
-                if _crop.state != CropState.PROCESSED:
-                    crops.add(_crop)
-                    break
-            for n in range(self.n_crops_per_row-1, -1, -1):
-                _crop = self.crops_dict[f"crop_{row_id.split("_")[1]}_{n}"]
-                if _crop.state != CropState.PROCESSED:
-                    crops.add(_crop)
-                    break
-            
-            return crops
+        """Returns edge crops of row assigned to agent, otherwise edge crops of all available rows"""
+        if agent_id and agent_id in self.agent_rows:
+            crops = self.get_row_edge_crops(self.agent_rows[agent_id])
+            if len(crops) > 0: return crops
 
         crops = set()
-        if agent_id:
-            for row_id,row_assign in self.rows_assign.items():
-                if row_assign == agent_id:
-                    crops = get_edge_crops_in_row(row_id)
-                    if len(crops) > 0: return crops
-
-        for row_id, row_assign in self.rows_assign.items():
-            if row_assign != False and row_assign != agent_id: continue
-            crops.update(get_edge_crops_in_row(row_id))
+        for row in self.available_rows:
+            crops.update(self.get_row_edge_crops(row))
         return crops
 
+    def get_row_at(self, position) -> int:
+        """Returns row whose corridor (between its row separators, along whole separator length) contains position, None if there is none"""
+        if self.n_rows == 0: return None
+        x, y = position
+        offset_x, offset_y = x - self.positions[:, 0, 0], y - self.positions[:, 0, 1]
+        along = offset_x*self.row_directions[:, 0] + offset_y*self.row_directions[:, 1]
+        lateral = np.abs(offset_x*self.row_directions[:, 1] - offset_y*self.row_directions[:, 0])
+        inside = (along >= -self.OBSTACLE_HEIGHT_OFFSET) & (along <= self._row_extents + self.OBSTACLE_HEIGHT_OFFSET) & (lateral < self.row_half_widths)
+        rows = np.flatnonzero(inside)
+        return int(rows[0]) if len(rows) > 0 else None
+
+    def get_nearest_available_crops(self, position:Vec2f, agent_id=None, k:int=1) -> list:
+        """Returns up to k crops from get_available_crops nearest to position (sorted by distance)"""
+        if agent_id and agent_id in self.agent_rows:
+            crops = self.get_row_edge_crops(self.agent_rows[agent_id])
+            if len(crops) > 0: return sorted(crops, key=lambda crop: (crop.position.distance_to(position), crop.n))[:k]
+        return self.crop_index.nearest((position.x, position.y), k, lambda crop: crop.row in self.available_rows)
+
+    def get_state_counts(self) -> dict:
+        """Returns number of crops in every CropState"""
+        counts = np.bincount(self.states[self.crop_mask], minlength=len(CROP_STATES)).tolist()
+        return {state: count for state, count in zip(CROP_STATES, counts)}
+
     def is_processed(self):
-        for row_id, state in self.rows_states.items():
-            if state != CropRowState.PROCESSED: return False
-        return True
+        return self.n_rows_remaining == 0
+
+    def snapshot(self):
+        """Returns mutable state of crops (flattened arrays in row-major order) and rows"""
+        return {
+            "crop_states": self.states.ravel().copy(),
+            "worked_time": self.worked_time.ravel().copy(),
+            "regrow_time": self.regrow_time.ravel().copy(),
+            "time": self.time,
+            "rows_processed": np.array([state == CropRowState.PROCESSED for state in self.rows_states]),
+            "rows_assign": list(self.rows_assign),
+        }
+
+    def restore(self, state):
+        if len(state["crop_states"]) != self.states.size or len(state["rows_assign"]) != self.n_rows:
+            raise ValueError("Snapshot was taken on a different crop field")
+        self.states[:] = state["crop_states"].reshape(self.states.shape)
+        self.worked_time[:] = state["worked_time"].reshape(self.worked_time.shape)
+        self.regrow_time[:] = state["regrow_time"].reshape(self.regrow_time.shape)
+        self.time = state["time"]
+        rows, ns = np.nonzero(self.regrow_time != np.inf)
+        self._regrowth_queue = list(zip(self.regrow_time[rows, ns].tolist(), rows.tolist(), ns.tolist()))
+        heapq.heapify(self._regrowth_queue)
+        self.rows_states = [CropRowState.PROCESSED if processed else CropRowState.UNPROCESSED for processed in state["rows_processed"]]
+        self.rows_assign = list(state["rows_assign"])
+        not_processed = self.states != PROCESSED_CODE
+        self.rows_remaining = not_processed.sum(axis=1).tolist()
+        self.n_rows_remaining = self.rows_states.count(CropRowState.UNPROCESSED)
+        has_crops = not_processed.any(axis=1)
+        self.rows_first = np.where(has_crops, not_processed.argmax(axis=1), self.n_crops_per_row).tolist()
+        self.rows_last = np.where(has_crops, self.n_crops_per_row - 1 - not_processed[:, ::-1].argmax(axis=1), -1).tolist()
+        self.agent_rows = {agent_id: row for row, agent_id in enumerate(self.rows_assign) if agent_id is not False}
+        self.available_rows = {row for row, agent_id in enumerate(self.rows_assign) if agent_id is False and self.rows_remaining[row] > 0}
+        self._build_crop_index(self.crop_index.cell_size)
+        self._changed_rows = set(range(self.n_rows))
 
 class ChargingStation:
     """
@@ -216,6 +566,13 @@ class ChargingStation:
             agent.set_path()
             agent.task.target.position = self.get_waiting_position(i)
 
+    def snapshot(self):
+        """Returns ids of agents in queue"""
+        return [agent.id for agent in self.queue]
+
+    def restore(self, agent_ids, agents):
+        self.queue = deque(agents[agent_id] for agent_id in agent_ids)
+
     def get_waiting_position(self, queue_index):
         """Returns a waiting position based on queue index (e.g., spacing out agents)."""
         distance_ = queue_index * self.waiting_offset
@@ -275,11 +632,30 @@ class Scene:
 
     Attributes:
         config (dict): Dictionary that has data for scene configurement
+        shared_navmesh (NavMesh): Read-only navmesh shared with other scenes (None -> scene builds its own)
+        crop_regrowth (bool): Processed crops regrow after CROP_GROW_TIME
+        cache_dir (str): Folder of on-disk cache of built field and navmesh arrays (None -> only kept in memory)
+        compute_travel_distances (bool): Precompute navmesh travel distances between rows and stations (travel_distances)
+        travel_distances (TravelDistances): Navmesh travel distances (None if not computed)
+        navmesh_triangulation (str): Triangulation flags of navmesh (see NavMesh.TRIANGULATION_FLAGS)
+        navmesh_merge_polygons (bool): Merge navmesh triangles into convex polygons
     """
-    def __init__(self, start_date_time:str):
+    def __init__(self, start_date_time:str, navmesh:NavMesh=None, crop_regrowth:bool=False, cache_dir:str=None, compute_travel_distances:bool=False,
+                 navmesh_triangulation:str=NavMesh.TRIANGULATION_FLAGS, navmesh_merge_polygons:bool=False):
         
         super().__init__()
         self.start_date_time = start_date_time
+        self.shared_navmesh = navmesh
+        self.crop_regrowth = crop_regrowth
+        self.cache_dir = cache_dir
+        self.compute_travel_distances = compute_travel_distances
+        self.navmesh_triangulation = navmesh_triangulation
+        self.navmesh_merge_polygons = navmesh_merge_polygons
+        self.navmesh = None
+        self.travel_distances = None
+        self._artifacts_key = None # hash of config that artifacts belong to
+        self._artifacts = {}
+        self._navmesh_key = None
         self.config_file_path = CONFIG_FILE_PATH
         
         self.loader = ConfigLoader(self.config_file_path)
@@ -292,20 +668,57 @@ class Scene:
 
     def reset(self):
         self.date_time_manager = DateTimeManager(self.start_date_time)
+        # Field and navmesh arrays of unchanged config are reused (memory / disk cache)
+        artifacts = self.get_artifacts()
         # Init lines
-        self.calculate_crop_field()
+        self.calculate_crop_field(artifacts)
         # Init spawning area
         self.calculate_spawning_area()
         # Init charging stations
         self.calculate_stations()
 
-        self.calculate_navmesh()
-
-    def calculate_crop_field(self):
-        self.crop_field = CropField(self.config["field"])
+        if self.shared_navmesh is not None: self.navmesh = self.shared_navmesh
+        elif self.navmesh is None or self._navmesh_key != self._artifacts_key:
+            self.calculate_navmesh(artifacts)
+            self._navmesh_key = self._artifacts_key
+
+        self.travel_distances = None
+        if self.compute_travel_distances: self.calculate_travel_distances(artifacts)
+
+        if "field_positions" not in artifacts or (self.shared_navmesh is None and "navmesh_vertices" not in artifacts) or \
+            (self.travel_distances is not None and "travel_distances" not in artifacts):
+            self.save_artifacts()
+
+    def get_artifacts(self) -> dict:
+        """Returns arrays built for current config (from memory or disk cache), empty if config wasn't built yet"""
+        key = get_config_hash(self.config, self.navmesh_triangulation, self.navmesh_merge_polygons)
+        if key != self._artifacts_key:
+            self._artifacts_key = key
+            self._artifacts = {}
+            path = self._get_cache_path()
+            if path is not None and os.path.exists(path): self._artifacts = load_arrays(path)
+        return self._artifacts
+
+    def save_artifacts(self):
+        """Stores arrays of current field and navmesh (memory and disk cache)"""
+        self._artifacts = {f"field_{name}": array for name, array in self.crop_field.get_geometry().items()}
+        if self.shared_navmesh is None:
+            self._artifacts.update({f"navmesh_{name}": array for name, array in self.navmesh.to_arrays().items()})
+        if self.travel_distances is not None:
+            self._artifacts.update({f"travel_{name}": array for name, array in self.travel_distances.to_arrays().items()})
+        path = self._get_cache_path()
+        if path is not None: save_arrays(path, self._artifacts)
+
+    def _get_cache_path(self):
+        if self.cache_dir is None: return None
+        return os.path.join(self.cache_dir, f"{self._artifacts_key}.scene")
+
+    def calculate_crop_field(self, artifacts:dict=None):
+        geometry = {name[len("field_"):]: array for name, array in (artifacts or {}).items() if name.startswith("field_")}
+        self.crop_field = CropField(self.config["field"], self.crop_regrowth, geometry or None)
         
         self.draggable_objects = {key: value for key, value in self.draggable_objects.items() if "field" not in key}
-        self.draggable_objects.update(self.crop_field.reset(self.config["field"]))
+        self.draggable_objects.update(self.crop_field.draggable_objects)
 
     def calculate_stations(self):
         self.draggable_objects = {key: value for key, value in self.draggable_objects.items() if "station" not in key}
@@ -346,28 +759,50 @@ class Scene:
         self.draggable_objects["sa_height"] = bot_left
         self.draggable_objects["sa_angle"] = bot_right
 
-    def calculate_navmesh(self):
+    def calculate_travel_distances(self, artifacts:dict=None):
+        arrays = {name[len("travel_"):]: array for name, array in (artifacts or {}).items() if name.startswith("travel_")}
+        self.travel_distances = TravelDistances(self.navmesh, self.crop_field, self.station_objects, arrays or None)
+
+    def calculate_navmesh(self, artifacts:dict=None):
         left_top_pos = self.config["navmesh"]["left_top_pos"]
         right_bot_pos = self.config["navmesh"]["right_bot_pos"]
 
         corners = [left_top_pos.to_list(), (right_bot_pos.x, left_top_pos.y), right_bot_pos.to_list(), (left_top_pos.x,right_bot_pos.y)]
 
-        obstacles = []
-        for obs in self.crop_field.padded_obstacles:
-            obstacles.append([(p.x,p.y) for p in obs])
+        obstacles = self.crop_field.padded_obstacle_array.tolist()
 
-        self.navmesh = NavMesh(corners, obstacles=obstacles)
+        arrays = {name[len("navmesh_"):]: array for name, array in (artifacts or {}).items() if name.startswith("navmesh_")}
+        self.navmesh = NavMesh(
+            corners, obstacles=obstacles, arrays=arrays or None,
+            triangulation_flags=self.navmesh_triangulation, merge_polygons=self.navmesh_merge_polygons
+        )
 
         # For editor
         self.draggable_objects["navmesh_left_top_pos"] = left_top_pos
         self.draggable_objects["navmesh_right_bot_pos"] = right_bot_pos
 
+    def snapshot(self):
+        """Returns mutable state of scene (clock, crop field, station queues)"""
+        return {
+            "date_time": self.date_time_manager.snapshot(),
+            "crop_field": self.crop_field.snapshot(),
+            "stations": {station_id: station.snapshot() for station_id, station in self.station_objects.items()},
+        }
+
+    def restore(self, state, agents):
+        """Restores state from snapshot, agents (dict) are used to rebuild station queues"""
+        self.date_time_manager.restore(state["date_time"])
+        self.crop_field.restore(state["crop_field"])
+        for station_id, agent_ids in state["stations"].items():
+            self.station_objects[station_id].restore(agent_ids, agents)
+
     def update(self, simulation_step):
-        self.crop_field.update_row_processing_status()
         self.crop_field.update(simulation_step)
+        self.crop_field.update_row_processing_status()
         self.date_time_manager.advance_time(simulation_step)
 
-    def render_static(self, static_surface:pygame.Surface, camera:Camera, params, font):
+    def render_static(self, static_surface:"pygame.Surface", camera:"Camera", params, font):
+        from rendering.render import render_navmesh, render_graph, render_coordinate_system, render_spawning_area, render_obstacles, render_charging_stations
         if params["navmesh"]: render_navmesh(static_surface, camera, self.navmesh)
         if params["graph"]: render_graph(static_surface, camera, self.navmesh)
         if params["coordinate_system"]: render_coordinate_system(static_surface, camera, font)
@@ -375,11 +810,12 @@ class Scene:
         if params["obstacles"]: render_obstacles(static_surface, camera, self.crop_field, draw_padded_obstacles=False)
         if params["charging_stations"]: render_charging_stations(static_surface, camera, self.station_objects, font)
 
-    def render_dynamic(self, dynamic_surface:pygame.Surface, camera:Camera, params):
+    def render_dynamic(self, dynamic_surface:"pygame.Surface", camera:"Camera", params):
+        from rendering.render import render_crop_field, render_draggable_points
         if params["crop_field"]: render_crop_field(dynamic_surface, camera, self.crop_field)
         if params["drag_points"]: render_draggable_points(dynamic_surface, camera, self.draggable_objects)
 
-    def get_object_at(self, mouse_pos, camera:Camera):
+    def get_object_at(self, mouse_pos, camera:"Camera"):
         mouse_pos = camera.screen_to_scene_pos(Vec2f(mouse_pos))
         for id, pos in self.draggable_objects.items():
             if mouse_pos.is_close(pos, 0.2):
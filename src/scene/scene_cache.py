@@ -0,0 +1,56 @@
+"""
+Content-addressed on-disk cache of built scene artifacts (crop field geometry, navmesh triangulation and graph).
+
+Entries are stored under hash of scene config, so an edited config gets a new entry and unchanged config is
+loaded without triangulation and graph building. Every entry is one binary file:
+    header length (8 bytes, little endian), JSON header {name: [dtype, shape, offset]}, array data (64 byte aligned)
+Arrays are loaded as read-only memory maps.
+"""
+
+import os
+import json
+import struct
+import hashlib
+import numpy as np
+
+SCENE_CACHE_VERSION = 3 # increase when cached artifacts or the way they are built change
+ALIGNMENT = 64
+
+
+def get_config_hash(config:dict, *extra) -> str:
+    """Returns hash of config (Vec2f are hashed as lists) and extra build parameters"""
+    data = json.dumps([SCENE_CACHE_VERSION, config, extra], default=list, sort_keys=True)
+    return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+def save_arrays(path:str, arrays:dict):
+    """Writes arrays to one file (written to temporary file first, so parallel readers never see partial file)"""
+    header = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        header[name] = [array.dtype.str, list(array.shape), offset]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header_bytes = json.dumps(header).encode()
+    data_start = -(-(8 + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            file.seek(data_start + header[name][2])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(data_start + offset)
+    os.replace(temp_path, path)
+
+def load_arrays(path:str) -> dict:
+    """Returns arrays from file written by save_arrays as read-only memory maps"""
+    with open(path, "rb") as file:
+        header_length = struct.unpack("<Q", file.read(8))[0]
+        header = json.loads(file.read(header_length))
+    data_start = -(-(8 + header_length) // ALIGNMENT) * ALIGNMENT
+    arrays = {}
+    for name, (dtype, shape, offset) in header.items():
+        if 0 in shape: arrays[name] = np.empty(shape, dtype=dtype)
+        else: arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start+offset, shape=tuple(shape))
+    return arrays
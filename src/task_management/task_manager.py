@@ -27,7 +27,12 @@ class Task:
         self.object = _object
         self.target = target
         self.info = info
-    
+
+    def snapshot(self):
+        """Returns task as tuple (object is referenced by target_id)"""
+        direction = tuple(self.target.direction) if self.target.direction is not None else None
+        return (self.id, self.agent_id, self.target_id, tuple(self.target.position), direction, self.info)
+
     def __repr__(self):
         return f'Task(id={self.id}, agent_id={self.agent_id}, target_id={self.target_id}, target={self.target})'
 
@@ -46,7 +51,34 @@ class BaseTaskManager(ABC):
         self.crop_field = env.scene.crop_field
         self.obstacles = env.scene.crop_field.padded_obstacles
         self.stations = env.scene.station_objects
-    
+        self.travel_distances = env.scene.travel_distances
+
+    def snapshot(self):
+        """Returns counters, strategy and last task of each agent from history (only these are shown in GUI)"""
+        last_tasks = {}
+        for task in reversed(self.history):
+            if task.agent_id not in last_tasks: last_tasks[task.agent_id] = task
+        return {
+            "task_id_counter": self.task_id_counter,
+            "strategy": self.strategy,
+            "history": [task.snapshot() for task in reversed(last_tasks.values())],
+        }
+
+    def restore(self, state):
+        self.task_id_counter = state["task_id_counter"]
+        self.strategy = state["strategy"]
+        self.history = [self.restore_task(task_state) for task_state in state["history"]]
+
+    def restore_task(self, task_state):
+        """Rebuilds Task from Task.snapshot, object is looked up in crop field / stations"""
+        if task_state is None: return None
+        task_id, agent_id, target_id, position, direction, info = task_state
+        if target_id.startswith("crop"): _object = self.crop_field.get_crop_by_id(target_id)
+        elif target_id.startswith("station"): _object = self.stations[target_id]
+        else: _object = None
+        target = Target(Vec2f(position), Vec2f(direction) if direction is not None else None)
+        return Task(task_id, agent_id, target_id, _object, target, info)
+
     def assign_task(self, new_task: Task, agent: Agent):
         if new_task is None: return False
 
@@ -55,8 +87,7 @@ class BaseTaskManager(ABC):
             if agent.task.target_id.startswith("station"):
                 agent.task.object.release_agent(agent)
             elif agent.task.target_id.startswith("crop"):
-                row_id = f'row_{agent.task.target_id.split("_")[1]}'
-                self.crop_field.rows_assign[row_id] = False
+                self.crop_field.release_row(agent.task.object.row)
                 agent.task.object.quit_work()
                 self.crop_field.update_row_processing_status()
 
@@ -67,9 +98,7 @@ class BaseTaskManager(ABC):
 
         # Assign to current task
         if agent.task.target_id.startswith("crop"):
-            crop_id = new_task.target_id
-            row_id = f'row_{crop_id.split("_")[1]}'
-            self.crop_field.rows_assign[row_id] = agent.id
+            self.crop_field.assign_row(new_task.object.row, agent.id)
 
         return True
 
@@ -87,8 +116,7 @@ class BaseTaskManager(ABC):
                 if "station" in target_id:
                     self.stations[target_id].release_agent(agent)
                 if "crop" in target_id:
-                    row_id = f'row_{agent.task.target_id.split("_")[1]}'
-                    self.crop_field.rows_assign[row_id] = False
+                    self.crop_field.release_row(agent.task.object.row)
                     agent.task.object.quit_work()
                     self.crop_field.update_row_processing_status()
                 agent.task = None
@@ -123,12 +151,30 @@ class BaseTaskManager(ABC):
     def charging_strategy(self, unassigned_agent_ids, agents, crop_field, obstacles, stations):
         pass
 
+    def get_battery_thresholds(self):
+        """Returns SoC levels (%) at which charging_strategy changes its decisions"""
+        return []
+
+    def get_nearest_crop(self, agent:Agent):
+        """Returns nearest available crop by navmesh travel distance if scene has travel distances, otherwise by straight line"""
+        own_row = self.crop_field.agent_rows.get(agent.id)
+        if self.travel_distances is None or (own_row is not None and len(self.crop_field.get_row_edge_crops(own_row)) > 0):
+            # Crops of own row are reached straight along the row
+            nearest_crops = self.crop_field.get_nearest_available_crops(agent.position, agent.id)
+            return nearest_crops[0] if len(nearest_crops) > 0 else None
+        crops = sorted(self.crop_field.get_available_crops(), key=lambda crop: (crop.row, crop.n))
+        if len(crops) == 0: return None
+        distances = self.travel_distances.get_crop_distances(agent.position, crops)
+        return crops[min(range(len(crops)), key=distances.__getitem__)]
+
+    def get_station_distance(self, agent:Agent, station:ChargingStation) -> float:
+        """Returns navmesh travel distance to station if scene has travel distances, otherwise straight line distance"""
+        if self.travel_distances is None: return agent.position.distance_to(station.position)
+        return self.travel_distances.get_station_distance(agent.position, station.id)
+
     def get_crop_task(self, agent:Agent):
-        available_crops = self.crop_field.get_available_crops(agent.id)
-        if len(available_crops) == 0: return self.get_idle_task(agent, self.obstacles)
-        distances = {crop.id: crop.position.distance_to(agent.position) for crop in available_crops}
-        crop_id = min(distances, key=distances.get)
-        crop = self.crop_field.crops_dict[crop_id]
+        crop = self.get_nearest_crop(agent)
+        if crop is None: return self.get_idle_task(agent)
 
         target = Target(crop.position, None)
         task = Task(
@@ -188,14 +234,24 @@ class BaseTaskManager(ABC):
 
 
 class TaskManager1(BaseTaskManager):
+    # Battery levels (%) used by charging strategies
+    OPTION1_CRITICAL_BATTERY_LEVEL = 60
+    OPTION2_CRITICAL_BATTERY_LEVEL = 45
+    OPTION2_LOW_BATTERY_THRESHOLD = 60
+
     def __init__(self):
         super().__init__()
 
+    def get_battery_thresholds(self):
+        if self.strategy == 0: return [self.OPTION1_CRITICAL_BATTERY_LEVEL]
+        if self.strategy == 1: return [self.OPTION2_CRITICAL_BATTERY_LEVEL, self.OPTION2_LOW_BATTERY_THRESHOLD]
+        return []
+
     def charging_strategy(self, unassigned_agent_ids):
 
         def option1(unassigned_agent_ids):
             """ If agent has less than critical battery level -> send him to station """
-            critical_battery_level = 60
+            critical_battery_level = self.OPTION1_CRITICAL_BATTERY_LEVEL
             agent_ids_to_remove = set()
             for agent_id in unassigned_agent_ids:
                 agent = self.agents[agent_id]
@@ -212,8 +268,8 @@ class TaskManager1(BaseTaskManager):
             If agent has less than threshold battery level and maximum number of charging agents is reached -> don't go charging
             If agent has less than critical battery level -> send him to station
             """
-            critical_battery_level = 45
-            low_battery_threshold = 60
+            critical_battery_level = self.OPTION2_CRITICAL_BATTERY_LEVEL
+            low_battery_threshold = self.OPTION2_LOW_BATTERY_THRESHOLD
 
             n_of_all_charging_agents = 0
             for station_id,station in self.stations.items():
@@ -252,7 +308,7 @@ class TaskManager1(BaseTaskManager):
             """ Choose closest station """
             distances = {}
             for station_id,station in self.stations.items():
-                distances[station_id] = agent.position.distance_to(station.position)
+                distances[station_id] = self.get_station_distance(agent, station)
             return min(distances, key=distances.get)
 
         def option3(agent):
@@ -260,7 +316,7 @@ class TaskManager1(BaseTaskManager):
             distances = {}
             for station_id,station in self.stations.items():
                 queue_length = len(station.queue)
-                distances[station_id] = agent.position.distance_to(station.position) + 4*queue_length
+                distances[station_id] = self.get_station_distance(agent, station) + 4*queue_length
             return min(distances, key=distances.get)
         
         return option3(agent)
@@ -14,10 +14,14 @@ WHEEL_RADIUS = 0.05 # m
 TOLERANCE_DISTANCE = 0.005 # m
 TOLERANCE_ANGLE = 0.1 # °
 
+# ADAPTIVE STEP
+ADAPTIVE_STEP_MAX_ANGLE = 5 # °, larger heading errors (turning towards waypoint) use 1 s steps
+
 # CROP
 CROP_RADIUS = 0.1
 CROP_SCAN_TIME = 1 * 60 # s
 CROP_PROCESS_TIME = 2 * 60 # s
+CROP_GROW_TIME = 24 * 3600 # s, processed crop regrows after (if crop_regrowth is enabled)
 
 # CHARGING STATION
 CHARGING_STATION_WIDTH = 0.5
@@ -29,11 +33,13 @@ BATTERY_DISCHARGE_STATE_IDLE = 10
 BATTERY_DISCHARGE_STATE_TRAVEL = 2*350
 BATTERY_DISCHARGE_STATE_WORK_SCAN = 100
 BATTERY_DISCHARGE_STATE_WORK_PROCESS = 400
+BATTERY_DISCHARGED_SOC = 6 # % at which agent is discharged
 
 
 FONT_PATH = "../assets/fonts/dejavu-sans-mono/DejaVuSansMono.ttf"
 
 CONFIG_FILE_PATH = "config.json"
+SCENE_CACHE_DIR = "../cache/scenes" # built field / navmesh arrays by hash of config
 
 BASE_PARAMS = {
     "simulation": {
@@ -42,6 +48,18 @@ BASE_PARAMS = {
         "fps": 60,
         "render_interval": 1,
         "date_time": "01.01.2025 00:00:00",
+        "fleet_engine": False, # agents stored in struct-of-arrays and updated in batch
+        "time_skipping": False, # jump to next event when no agent needs per second simulation
+        "max_time_skip": 3600, # s
+        "adaptive_step": False, # integrate steady travel phases in one step
+        "crop_regrowth": False, # processed crops become unprocessed again after CROP_GROW_TIME (multi-day operation)
+        "scene_cache": False, # load built field / navmesh of unchanged config.json from SCENE_CACHE_DIR
+        "navmesh_triangulation": "pq10", # flags of Triangle library: p - obstacles (required), q<angle> - minimum angle, a<area> - maximum area
+        "navmesh_merge_polygons": False, # merge navmesh triangles into convex polygons (smaller graph, paths searched through portals)
+        "travel_distances": False, # task manager ranks crops / stations by precomputed navmesh path length instead of straight line
+        "profile": False, # time subsystems (env.profile_report(), infos["profile"])
+        "profile_dump_interval": 0, # s of simulated time between dumps of profile report to file (0 -> no dumps)
+        "profile_file": "profile.txt",
     },
     "render": {
         "scene": {
@@ -1,33 +1,28 @@
 from PIL import Image
+import numpy as np
 import os
 
-"""
-If you would like to make renders of env make sure to call after env.render():
+from utilities.frame_writer import open_frame_writer
 
-screenshot = pygame.display.get_surface()  # Get the current screen surface
-pygame.image.save(screenshot, f"../<FILE_PATH>.png")  # Save it as a PNG file
+"""
+Converts folder of PNG frames to animated file (frames are streamed, only one is loaded at a time).
+Run from src: python -m utilities.create_gif
+Frames can be written directly while simulating (see take_screenshots in main.py / utilities/frame_writer.py),
+this is for folders of existing PNG frames.
 """
 
 # Parameters
-image_folder = '../../dev/'  # Folder containing PNG images
-output_gif = '../../media/simulation.gif'
+image_folder = '../dev/'  # Folder containing PNG images
+output_gif = '../media/simulation.gif' # .gif or .png (APNG)
 duration = 1  # Duration per frame in milliseconds
-loop = 0  # loop forever
 
 # Get list of PNG files
 images = [img for img in os.listdir(image_folder) if img.endswith('.png')]
 images.sort()
 
-# Open images
-frames = [Image.open(os.path.join(image_folder, img)) for img in images]
-
-# Save as GIF
-frames[0].save(
-    output_gif,
-    save_all=True,
-    append_images=frames[1:],
-    duration=duration,
-    loop=loop
-)
+with open_frame_writer(output_gif, frame_duration=duration) as writer:
+    for img in images:
+        with Image.open(os.path.join(image_folder, img)) as frame:
+            writer.write(np.asarray(frame.convert("RGB")))
 
 print(f"GIF saved as {output_gif}")
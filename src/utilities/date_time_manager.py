@@ -21,3 +21,10 @@ class DateTimeManager:
     def reset(self, start_date="01.01.2025 00:00:00"):
         """Resets the simulation time."""
         self.current_time = datetime.strptime(start_date, "%d.%m.%Y %H:%M:%S")
+
+    def snapshot(self):
+        """Returns current simulation time (datetime)"""
+        return self.current_time
+
+    def restore(self, current_time):
+        self.current_time = current_time
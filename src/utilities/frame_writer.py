@@ -0,0 +1,173 @@
+import os
+import zlib
+import queue
+import struct
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+
+
+class BaseFrameWriter(ABC):
+    """
+    Streams frames to file without keeping them in memory.
+    Frames are handed to background thread behind bounded queue (write waits only when encoder falls behind),
+    so memory stays bounded by max_queue frames regardless of number of frames.
+
+    Attributes:
+        path (str): Output file / folder
+        frame_duration (int): Duration of frame in ms (animated formats)
+        min_interval (float): Minimal simulated time (s) between written frames (decimation), 0 -> every frame
+        n_frames (int): Number of written frames
+    """
+    def __init__(self, path:str, frame_duration:int=50, min_interval:float=0, max_queue:int=8):
+        self.path = path
+        self.frame_duration = frame_duration
+        self.min_interval = min_interval
+        self.n_frames = 0
+        self._last_time = None
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._encode_frames, daemon=True)
+        self._thread.start()
+
+    def wants_frame(self, time_s:float=None) -> bool:
+        """False if frame at simulated time time_s would be dropped by decimation (check before grabbing frame)"""
+        if time_s is None or self._last_time is None: return True
+        return time_s - self._last_time >= self.min_interval
+
+    def write(self, frame, time_s:float=None) -> bool:
+        """
+        Queues frame (pygame.Surface or (height, width, 3) uint8 array) for encoding.
+        Returns False if frame was dropped by decimation.
+        """
+        if self._error is not None: raise self._error
+        if not self.wants_frame(time_s): return False
+        self._last_time = time_s
+        self._queue.put((self._to_array(frame), time_s))
+        self.n_frames += 1
+        return True
+
+    def _to_array(self, frame):
+        """Copy of frame as (height, width, 3) uint8 array (surface can change after write returns)"""
+        if isinstance(frame, np.ndarray): return np.ascontiguousarray(frame, dtype=np.uint8)
+        import pygame
+        return np.ascontiguousarray(pygame.surfarray.array3d(frame).transpose(1, 0, 2))
+
+    def _encode_frames(self):
+        while True:
+            item = self._queue.get()
+            if item is None: break
+            if self._error is not None: continue
+            try:
+                self._encode(*item)
+            except Exception as error:
+                self._error = error
+
+    def close(self):
+        """Waits for queued frames to be encoded and finalizes output"""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None: raise self._error
+        self._finalize()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @abstractmethod
+    def _encode(self, frame:np.ndarray, time_s:float=None):
+        """Encodes frame and appends it to output (runs in background thread)"""
+        pass
+
+    def _finalize(self):
+        pass
+
+
+class GifWriter(BaseFrameWriter):
+    """Appends frames to animated GIF (every frame has its own adaptive palette)"""
+    def __init__(self, path:str, frame_duration:int=50, min_interval:float=0, max_queue:int=8, loop:int=0):
+        self.loop = loop
+        self._file = open(path, "wb")
+        super().__init__(path, frame_duration, min_interval, max_queue)
+
+    def _encode(self, frame, time_s=None):
+        from PIL import Image, GifImagePlugin
+        image = Image.fromarray(frame).quantize(256, method=Image.Quantize.FASTOCTREE)
+        if self._file.tell() == 0:
+            header, _ = GifImagePlugin.getheader(image, info={"loop": self.loop, "duration": self.frame_duration})
+            for data in header: self._file.write(data)
+        for data in GifImagePlugin.getdata(image, duration=self.frame_duration, include_color_table=True):
+            self._file.write(data)
+
+    def _finalize(self):
+        self._file.write(b";") # trailer
+        self._file.close()
+
+
+class ApngWriter(BaseFrameWriter):
+    """Appends frames to animated PNG (lossless, RGB)"""
+    def __init__(self, path:str, frame_duration:int=50, min_interval:float=0, max_queue:int=8, loop:int=0, compress_level:int=6):
+        self.loop = loop
+        self.compress_level = compress_level
+        self._file = open(path, "wb")
+        self._sequence = 0
+        self._actl_offset = None
+        super().__init__(path, frame_duration, min_interval, max_queue)
+
+    def _write_chunk(self, chunk_type:bytes, data:bytes):
+        self._file.write(struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data)))
+
+    def _encode(self, frame, time_s=None):
+        height, width = frame.shape[:2]
+        if self._actl_offset is None:
+            self._file.write(b"\x89PNG\r\n\x1a\n")
+            self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            self._actl_offset = self._file.tell()
+            self._write_chunk(b"acTL", struct.pack(">II", 0, self.loop)) # number of frames is set in _finalize
+
+        self._write_chunk(b"fcTL", struct.pack(">IIIIIHHBB", self._sequence, width, height, 0, 0, self.frame_duration, 1000, 0, 0))
+        self._sequence += 1
+
+        # Every scanline with filter 2 (up)
+        rows = frame.reshape(height, width*3)
+        scanlines = np.empty((height, width*3 + 1), dtype=np.uint8)
+        scanlines[:, 0] = 2
+        scanlines[0, 1:] = rows[0]
+        np.subtract(rows[1:], rows[:-1], out=scanlines[1:, 1:])
+        data = zlib.compress(scanlines.tobytes(), self.compress_level)
+
+        if self._sequence == 1:
+            self._write_chunk(b"IDAT", data)
+        else:
+            self._write_chunk(b"fdAT", struct.pack(">I", self._sequence) + data)
+            self._sequence += 1
+
+    def _finalize(self):
+        self._write_chunk(b"IEND", b"")
+        self._file.seek(self._actl_offset)
+        self._write_chunk(b"acTL", struct.pack(">II", self.n_frames, self.loop))
+        self._file.close()
+
+
+class FrameSequenceWriter(BaseFrameWriter):
+    """Writes every frame as PNG to folder, named by time_s passed to write (e.g. step count), otherwise by frame number"""
+    def __init__(self, path:str, frame_duration:int=50, min_interval:float=0, max_queue:int=8):
+        os.makedirs(path, exist_ok=True)
+        self._index = 0
+        super().__init__(path, frame_duration, min_interval, max_queue)
+
+    def _encode(self, frame, time_s=None):
+        from PIL import Image
+        number = int(time_s) if time_s is not None else self._index
+        Image.fromarray(frame).save(os.path.join(self.path, f"{str(number).zfill(6)}.png"))
+        self._index += 1
+
+
+def open_frame_writer(path:str, frame_duration:int=50, min_interval:float=0, max_queue:int=8) -> BaseFrameWriter:
+    """Returns writer for path: .gif -> GifWriter, .png/.apng -> ApngWriter, otherwise folder of PNG frames"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif": return GifWriter(path, frame_duration, min_interval, max_queue)
+    if extension in (".png", ".apng"): return ApngWriter(path, frame_duration, min_interval, max_queue)
+    return FrameSequenceWriter(path, frame_duration, min_interval, max_queue)
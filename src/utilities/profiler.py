@@ -0,0 +1,88 @@
+import time
+
+
+class Profiler:
+    """
+    Collects cumulative timings and call counts of simulation subsystems.
+    Methods are timed by replacing them on instances with timed wrappers (see wrap),
+    so when profiling is switched off nothing is wrapped and it costs nothing.
+
+    Attributes:
+        enabled (bool): True if wrappers are attached
+        stats (dict): name: [calls, total_s]
+        total_name (str): Name of stat that other stats are compared to in report (share of step)
+    """
+    def __init__(self, enabled:bool=False, total_name:str="env.step"):
+        self.enabled = enabled
+        self.total_name = total_name
+        self.stats = {}
+        self._wrapped = [] # (obj, method_name)
+
+    def reset(self):
+        """Clears collected stats"""
+        self.stats.clear()
+
+    def add(self, name:str, duration:float):
+        stat = self.stats.get(name)
+        if stat is None: self.stats[name] = [1, duration]
+        else:
+            stat[0] += 1
+            stat[1] += duration
+
+    def wrap(self, obj, method_name:str, name):
+        """
+        Replaces obj.method_name with timed version of method defined on its class.
+        name is str or function(obj) -> str evaluated before each call (e.g. key per agent state).
+        """
+        method = getattr(type(obj), method_name).__get__(obj)
+        add = self.add
+        perf_counter = time.perf_counter
+        if callable(name):
+            get_name = name
+            def timed(*args, **kwargs):
+                key = get_name(obj)
+                start = perf_counter()
+                result = method(*args, **kwargs)
+                add(key, perf_counter() - start)
+                return result
+        else:
+            def timed(*args, **kwargs):
+                start = perf_counter()
+                result = method(*args, **kwargs)
+                add(name, perf_counter() - start)
+                return result
+        obj.__dict__[method_name] = timed
+        self._wrapped.append((obj, method_name))
+
+    def unwrap_all(self):
+        """Restores original methods of all wrapped objects"""
+        for obj, method_name in self._wrapped:
+            obj.__dict__.pop(method_name, None)
+        self._wrapped = []
+
+    def report(self) -> str:
+        """Returns table with calls, total, mean per call and share of total_name for every stat"""
+        header_names = ['name', 'calls', 'total_s', 'mean_us', 'share_%']
+        col_widths = [48, 10, 10, 10, 8]
+        total = self.stats.get(self.total_name, [0, 0])[1]
+
+        lines = []
+        header = "|"
+        for i,header_name in enumerate(header_names):
+            header += f" {header_name.ljust(col_widths[i])} |"
+        lines.append(header)
+        lines.append("-" * len(header))
+        for name, (calls, total_s) in sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True):
+            share = f"{100*total_s/total:.1f}" if total > 0 else "-"
+            body_data = [name, calls, f"{total_s:.3f}", f"{1e6*total_s/calls:.1f}", share]
+            body = "|"
+            for i,body_name in enumerate(body_data):
+                body += f" {str(body_name).ljust(col_widths[i])} |"
+            lines.append(body)
+        return "\n".join(lines)
+
+    def dump(self, file_path:str, header:str=""):
+        """Writes report to file (overwrites)"""
+        with open(file_path, "w") as f:
+            if header: f.write(header + "\n")
+            f.write(self.report() + "\n")
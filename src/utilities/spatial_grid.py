@@ -0,0 +1,98 @@
+import math
+
+
+class SpatialGrid:
+    """
+    Uniform grid of points for nearest neighbour queries, items can be inserted / removed at any time.
+
+    Attributes:
+        cell_size (float): Size of grid cell
+        cells (dict): Items with their positions (x, y) in every occupied cell (ix, iy)
+    """
+    def __init__(self, cell_size:float):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._item_cells = {}
+        self._bounds = None # min_ix, min_iy, max_ix, max_iy of cells that were occupied
+
+    def __len__(self):
+        return len(self._item_cells)
+
+    def __contains__(self, item):
+        return item in self._item_cells
+
+    def _get_cell(self, x:float, y:float) -> tuple:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, item, position):
+        if item in self._item_cells: self.remove(item)
+        x, y = position
+        cell = self._get_cell(x, y)
+        self.cells.setdefault(cell, {})[item] = (x, y)
+        self._item_cells[item] = cell
+        ix, iy = cell
+        if self._bounds is None: self._bounds = (ix, iy, ix, iy)
+        else:
+            min_ix, min_iy, max_ix, max_iy = self._bounds
+            self._bounds = (min(min_ix, ix), min(min_iy, iy), max(max_ix, ix), max(max_iy, iy))
+
+    def remove(self, item):
+        cell = self._item_cells.pop(item, None)
+        if cell is None: return
+        items = self.cells[cell]
+        del items[item]
+        if len(items) == 0: del self.cells[cell]
+
+    def clear(self):
+        self.cells = {}
+        self._item_cells = {}
+        self._bounds = None
+
+    def _get_ring_cells(self, cx:int, cy:int, ring:int):
+        """Cells with Chebyshev distance ring from cell (cx, cy)"""
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for ix in range(cx-ring, cx+ring+1):
+            yield (ix, cy-ring)
+            yield (ix, cy+ring)
+        for iy in range(cy-ring+1, cy+ring):
+            yield (cx-ring, iy)
+            yield (cx+ring, iy)
+
+    def nearest(self, position, k:int=1, filter=None) -> list:
+        """
+        Returns up to k items nearest to position sorted by distance, items for which filter(item) is False are skipped.
+        Rings of cells around position are searched until no closer item can be found,
+        if rest of rings has more cells than grid has occupied cells, occupied cells are scanned instead.
+        """
+        if len(self._item_cells) == 0: return []
+        x, y = position
+        cx, cy = self._get_cell(x, y)
+        min_ix, min_iy, max_ix, max_iy = self._bounds
+        max_ring = max(abs(cx - min_ix), abs(max_ix - cx), abs(cy - min_iy), abs(max_iy - cy))
+
+        def add_candidates(candidates, items):
+            for item, (item_x, item_y) in items.items():
+                if filter is not None and not filter(item): continue
+                candidates.append((math.sqrt((item_x - x) ** 2 + (item_y - y) ** 2), item))
+
+        candidates = []
+        n_visited = 0
+        for ring in range(max_ring+1):
+            n_ring_cells = 8*ring if ring > 0 else 1
+            if n_visited + n_ring_cells > len(self.cells):
+                candidates = []
+                for items in self.cells.values(): add_candidates(candidates, items)
+                break
+            n_visited += n_ring_cells
+            for cell in self._get_ring_cells(cx, cy, ring):
+                items = self.cells.get(cell)
+                if items is not None: add_candidates(candidates, items)
+            # Items in cells of next rings are at least ring*cell_size away
+            if len(candidates) >= k:
+                candidates.sort(key=lambda candidate: candidate[0])
+                if candidates[k-1][0] <= ring*self.cell_size: break
+
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [item for _, item in candidates[:k]]
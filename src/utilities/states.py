@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 class CropRowState(Enum):
     UNPROCESSED = "unprocessed"
@@ -9,4 +9,12 @@ class CropState(Enum):
     SCANNING = "scanning"
     SCANNED = "scanned"
     PROCESSING = "processing"
-    PROCESSED = "processed"
\ No newline at end of file
+    PROCESSED = "processed"
+
+class AgentStateCode(IntEnum):
+    IDLE = 0
+    TRAVEL = 1
+    CHARGING = 2
+    WORK_SCAN = 3
+    WORK_PROCESS = 4
+    DISCHARGED = 5
@@ -178,3 +178,19 @@ def padd_obstacle(obstacle, padding):
     ]
 
     return [Vec2f(float(x), float(y)) for x, y in new_points]
+
+def padd_obstacles(obstacles:np.ndarray, padding:float) -> np.ndarray:
+    """
+    Vectorised padd_obstacle for many obstacles with same number of points.
+
+    Attributes:
+        obstacles (np.ndarray): (n_obstacles, n_points, 2) points of obstacles
+        padding (float): The amount to expand outward.
+
+    Returns:
+        np.ndarray: (n_obstacles, n_points, 2) padded obstacle points.
+    """
+    edges = obstacles - np.roll(obstacles, -1, axis=1)
+    normals = np.stack([-edges[..., 1], edges[..., 0]], axis=-1) / np.sqrt((edges**2).sum(axis=-1, keepdims=True))
+    shifts = np.roll(normals, 1, axis=1) + normals # normals[i-1] + normals[i]
+    return obstacles + shifts / np.sqrt((shifts**2).sum(axis=-1, keepdims=True)) * padding
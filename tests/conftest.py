@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules are imported from src and read config.json / assets relative to it
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+os.chdir(SRC_DIR)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
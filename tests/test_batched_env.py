@@ -0,0 +1,22 @@
+import numpy as np
+
+from utilities.configuration import ENV_PARAMS
+from batched_env import BatchedFarmEnv
+
+
+def test_step_after_all_instances_finished_with_time_skipping(monkeypatch):
+    monkeypatch.setitem(ENV_PARAMS["simulation"], "time_skipping", True)
+    batched_env = BatchedFarmEnv(2)
+    batched_env.reset(seed=0)
+    batched_env.assign_tasks()
+    batched_env.step()
+    batched_env.done[:] = True # instances are frozen when finished
+    step_counts = [env.step_count for env in batched_env.envs]
+
+    observations, rewards, terminations, truncations, infos = batched_env.step()
+
+    assert [env.step_count for env in batched_env.envs] == step_counts
+    assert observations.shape == (2, batched_env.n_agents, BatchedFarmEnv.obs_dim)
+    assert terminations.all()
+    assert not truncations.any()
+    assert np.array_equal(rewards, np.zeros((2, batched_env.n_agents)))
@@ -0,0 +1,29 @@
+import copy
+import pygame
+
+from utilities.utils import Vec2f
+from preview.editor_preview import SceneEditorPreview
+
+
+def test_drag_second_field_of_multiple_fields():
+    editor = SceneEditorPreview()
+    first = editor.scene.config["field"]
+    second = copy.deepcopy(first)
+    second["left_top_pos"] = first["left_top_pos"] + Vec2f(0, 6)
+    editor.scene.config["field"] = [first, copy.deepcopy(second)]
+    editor.scene.calculate_crop_field()
+    editor.render()
+
+    start = editor.camera.scene_to_screen_pos(editor.scene.draggable_objects["field_1-left_top_pos"])
+    end = (start[0] + editor.camera.scene_to_screen_val(1), start[1])
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=start))
+    pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=end, rel=(0, 0), buttons=(1, 0, 0)))
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, button=1, pos=end))
+    editor.handle_events()
+    editor.render()
+
+    fields = editor.scene.config["field"]
+    assert fields[0] == first
+    assert fields[1]["left_top_pos"].is_close(second["left_top_pos"] + Vec2f(1, 0), 0.02)
+    assert editor.scene.crop_field.n_rows == first["n_rows"] + second["n_rows"]
+    pygame.quit()
@@ -0,0 +1,29 @@
+import random
+import numpy as np
+
+from utilities.configuration import ENV_PARAMS
+from env import ContinuousMARLEnv
+
+
+def test_reset_observations_are_not_overwritten_by_step():
+    random.seed(0)
+    np.random.seed(0)
+    env = ContinuousMARLEnv()
+    observations, _ = env.reset()
+    kept = {agent_id: observation.copy() for agent_id, observation in observations.items()}
+    for _ in range(50):
+        env.task_manager.assign_tasks()
+        step_observations, _, _, _, _ = env.step({agent_id: None for agent_id in env.agents})
+    assert any(not np.array_equal(kept[agent_id], step_observations[agent_id]) for agent_id in kept)
+    for agent_id, observation in observations.items():
+        np.testing.assert_array_equal(observation, kept[agent_id])
+
+
+def test_render_field_params_of_multiple_fields(monkeypatch):
+    monkeypatch.setitem(ENV_PARAMS["render"]["gui"], "field_params", True)
+    monkeypatch.setitem(ENV_PARAMS["render"]["gui"], "spawning_area_params", True)
+    env = ContinuousMARLEnv()
+    env.reset()
+    env.scene.config["field"] = [env.scene.config["field"], env.scene.config["field"]]
+    env.render()
+    env.close()
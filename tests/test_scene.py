@@ -0,0 +1,37 @@
+from utilities.utils import Vec2f
+from utilities.states import CropState
+from utilities.configuration import CROP_SCAN_TIME, CROP_PROCESS_TIME, CROP_GROW_TIME
+from scene.scene import CropField
+
+FIELD_CONFIG = {"left_top_pos": Vec2f(0, 0), "angle": 0.0, "n_rows": 2, "row_spacing": 0.5, "n_crops_per_row": 3, "crop_spacing": 0.3}
+
+
+def process_until_state_change(crop):
+    """Processes crop 1 s at a time, returns time (s) until its state changed"""
+    state = crop.state
+    time_s = 0
+    while crop.state == state:
+        crop.process(1)
+        time_s += 1
+    return time_s
+
+
+def test_regrown_crop_takes_full_scan_time():
+    field = CropField(FIELD_CONFIG, regrowth=True)
+    crop = field.get_crop(0, 1)
+    crop.process(1)
+    assert process_until_state_change(crop) == CROP_SCAN_TIME - 1
+    crop.process(1)
+    assert process_until_state_change(crop) == CROP_PROCESS_TIME - 1
+    assert crop.state == CropState.PROCESSED
+    assert field.rows_remaining[0] == 2
+
+    field.update(CROP_GROW_TIME)
+
+    assert crop.state == CropState.UNPROCESSED
+    assert crop.worked_time == 0
+    assert field.rows_remaining[0] == 3
+    assert 0 in field.available_rows
+    crop.process(1)
+    assert crop.state == CropState.SCANNING
+    assert process_until_state_change(crop) == CROP_SCAN_TIME - 1
@@ -0,0 +1,41 @@
+import json
+import os
+import numpy as np
+
+from env import ContinuousMARLEnv
+from scene.scene import PROCESSED_CODE
+from recording.trajectory import TrajectoryRecorder, TrajectoryReader
+
+
+def test_step_with_more_crop_events_than_buffer(tmp_path):
+    env = ContinuousMARLEnv()
+    env.reset()
+    recorder = TrajectoryRecorder(str(tmp_path), env, chunk_size=8, max_crop_events=4)
+    recorder.record()
+    crop_field = env.scene.crop_field
+    crop_field.states[crop_field.crop_mask] = PROCESSED_CODE # mass change, e.g. after reset or regrowth
+    recorder.record()
+    recorder.close()
+
+    reader = TrajectoryReader(str(tmp_path))
+    chunk, row = list(reader.iter_rows())[-1]
+    assert (reader.get_crop_states(chunk, row) == PROCESSED_CODE).all()
+
+
+def test_meta_is_written_with_every_chunk(tmp_path):
+    env = ContinuousMARLEnv()
+    env.reset()
+    recorder = TrajectoryRecorder(str(tmp_path), env, chunk_size=2)
+    for _ in range(5):
+        env.task_manager.assign_tasks()
+        env.step_arrays()
+        recorder.record()
+    recorder._queue.join() # run is not closed (e.g. crashed), written chunks are readable
+
+    with open(os.path.join(tmp_path, "meta.json"), "r") as f:
+        meta = json.load(f)
+    assert meta["n_chunks"] == 2
+    assert meta["n_steps"] == 4
+    reader = TrajectoryReader(str(tmp_path))
+    assert len(list(reader.iter_rows())) == 4
+    assert reader.get_end_time() == 4*env.simulation_step